@@ -2,10 +2,9 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from ..core.database import get_db
-from ..core.security import verify_token
-from ..services.auth_service import AuthService
-from ..models.user import User
+from ..core.database import get_db, replica_router
+from ..core.security import verify_token, is_token_denied
+from ..services.auth_service import AuthService, UserPrincipal
 
 # security scheme
 security = HTTPBearer()
@@ -13,14 +12,23 @@ security = HTTPBearer()
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
+) -> UserPrincipal:
+    """
+    Get current authenticated user.
+    
+    Returns the cached principal (id, is_active, is_superuser) rather than the
+    full user row; handlers that need the profile load it themselves.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
-        headers={"WW-Authentiacte": "Bearer"},
+        headers={"WWW-Authenticate": "Bearer"},
     )
     
+    # signed out on its device, before the verified-token cache can answer
+    if is_token_denied(credentials.credentials):
+        raise credentials_exception
+    
     # verify token.
     payload = verify_token(credentials.credentials, "access")
     if not payload:
@@ -31,20 +39,24 @@ async def get_current_user(
         raise credentials_exception
     
     auth_service = AuthService(db)
-    user = await auth_service.get_user_by_id(int(user_id))
+    user = await auth_service.get_principal(int(user_id))
     if user is None:
         raise credentials_exception
     
+    # revoked by logout after this token was issued.
+    if user.tokens_valid_after and payload.get("iat", 0) < user.tokens_valid_after:
+        raise credentials_exception
+    
     if not user.is_active:
         raise HTTPException(
-            status_code=status.HTTP_404_BAD_REQUEST,
+            status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user"
         )
     return user
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: UserPrincipal = Depends(get_current_user)
+) -> UserPrincipal:
     """Get current active user"""
     if not current_user.is_active:
         raise HTTPException(
@@ -54,12 +66,31 @@ async def get_current_active_user(
     return current_user
         
 async def get_current_superuser(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: UserPrincipal = Depends(get_current_user)
+) -> UserPrincipal:
     """Get current superuser"""
     if not current_user.is_superuser:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+async def get_read_db(
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """Session for read-only endpoints, on the read replica when it is safe to use"""
+    async with replica_router.session(current_user.id) as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+async def get_write_db(
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> AsyncSession:
+    """Primary session for endpoints that write; the user's reads follow to the primary"""
+    replica_router.note_write(current_user.id)
+    return db
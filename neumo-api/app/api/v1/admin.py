@@ -0,0 +1,65 @@
+# admin analytics endpoints (superusers only).
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal
+from datetime import datetime, timedelta, timezone
+from ...schemas.analytics import PredictionSeriesResponse, ModelBreakdownResponse
+from ...services.analytics_service import AnalyticsService
+from ...api.deps import get_current_superuser, get_read_db
+from ...services.auth_service import UserPrincipal
+
+router = APIRouter()
+
+@router.get("/analytics/predictions", response_model=PredictionSeriesResponse)
+async def get_prediction_analytics(
+    hours: int = Query(24, ge=1, le=24 * 90, description="Window size, ending now"),
+    bucket: Literal["hour", "day"] = "hour",
+    current_user: UserPrincipal = Depends(get_current_superuser),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Predictions per hour/day with class mix, failure rate and latency percentiles"""
+    analytics_service = AnalyticsService(db)
+    
+    try:
+        since = datetime.now(timezone.utc) - timedelta(hours=hours)
+        series = await analytics_service.get_prediction_series(since, bucket=bucket)
+        
+        return PredictionSeriesResponse(
+            success=True,
+            message="Prediction analytics retrieved successfully",
+            refreshed_at=series["refreshed_at"],
+            data=series["buckets"]
+        )
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve analytics: {str(e)}"
+        )
+
+@router.get("/analytics/models", response_model=ModelBreakdownResponse)
+async def get_model_analytics(
+    hours: int = Query(24 * 7, ge=1, le=24 * 90, description="Window size, ending now"),
+    current_user: UserPrincipal = Depends(get_current_superuser),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Per model version volume, class mix, failure rate, confidence and latency"""
+    analytics_service = AnalyticsService(db)
+    
+    try:
+        since = datetime.now(timezone.utc) - timedelta(hours=hours)
+        breakdown = await analytics_service.get_model_breakdown(since)
+        
+        return ModelBreakdownResponse(
+            success=True,
+            message="Model analytics retrieved successfully",
+            refreshed_at=breakdown["refreshed_at"],
+            data=breakdown["models"]
+        )
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve analytics: {str(e)}"
+        )
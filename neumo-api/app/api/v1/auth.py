@@ -1,17 +1,19 @@
 # authentication endpoints
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 from ...core.database import get_db
-from ...core.security import create_access_token, create_refresh_token
+from ...core.security import (
+    create_access_token, create_refresh_token, forget_token, login_throttle, token_hash, verify_token
+)
 from ...schemas.auth import (
-    Token, LoginRequest, RegisterRequest, RefreshTokenRequest
+    Token, LoginRequest, RegisterRequest, RefreshTokenRequest, LogoutRequest
 )
 from ...schemas.user import User, UserCreate
-from ...services.auth_service import AuthService
-from ...api.deps import get_current_user
-from ...models.user import User as UserModel
+from ...services.auth_service import AuthService, UserPrincipal
+from ...api.deps import get_current_user, security
 
 router = APIRouter()
 
@@ -28,8 +30,8 @@ async def register(
         user_create = UserCreate(**user_data.dict())
         user = await auth_service.create_user(user_create)
         # create tokens.
-        access_token = create_access_token(data={"sub": str(user.id)})
         refresh_token = create_refresh_token(data={"sub": str(user.id)})
+        access_token = create_access_token(data={"sub": str(user.id), "sid": token_hash(refresh_token)})
         
         # store refresh token
         await auth_service.store_refresh_token(user.id, refresh_token)
@@ -47,9 +49,12 @@ async def register(
 @router.post("/login", response_model=Token)
 async def login(
     login_data: LoginRequest,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     """Login User"""
+    # throttled before any password work is done
+    login_throttle.check(request.client.host if request.client else "unknown")
     auth_service = AuthService(db)
     
     # Authenticating the user.
@@ -62,8 +67,9 @@ async def login(
         )
         
     # create token
-    access_token = create_access_token(data={"sub": str(user.id)})
     refresh_token = create_refresh_token(data={"sub": str(user.id)})
+    # "sid" ties the access token to its session, so /logout can end it
+    access_token = create_access_token(data={"sub": str(user.id), "sid": token_hash(refresh_token)})
     
     # store refresh token
     await auth_service.store_refresh_token(user.id, refresh_token)
@@ -81,21 +87,17 @@ async def refresh_token(
     """Refreshing the access token"""
     auth_service = AuthService(db)
     
-    # verify refresh token
-    user = await auth_service.verify_refresh_token(token_data.refresh_token)
-    if not user:
+    # redeem the refresh token for a new one (single use)
+    rotated = await auth_service.rotate_refresh_token(token_data.refresh_token)
+    if not rotated:
         raise HTTPException(
-            status_code=status.HTTP_404_UNAUTHORIZED,
+            status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid refresh token",
-            headers={"WW-Autheticate": "Bearer"},
+            headers={"WWW-Authenticate": "Bearer"},
         )
-        
-    # create new tokens
-    access_token = create_access_token(data={"sub": str(user.id)})
-    refresh_token = create_refresh_token(data={"sub": str(user)})
+    user_id, refresh_token = rotated
     
-    # store new refresh token
-    await auth_service.store_refresh(user.id, refresh_token)
+    access_token = create_access_token(data={"sub": str(user_id), "sid": token_hash(refresh_token)})
     
     return Token(
         access_token=access_token,
@@ -104,24 +106,58 @@ async def refresh_token(
     
 @router.post("/logout")
 async def logout(
-    current_user: UserModel = Depends(get_current_user),
+    logout_data: Optional[LogoutRequest] = None,
+    current_user: UserPrincipal = Depends(get_current_user),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
 ):
-    """Logout user"""
+    """
+    Logout this device.
+    
+    Revokes the presented access token and the session's refresh token;
+    other devices stay signed in. Without a refresh token in the body, the
+    session the access token was issued with is revoked.
+    """
     auth_service = AuthService(db)
-    await auth_service.revoke_refresh_token(current_user.id)
+    # already verified (and cached) by get_current_user
+    payload = verify_token(credentials.credentials, "access")
+    if logout_data and logout_data.refresh_token:
+        await auth_service.revoke_refresh_token(current_user.id, logout_data.refresh_token)
+    elif payload.get("sid"):
+        await auth_service.revoke_session(current_user.id, payload["sid"])
+    await auth_service.revoke_access_token(credentials.credentials, float(payload["exp"]))
     return {"message": "Successfully logged out"}
 
+@router.post("/logout-all")
+async def logout_all(
+    current_user: UserPrincipal = Depends(get_current_user),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+):
+    """Logout every device: revokes all of the user's access and refresh tokens"""
+    auth_service = AuthService(db)
+    await auth_service.revoke_all_tokens(current_user.id)
+    forget_token(credentials.credentials)
+    return {"message": "Successfully logged out of all devices"}
+
 @router.get("/me", response_model=User)
 async def get_current_user_info(
-    current_user: UserModel = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Get current user information"""
-    return current_user
+    auth_service = AuthService(db)
+    user = await auth_service.get_user_by_id(current_user.id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return user
 
 @router.get("/verify")
 async def verify_token_endpoint(
-    current_user: UserModel = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """Verify if token is valid"""
     return {"valid": True, "user_id": current_user.id}
\ No newline at end of file
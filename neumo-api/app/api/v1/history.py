@@ -1 +1,92 @@
-# history endpoints
\ No newline at end of file
+# history endpoints
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import datetime
+from ...schemas.history import PredictionEventListResponse, EventType
+from ...services.history_service import HistoryService
+from ...api.deps import get_current_user, get_read_db
+from ...services.auth_service import UserPrincipal
+
+router = APIRouter()
+
+@router.get("/", response_model=PredictionEventListResponse)
+async def get_history(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    event_type: Optional[EventType] = None,
+    since: Optional[datetime] = Query(None, description="Events at or after"),
+    until: Optional[datetime] = Query(None, description="Events before"),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get the current user's prediction history, newest first"""
+    history_service = HistoryService(db)
+    
+    try:
+        page = await history_service.get_user_events(
+            user_id=current_user.id,
+            limit=limit,
+            cursor=cursor,
+            event_type=event_type,
+            since=since,
+            until=until
+        )
+        
+        return PredictionEventListResponse(
+            success=True,
+            message="History retrieved successfully",
+            data=page.items,
+            per_page=limit,
+            next_cursor=page.next_cursor
+        )
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve history: {str(e)}"
+        )
+
+@router.get("/prediction/{prediction_id}", response_model=PredictionEventListResponse)
+async def get_prediction_history(
+    prediction_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get the audit trail of one of the current user's predictions"""
+    history_service = HistoryService(db)
+    
+    try:
+        page = await history_service.get_user_events(
+            user_id=current_user.id,
+            prediction_id=prediction_id,
+            limit=limit,
+            cursor=cursor
+        )
+        
+        return PredictionEventListResponse(
+            success=True,
+            message="Prediction history retrieved successfully",
+            data=page.items,
+            per_page=limit,
+            next_cursor=page.next_cursor
+        )
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve prediction history: {str(e)}"
+        )
@@ -1,32 +1,116 @@
 # prediction endpoints - UPDATED
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Header, Request, Response
 from fastapi.security import HTTPBearer
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
-from ...core.database import get_db
+from typing import List, Optional, Literal
+from datetime import datetime
+from pydantic import ValidationError
 from ...schemas.prediction import (
     Prediction, PredictionUpdate, PredictionResponse, 
-    PredictionListResponse, PredictionSummary
+    PredictionListResponse, PredictionSummary, PredictionFilter,
+    PredictionStatsResponse, PredictionChangesResponse, PredictionJobResponse
 )
-from ...services.prediction_service import PredictionService
-from ...api.deps import get_current_user
-from ...models.user import User as UserModel
+from ...services.prediction_service import PredictionService, parse_fields
+from ...services.stats_service import StatsService
+from ...services.changes_service import ChangesService
+from ...services.job_service import PredictionJobService
+from ...services.idempotency_service import IdempotencyService, request_fingerprint
+from ...services.events_service import change_notifier, stream_changes, stream_start_cursor
+from ...services.history_service import history_recorder
+from ...models.history import (
+    EVENT_CREATED, EVENT_VIEWED, EVENT_UPDATED, EVENT_FLAGGED, EVENT_REVIEWED, EVENT_DELETED
+)
+from ...api.deps import get_current_user, get_read_db, get_write_db
+from ...services.auth_service import UserPrincipal
 from ...utils.image_processing import validate_image_file, get_image_metadata
+from ...utils.responses import trusted_response
+from ...utils.exceptions import CursorExpiredError, OverloadedError, IdempotencyKeyMismatchError
+from ...core.admission import inference_admission, Priority
+from ...core.config import settings
+from ...utils.pagination import decode_cursor
+from ...utils.etag import prediction_etag, listing_etag, etag_matches, presign_window
 
 router = APIRouter()
 
+def prediction_filters(
+    prediction_class: Optional[Literal["NORMAL", "PNEUMONIA"]] = Query(None),
+    created_from: Optional[datetime] = Query(None, description="Created at or after"),
+    created_to: Optional[datetime] = Query(None, description="Created before"),
+    min_confidence: Optional[float] = Query(None, description="Between 0 and 1"),
+    max_confidence: Optional[float] = Query(None, description="Between 0 and 1"),
+    is_flagged: Optional[bool] = Query(None),
+    reviewed_by_doctor: Optional[bool] = Query(None),
+    min_age: Optional[int] = Query(None, description="Between 0 and 150"),
+    max_age: Optional[int] = Query(None, description="Between 0 and 150"),
+    patient_gender: Optional[Literal["Male", "Female", "Other"]] = Query(None),
+) -> PredictionFilter:
+    """
+    Collect the history filter query parameters.
+    
+    Ranges are checked by PredictionFilter, so out-of-range and inverted
+    bounds both get a 400.
+    """
+    try:
+        return PredictionFilter(
+            prediction_class=prediction_class,
+            created_from=created_from,
+            created_to=created_to,
+            min_confidence=min_confidence,
+            max_confidence=max_confidence,
+            is_flagged=is_flagged,
+            reviewed_by_doctor=reviewed_by_doctor,
+            min_age=min_age,
+            max_age=max_age,
+            patient_gender=patient_gender
+        )
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+# clients may keep responses but must revalidate them with If-None-Match
+CACHE_CONTROL = "private, no-cache"
+
+async def listing_cache_headers(
+    prediction_service: PredictionService,
+    user_id: int,
+    with_images: bool
+) -> dict:
+    """ETag headers for a page of the user's predictions"""
+    last_updated, count = await prediction_service.get_listing_version(user_id)
+    variant = str(presign_window()) if with_images else ""
+    return {
+        "ETag": listing_etag(user_id, last_updated, count, variant),
+        "Cache-Control": CACHE_CONTROL
+    }
+
 @router.post("/predict", response_model=PredictionResponse)
 async def create_prediction(
     file: UploadFile = File(..., description="X-ray image file"),
     patient_age: Optional[int] = Form(None, description="Patient age"),
     patient_gender: Optional[str] = Form(None, description="Patient gender"),
     patient_symptoms: Optional[str] = Form(None, description="Patient symptoms"),
-    current_user: UserModel = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    idempotency_key: Optional[str] = Header(
+        None, max_length=255, description="Client-chosen key that makes retries of this request safe"
+    ),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_write_db)
 ):
-    """Create new pneumonia prediction from X-ray image"""
+    """
+    Create new pneumonia prediction from X-ray image.
+    
+    Runs under inference admission control: when the pipeline is saturated
+    the request is refused right away with 429/503 and Retry-After.
+    
+    With an Idempotency-Key, a retry of the same request gets the original
+    response (marked Idempotent-Replayed) instead of a second prediction;
+    one arriving while the original still runs waits for it.
+    """
     prediction_service = PredictionService(db)
+    idempotency_service = IdempotencyService(db)
     
     try:
         # Validate image file
@@ -35,8 +119,97 @@ async def create_prediction(
         # Reset file pointer after validation
         await file.seek(0)
         
-        # Create prediction
-        prediction = await prediction_service.create_prediction(
+        if idempotency_key:
+            fingerprint = request_fingerprint(
+                await file.read(), file.filename, patient_age, patient_gender, patient_symptoms
+            )
+            await file.seek(0)
+            stored = await idempotency_service.begin(current_user.id, idempotency_key, fingerprint)
+            if stored is not None:
+                # stored without its image URL, which expires long before the key
+                stored["data"] = prediction_service.with_presigned_url(stored["data"])
+                return trusted_response(PredictionResponse, headers={"Idempotent-Replayed": "true"}, **stored)
+        
+        try:
+            async with inference_admission.admit(
+                Priority.INTERACTIVE,
+                deadline=settings.INFERENCE_INTERACTIVE_DEADLINE_SECONDS
+            ):
+                # Create prediction (already serialized, with a presigned URL)
+                prediction = await prediction_service.create_prediction(
+                    user_id=current_user.id,
+                    image_file=file.file,
+                    filename=file.filename,
+                    patient_age=patient_age,
+                    patient_gender=patient_gender,
+                    patient_symptoms=patient_symptoms
+                )
+        except Exception:
+            # let a retry with the same key run the request again
+            if idempotency_key:
+                await idempotency_service.release(current_user.id, idempotency_key)
+            raise
+        
+        history_recorder.record(EVENT_CREATED, prediction["id"], current_user.id, {
+            "prediction_class": prediction["prediction_class"],
+            "status": prediction["status"]
+        })
+        
+        response = PredictionResponse(
+            success=True,
+            message="Prediction created successfully",
+            data=prediction
+        )
+        if idempotency_key:
+            await idempotency_service.complete(
+                current_user.id, idempotency_key,
+                response.model_dump(mode="json", exclude={"data": {"image_url"}})
+            )
+        return response
+        
+    except OverloadedError:
+        # answered with Retry-After by the app-wide handler
+        raise
+    except IdempotencyKeyMismatchError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Prediction failed: {str(e)}"
+        )
+
+@router.post("/jobs", response_model=PredictionJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_prediction_job(
+    request: Request,
+    file: UploadFile = File(..., description="X-ray image file"),
+    patient_age: Optional[int] = Form(None, description="Patient age"),
+    patient_gender: Optional[str] = Form(None, description="Patient gender"),
+    patient_symptoms: Optional[str] = Form(None, description="Patient symptoms"),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_write_db)
+):
+    """
+    Queue a pneumonia prediction and return right away.
+    
+    The image is stored and a job worker runs the model later. Poll the
+    Location URL (or watch /prediction/events) until the job is completed or
+    failed; the job id is also the prediction id.
+    """
+    prediction_service = PredictionService(db)
+    
+    try:
+        validate_image_file(file)
+        await file.seek(0)
+        
+        prediction = await prediction_service.enqueue_prediction(
             user_id=current_user.id,
             image_file=file.file,
             filename=file.filename,
@@ -45,16 +218,17 @@ async def create_prediction(
             patient_symptoms=patient_symptoms
         )
         
-        # Get prediction with presigned URL for immediate access
-        prediction_with_url = await prediction_service.get_prediction_with_presigned_url(
-            prediction.id, 
-            current_user.id
-        )
+        history_recorder.record(EVENT_CREATED, prediction["id"], current_user.id, {
+            "status": prediction["status"]
+        })
         
-        return PredictionResponse(
+        return trusted_response(
+            PredictionJobResponse,
+            status_code=status.HTTP_202_ACCEPTED,
+            headers={"Location": str(request.url_for("get_prediction_job", job_id=prediction["id"]))},
             success=True,
-            message="Prediction created successfully",
-            data=prediction_with_url if prediction_with_url else prediction
+            message="Prediction queued",
+            data={"job_id": prediction["id"], "status": prediction["status"], "attempts": 0, "prediction": None}
         )
         
     except ValueError as e:
@@ -65,67 +239,246 @@ async def create_prediction(
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Prediction failed: {str(e)}"
+            detail=f"Failed to queue prediction: {str(e)}"
         )
 
-@router.get("/", response_model=PredictionListResponse)
+@router.get("/jobs/{job_id}", response_model=PredictionJobResponse)
+async def get_prediction_job(
+    job_id: int,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get a queued prediction's status, and the prediction once it is done"""
+    job_service = PredictionJobService(db)
+    
+    try:
+        job = await job_service.get_job(job_id, current_user.id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve job: {str(e)}"
+        )
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found or not authorized"
+        )
+    
+    # tell pollers when to come back while the job is still pending
+    headers = None if job["prediction"] else {"Retry-After": "1"}
+    return trusted_response(
+        PredictionJobResponse,
+        headers=headers,
+        success=True,
+        message="Job retrieved successfully",
+        data=job
+    )
+
+@router.get("/", response_model=PredictionListResponse, response_model_exclude_unset=True)
 async def get_user_predictions(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0, description="Offset paging, kept for compatibility"),
+    limit: int = Query(100, ge=1, le=500),
     include_images: bool = False,
-    current_user: UserModel = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    total: Optional[Literal["exact", "estimated"]] = Query(
+        None, description="Also return the size of the user's history"
+    ),
+    fields: Optional[str] = Query(
+        None, description="Comma separated fields to return for each prediction, e.g. id,created_at,prediction_class"
+    ),
+    filters: PredictionFilter = Depends(prediction_filters),
+    if_none_match: Optional[str] = Header(None),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get all predictions for current user"""
+    """
+    Get predictions for current user, optionally filtered by date, confidence, review state and patient.
+    
+    Pages carry a weak ETag over the user's whole history; a matching
+    If-None-Match gets 304 without loading the page.
+    """
     prediction_service = PredictionService(db)
     
+    if cursor and skip:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either cursor or skip, not both"
+        )
+    
     try:
-        predictions = await prediction_service.get_user_predictions(
+        selected_fields = parse_fields(fields)
+        cache_headers = await listing_cache_headers(
+            prediction_service,
+            current_user.id,
+            with_images=include_images or bool(selected_fields and "image_url" in selected_fields)
+        )
+        if etag_matches(if_none_match, cache_headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+        
+        page = await prediction_service.get_user_predictions(
             user_id=current_user.id,
             skip=skip,
             limit=limit,
-            include_presigned_urls=include_images
-        )
-        
-        if not include_images:
-            # Convert to summary format for list view
-            prediction_summaries = [
-                {
-                    "id": p["id"],
-                    "prediction_class": p["prediction_class"],
-                    "confidence_score": p["confidence_score"],
-                    "created_at": p["created_at"],
-                    "status": p["status"]
-                } for p in predictions
-            ]
+            include_presigned_urls=include_images,
+            cursor=cursor,
+            fields=selected_fields,
+            filters=filters
+        )
+        
+        if total:
+            total_count = await prediction_service.count_user_predictions(
+                current_user.id,
+                estimated=(total == "estimated"),
+                filters=filters
+            )
         else:
-            prediction_summaries = predictions
+            total_count = len(page.items)
         
-        return PredictionListResponse(
+        return trusted_response(
+            PredictionListResponse,
+            exclude_unset=True,
+            headers=cache_headers,
             success=True,
             message="Predictions retrieved successfully",
-            data=prediction_summaries,
-            total=len(prediction_summaries),
+            data=page.items,
+            total=total_count,
             page=skip // limit + 1,
-            per_page=limit
+            per_page=limit,
+            next_cursor=page.next_cursor,
+            total_is_estimate=(total == "estimated")
         )
         
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve predictions: {str(e)}"
         )
 
+@router.get("/stats", response_model=PredictionStatsResponse)
+async def get_prediction_stats(
+    days: Optional[int] = Query(None, ge=1, le=3660, description="Only the last N days; all history if omitted"),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get prediction counts by class, average confidence, review counts and daily volume"""
+    stats_service = StatsService(db)
+    
+    try:
+        stats = await stats_service.get_user_stats(current_user.id, days=days)
+        
+        return trusted_response(
+            PredictionStatsResponse,
+            success=True,
+            message="Prediction statistics retrieved successfully",
+            data=stats
+        )
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve prediction statistics: {str(e)}"
+        )
+
+@router.get("/changes", response_model=PredictionChangesResponse)
+async def get_prediction_changes(
+    since: Optional[str] = Query(None, description="cursor from the previous call; omit for a full sync"),
+    limit: int = Query(500, ge=1, le=1000),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get the current user's predictions created, updated or deleted since a cursor"""
+    changes_service = ChangesService(db)
+    
+    try:
+        page = await changes_service.get_changes(current_user.id, since=since, limit=limit)
+        
+        return trusted_response(
+            PredictionChangesResponse,
+            success=True,
+            message="Changes retrieved successfully",
+            data=page.items,
+            cursor=page.cursor,
+            has_more=page.has_more
+        )
+        
+    except CursorExpiredError as e:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve changes: {str(e)}"
+        )
+
+@router.get("/events")
+async def stream_prediction_events(
+    last_event_id: Optional[str] = Header(None),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """
+    Stream the current user's prediction changes as server-sent events.
+    
+    Reconnecting clients send Last-Event-ID and resume after the last change
+    they received; without it the stream starts from now.
+    """
+    cursor = last_event_id or stream_start_cursor()
+    try:
+        decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    # raises OverloadedError (429) past the per-user stream limit; the stream
+    # itself subscribes once the response body starts
+    change_notifier.check_capacity(current_user.id)
+    return StreamingResponse(
+        stream_changes(current_user.id, cursor),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/{prediction_id}", response_model=PredictionResponse)
 async def get_prediction(
     prediction_id: int,
-    current_user: UserModel = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    if_none_match: Optional[str] = Header(None),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get specific prediction by ID with presigned URL"""
+    """
+    Get specific prediction by ID with presigned URL.
+    
+    Carries a strong ETag from updated_at; with a matching If-None-Match only
+    updated_at is read and 304 is returned without presigning.
+    """
     prediction_service = PredictionService(db)
     
     try:
+        if if_none_match:
+            updated_at = await prediction_service.get_prediction_version(prediction_id, current_user.id)
+            if updated_at is not None:
+                etag = prediction_etag(prediction_id, updated_at)
+                if etag_matches(if_none_match, etag):
+                    history_recorder.record(EVENT_VIEWED, prediction_id, current_user.id)
+                    return Response(
+                        status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+                    )
+        
         prediction = await prediction_service.get_prediction_with_presigned_url(
             prediction_id, 
             current_user.id
@@ -137,7 +490,14 @@ async def get_prediction(
                 detail="Prediction not found or not authorized"
             )
         
-        return PredictionResponse(
+        history_recorder.record(EVENT_VIEWED, prediction_id, current_user.id)
+        
+        return trusted_response(
+            PredictionResponse,
+            headers={
+                "ETag": prediction_etag(prediction_id, datetime.fromisoformat(prediction["updated_at"])),
+                "Cache-Control": CACHE_CONTROL
+            },
             success=True,
             message="Prediction retrieved successfully",
             data=prediction
@@ -155,8 +515,8 @@ async def get_prediction(
 async def update_prediction(
     prediction_id: int,
     update_data: PredictionUpdate,
-    current_user: UserModel = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_write_db)
 ):
     """Update prediction (mainly for doctor reviews)"""
     prediction_service = PredictionService(db)
@@ -190,6 +550,15 @@ async def update_prediction(
             current_user.id
         )
         
+        changes = update_data.dict(exclude_unset=True)
+        if changes.get("reviewed_by_doctor"):
+            event_type = EVENT_REVIEWED
+        elif changes.get("is_flagged"):
+            event_type = EVENT_FLAGGED
+        else:
+            event_type = EVENT_UPDATED
+        history_recorder.record(event_type, prediction_id, current_user.id, {"fields": sorted(changes)})
+        
         return PredictionResponse(
             success=True,
             message="Prediction updated successfully",
@@ -207,8 +576,8 @@ async def update_prediction(
 @router.delete("/{prediction_id}")
 async def delete_prediction(
     prediction_id: int,
-    current_user: UserModel = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_write_db)
 ):
     """Delete prediction and associated S3 image"""
     prediction_service = PredictionService(db)
@@ -225,6 +594,8 @@ async def delete_prediction(
                 detail="Prediction not found or not authorized"
             )
         
+        history_recorder.record(EVENT_DELETED, prediction_id, current_user.id)
+        
         return {"message": "Prediction and associated image deleted successfully"}
         
     except HTTPException:
@@ -235,15 +606,23 @@ async def delete_prediction(
             detail=f"Failed to delete prediction: {str(e)}"
         )
 
-@router.get("/class/{prediction_class}", response_model=PredictionListResponse)
+@router.get("/class/{prediction_class}", response_model=PredictionListResponse, response_model_exclude_unset=True)
 async def get_predictions_by_class(
     prediction_class: str,
-    skip: int = 0,
-    limit: int = 100,
-    current_user: UserModel = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    skip: int = Query(0, ge=0, description="Offset paging, kept for compatibility"),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    total: Optional[Literal["exact", "estimated"]] = Query(
+        None, description="Also return how many of the user's predictions have this class"
+    ),
+    fields: Optional[str] = Query(
+        None, description="Comma separated fields to return for each prediction, e.g. id,created_at,confidence_score"
+    ),
+    if_none_match: Optional[str] = Header(None),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get predictions filtered by class (NORMAL/PNEUMONIA)"""
+    """Get predictions filtered by class (NORMAL/PNEUMONIA); conditional like GET /"""
     prediction_service = PredictionService(db)
     
     # Validate prediction class
@@ -253,36 +632,60 @@ async def get_predictions_by_class(
             detail="Invalid prediction class. Must be 'NORMAL' or 'PNEUMONIA'"
         )
     
+    if cursor and skip:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either cursor or skip, not both"
+        )
+    
     try:
-        predictions = await prediction_service.get_predictions_by_class(
+        selected_fields = parse_fields(fields)
+        cache_headers = await listing_cache_headers(
+            prediction_service,
+            current_user.id,
+            with_images=bool(selected_fields and "image_url" in selected_fields)
+        )
+        if etag_matches(if_none_match, cache_headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+        
+        # scoped to the current user in SQL, so pages are always full
+        page = await prediction_service.get_predictions_by_class(
+            user_id=current_user.id,
             prediction_class=prediction_class,
             skip=skip,
-            limit=limit
+            limit=limit,
+            cursor=cursor,
+            fields=selected_fields
         )
         
-        # Filter by current user
-        user_predictions = [p for p in predictions if p.user_id == current_user.id]
-        
-        prediction_summaries = [
-            {
-                "id": p.id,
-                "prediction_class": p.prediction_class,
-                "confidence_score": p.confidence_score,
-                "created_at": p.created_at.isoformat(),
-                "is_flagged": p.is_flagged,
-                "reviewed_by_doctor": p.reviewed_by_doctor
-            } for p in user_predictions
-        ]
+        if total:
+            total_count = await prediction_service.count_user_predictions(
+                current_user.id,
+                estimated=(total == "estimated"),
+                prediction_class=prediction_class
+            )
+        else:
+            total_count = len(page.items)
         
-        return PredictionListResponse(
+        return trusted_response(
+            PredictionListResponse,
+            exclude_unset=True,
+            headers=cache_headers,
             success=True,
             message=f"Predictions with class '{prediction_class}' retrieved successfully",
-            data=prediction_summaries,
-            total=len(prediction_summaries),
+            data=page.items,
+            total=total_count,
             page=skip // limit + 1,
-            per_page=limit
+            per_page=limit,
+            next_cursor=page.next_cursor,
+            total_is_estimate=(total == "estimated")
         )
         
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -292,8 +695,8 @@ async def get_predictions_by_class(
 @router.post("/{prediction_id}/flag")
 async def flag_prediction(
     prediction_id: int,
-    current_user: UserModel = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_write_db)
 ):
     """Flag a prediction for review"""
     prediction_service = PredictionService(db)
@@ -319,6 +722,8 @@ async def flag_prediction(
                 detail="Not authorized to flag this prediction"
             )
         
+        history_recorder.record(EVENT_FLAGGED, prediction_id, current_user.id)
+        
         return {"message": "Prediction flagged successfully"}
         
     except HTTPException:
@@ -332,7 +737,7 @@ async def flag_prediction(
 @router.post("/validate-image")
 async def validate_image(
     file: UploadFile = File(...),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """Validate uploaded image without creating prediction"""
     try:
@@ -0,0 +1,87 @@
+"""
+Maintenance commands.
+
+    python -m app.cli rebuild-stats [--user-id ID]
+    python -m app.cli refresh-analytics [--hours N | --all]
+    python -m app.cli ensure-history-partitions [--months-ahead N]
+    python -m app.cli prediction-worker [--once]
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+from .core.database import AsyncSessionLocal, async_engine
+from .services.stats_service import StatsService
+from .services.analytics_service import AnalyticsService
+from .services.history_service import HistoryService
+from .services.job_service import prediction_job_worker
+from .core.config import settings
+
+async def rebuild_stats(args):
+    async with AsyncSessionLocal() as session:
+        rows = await StatsService(session).rebuild(user_id=args.user_id)
+    scope = f"user {args.user_id}" if args.user_id is not None else "all users"
+    print(f"Rebuilt prediction stats for {scope}: {rows} rollup rows")
+
+async def refresh_analytics(args):
+    if args.all:
+        since = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    else:
+        since = datetime.now(timezone.utc) - timedelta(hours=args.hours)
+    async with AsyncSessionLocal() as session:
+        refreshed = await AnalyticsService(session).refresh(since)
+    if refreshed:
+        print(f"Refreshed prediction aggregates since {since.isoformat()}")
+    else:
+        print("Another process is refreshing the aggregates, try again shortly")
+
+async def ensure_history_partitions(args):
+    async with AsyncSessionLocal() as session:
+        names = await HistoryService(session).ensure_partitions(args.months_ahead)
+    print(f"History partitions in place: {', '.join(names)}")
+
+async def prediction_worker(args):
+    if args.once:
+        await prediction_job_worker.drain()
+        return
+    print(f"Processing prediction jobs in batches of {prediction_job_worker.batch_size}")
+    while True:
+        try:
+            await prediction_job_worker.drain()
+        except Exception as e:
+            print(f"Prediction job batch failed: {e}")
+        await asyncio.sleep(settings.PREDICTION_JOBS_POLL_INTERVAL_SECONDS)
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Neumo API maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    rebuild = commands.add_parser("rebuild-stats", help="Recompute the per-user daily prediction rollup")
+    rebuild.add_argument("--user-id", type=int, default=None, help="Only rebuild this user")
+    rebuild.set_defaults(handler=rebuild_stats)
+    
+    refresh = commands.add_parser("refresh-analytics", help="Re-aggregate the hourly admin analytics")
+    window = refresh.add_mutually_exclusive_group()
+    window.add_argument("--hours", type=int, default=24, help="Hours to re-aggregate, ending now")
+    window.add_argument("--all", action="store_true", help="Re-aggregate all history (backfill)")
+    refresh.set_defaults(handler=refresh_analytics)
+    
+    partitions = commands.add_parser("ensure-history-partitions", help="Create upcoming monthly prediction_events partitions")
+    partitions.add_argument("--months-ahead", type=int, default=None)
+    partitions.set_defaults(handler=ensure_history_partitions)
+    
+    worker = commands.add_parser("prediction-worker", help="Run queued prediction jobs (POST /prediction/jobs)")
+    worker.add_argument("--once", action="store_true", help="Exit once no jobs are due")
+    worker.set_defaults(handler=prediction_worker)
+    
+    args = parser.parse_args()
+    
+    async def run():
+        try:
+            await args.handler(args)
+        finally:
+            await async_engine.dispose()
+    
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
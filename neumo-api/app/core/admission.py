@@ -0,0 +1,145 @@
+# admission control in front of model inference.
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import List, Optional, Tuple
+
+from .config import settings
+from .metrics import ADMISSION_QUEUE_SECONDS, ADMISSION_SHED, ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH
+from ..utils.exceptions import OverloadedError, InferenceUnavailableError
+
+class Priority(IntEnum):
+    """Inference work classes; lower values are admitted first"""
+    INTERACTIVE = 0
+    BATCH = 1
+    RESCORING = 2
+
+class AdmissionController:
+    """
+    Bounds the inference work in flight in this process.
+    
+    At most `capacity` holders run at once. Others wait in a priority queue
+    of at most `max_queue` entries, interactive ahead of batch ahead of
+    re-scoring, FIFO within a class. A freed slot goes straight to the most
+    urgent waiter. Work that can't be admitted fails fast:
+    
+    - queue full: the least urgent waiter is shed to make room for more
+      urgent work, otherwise the newcomer is (OverloadedError, 429);
+    - deadline: a request whose expected wait already exceeds its deadline
+      is refused on arrival, and one still queued at its deadline gives up
+      (InferenceUnavailableError, 503).
+    
+    Retry-After is estimated from the average slot hold time. Only touched
+    from the event loop thread.
+    """
+    
+    def __init__(self, capacity: int, max_queue: int, retry_after: float):
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._in_flight = 0
+        # heap of (priority, arrival sequence, future handed the slot)
+        self._waiters: List[Tuple[Priority, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        # moving average of how long a slot is held
+        self._hold_seconds: Optional[float] = None
+        ADMISSION_IN_FLIGHT.set_function(lambda: self._in_flight)
+        ADMISSION_QUEUE_DEPTH.set_function(lambda: len(self._waiters))
+    
+    def estimated_wait(self, priority: Priority) -> float:
+        """Seconds a request of this priority would wait for a slot now"""
+        if self._in_flight < self.capacity and not self._waiters:
+            return 0.0
+        ahead = sum(1 for waiter in self._waiters if waiter[0] <= priority)
+        return (ahead // self.capacity + 1) * (self._hold_seconds or 0.0)
+    
+    def _retry_after(self, priority: Priority) -> float:
+        return max(self.retry_after, self.estimated_wait(priority))
+    
+    @staticmethod
+    def _shed(priority: Priority, reason: str):
+        ADMISSION_SHED.labels(priority=priority.name.lower(), reason=reason).inc()
+    
+    async def _acquire(self, priority: Priority, deadline: Optional[float]):
+        if self._in_flight < self.capacity and not self._waiters:
+            self._in_flight += 1
+            return
+        
+        if deadline is not None and self.estimated_wait(priority) > deadline:
+            self._shed(priority, "deadline")
+            raise InferenceUnavailableError("Inference is busy, retry shortly", self._retry_after(priority))
+        
+        if len(self._waiters) >= self.max_queue:
+            least_urgent = max(self._waiters)
+            if least_urgent[0] <= priority:
+                self._shed(priority, "queue_full")
+                raise OverloadedError("Inference queue is full, retry shortly", self._retry_after(priority))
+            self._waiters.remove(least_urgent)
+            heapq.heapify(self._waiters)
+            self._shed(least_urgent[0], "preempted")
+            least_urgent[2].set_exception(
+                OverloadedError("Displaced by more urgent inference work", self._retry_after(least_urgent[0]))
+            )
+        
+        granted = asyncio.get_running_loop().create_future()
+        waiter = (priority, next(self._sequence), granted)
+        heapq.heappush(self._waiters, waiter)
+        try:
+            await asyncio.wait((granted,), timeout=deadline)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        
+        if not granted.done():
+            self._abandon(waiter)
+            self._shed(priority, "deadline")
+            raise InferenceUnavailableError("Timed out waiting for inference capacity", self._retry_after(priority))
+        # raises if preempted
+        granted.result()
+    
+    def _abandon(self, waiter):
+        granted = waiter[2]
+        if not granted.done():
+            self._waiters.remove(waiter)
+            heapq.heapify(self._waiters)
+            granted.cancel()
+        elif granted.exception() is None:
+            # the slot was handed over as we gave up; pass it on
+            self._release()
+    
+    def _release(self):
+        while self._waiters:
+            granted = heapq.heappop(self._waiters)[2]
+            if not granted.done():
+                # the slot moves to the waiter; in-flight count is unchanged
+                granted.set_result(None)
+                return
+        self._in_flight -= 1
+    
+    @asynccontextmanager
+    async def admit(self, priority: Priority, deadline: Optional[float] = None):
+        """
+        Hold an inference slot for the body of the `async with`.
+        
+        `deadline` bounds the time spent queueing, in seconds (None waits
+        as long as it takes, unless displaced by more urgent work).
+        """
+        queued_at = time.monotonic()
+        await self._acquire(priority, deadline)
+        admitted_at = time.monotonic()
+        ADMISSION_QUEUE_SECONDS.labels(priority=priority.name.lower()).observe(admitted_at - queued_at)
+        try:
+            yield
+        finally:
+            held = time.monotonic() - admitted_at
+            self._hold_seconds = held if self._hold_seconds is None else 0.8 * self._hold_seconds + 0.2 * held
+            self._release()
+
+inference_admission = AdmissionController(
+    capacity=settings.INFERENCE_CONCURRENCY,
+    max_queue=settings.INFERENCE_MAX_QUEUE,
+    retry_after=settings.INFERENCE_RETRY_AFTER_SECONDS
+)
@@ -0,0 +1,47 @@
+# periodic background jobs run inside the API process.
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+class PeriodicTask:
+    """
+    Run an async job every `interval` seconds until stopped.
+    
+    Failures are logged and the job runs again on the next tick, so one bad
+    run never kills the loop. Start and stop it from the app lifespan.
+    """
+    
+    def __init__(self, name: str, interval: float, job: Callable[[], Awaitable[None]], run_immediately: bool = False):
+        self.name = name
+        self.interval = interval
+        self.job = job
+        self.run_immediately = run_immediately
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name=self.name)
+    
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    async def _run(self):
+        if not self.run_immediately:
+            await asyncio.sleep(self.interval)
+        while True:
+            try:
+                await self.job()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(f"Background job '{self.name}' failed")
+            await asyncio.sleep(self.interval)
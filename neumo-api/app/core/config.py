@@ -1,19 +1,72 @@
 # app configuration
 
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 import os
 
 class Settings(BaseSettings):
     # ===================== DATABASE SETTINGS =====================
     DATABASE_URL: str
     NEON_DATABASE_URL: str
+    # direct (non-pooled) connection for the change notifier's LISTEN. Behind
+    # PgBouncer in transaction mode (e.g. a Neon "-pooler" host) LISTEN is
+    # silently lost, so point this at the direct host; defaults to DATABASE_URL
+    DATABASE_LISTEN_URL: Optional[str] = None
+    
+    # connection pool, per worker process
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    # connections opened at startup so the first requests don't pay for them
+    DB_POOL_PREWARM_CONNECTIONS: int = 2
+    # asyncpg's own per-connection statement cache, and SQLAlchemy's cache of
+    # prepared statements on top of it; set both to 0 behind pgbouncer in
+    # transaction pooling mode
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    # statements slower than this are logged (normalized, parameters redacted)
+    DB_SLOW_QUERY_MS: float = 200
+    
+    # read-only endpoints use NEON_DATABASE_URL as a read replica while it
+    # answers health checks and lags the primary by at most MAX_LAG
+    READ_REPLICA_ENABLED: bool = True
+    READ_REPLICA_MAX_LAG_SECONDS: float = 5
+    READ_REPLICA_CHECK_INTERVAL_SECONDS: float = 10
+    READ_REPLICA_CHECK_TIMEOUT_SECONDS: float = 2
+    # after a write, that user's reads stay on the primary this long
+    READ_YOUR_WRITES_SECONDS: float = 10
+    
+    # /db-health serves the result of a background check run this often
+    DB_HEALTH_CHECK_INTERVAL_SECONDS: float = 30
+    DB_HEALTH_CHECK_TIMEOUT_SECONDS: float = 10
     
     # ====================== JWT SETTINGS ==================
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    REFRESH_TOKEN_CLEANUP_INTERVAL_SECONDS: int = 3600
+    
+    # authenticated user principals are cached per process; a change made
+    # through another worker is picked up after at most this long
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    # verified access/refresh tokens, each kept until its own exp
+    TOKEN_CACHE_MAX_ENTRIES: int = 50000
+    # access tokens signed out on another worker are rejected here after at
+    # most this long (immediately on the worker that handled the logout)
+    REVOKED_TOKEN_SYNC_INTERVAL_SECONDS: float = 5
+    
+    # bcrypt runs on a dedicated pool; beyond workers + max pending, requests
+    # get an immediate 429 instead of queueing behind other hashes
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 16
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 1
+    
+    # login attempts allowed per client address per window
+    LOGIN_ATTEMPTS_PER_WINDOW: int = 10
+    LOGIN_WINDOW_SECONDS: int = 60
     
     # ================= API SETTINGS =========================
     API_V1_STR: str = "/api/v1"
@@ -27,10 +80,75 @@ class Settings(BaseSettings):
     AWS_REGION: str
     S3_BUCKET_NAME: str
     
+    # ========= S3 PRESIGNED URLS ============
+    PRESIGNED_URL_EXPIRATION_SECONDS: int = 3600
+    # URLs are signed per window of expiration - margin seconds (the ETag
+    # variant) and stay valid for at least this long after the window ends
+    PRESIGN_CACHE_SAFETY_MARGIN_SECONDS: int = 300
+    PRESIGN_CACHE_MAX_ENTRIES: int = 10000
+    
+    # ========= PREDICTION CHANGE FEED ============
+    # changes younger than this are held back until concurrent writers commit
+    CHANGES_SETTLE_SECONDS: float = 2
+    # deletions are reported for this long; older cursors must resync
+    CHANGES_TOMBSTONE_RETENTION_DAYS: int = 30
+    
+    # server-sent event streams of the change feed
+    EVENTS_HEARTBEAT_SECONDS: float = 15
+    EVENTS_RETRY_MS: int = 3000
+    EVENTS_BATCH_SIZE: int = 200
+    EVENTS_MAX_STREAMS_PER_USER: int = 5
+    
     # =========== AI MODEL VERSIONING ==============
     MODEL_PATH: str
     MODEL_VERSION: str
     
+    # =========== IDEMPOTENCY KEYS ==============
+    # a /predict Idempotency-Key replays its response for this long
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 24 * 3600
+    # a claim not completed within this is taken over by the next retry
+    IDEMPOTENCY_LOCK_SECONDS: float = 120
+    # how long a retry waits for the original to finish before a 409
+    IDEMPOTENCY_WAIT_SECONDS: float = 30
+    IDEMPOTENCY_POLL_INTERVAL_SECONDS: float = 0.25
+    IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS: int = 3600
+    
+    # =========== INFERENCE ADMISSION ==============
+    # inference pipelines run at once per process; more wait in a bounded
+    # priority queue (interactive, then batch, then re-scoring)
+    INFERENCE_CONCURRENCY: int = 4
+    INFERENCE_MAX_QUEUE: int = 32
+    # interactive /predict requests give up (503) after queueing this long
+    INFERENCE_INTERACTIVE_DEADLINE_SECONDS: float = 10
+    # lower bound of the Retry-After sent when shedding
+    INFERENCE_RETRY_AFTER_SECONDS: float = 1
+    
+    # =========== PREDICTION JOBS ==============
+    # run a job worker inside each API process; turn off when inference runs
+    # in separate `python -m app.cli prediction-worker` processes
+    PREDICTION_JOBS_WORKER_ENABLED: bool = True
+    PREDICTION_JOBS_POLL_INTERVAL_SECONDS: float = 1
+    # jobs claimed and run through the model together
+    PREDICTION_JOBS_BATCH_SIZE: int = 16
+    # a claimed job is handed to another worker if not finished within this
+    PREDICTION_JOBS_LEASE_SECONDS: int = 120
+    PREDICTION_JOBS_MAX_ATTEMPTS: int = 3
+    
+    # =========== ADMIN ANALYTICS ==============
+    ANALYTICS_REFRESH_ENABLED: bool = True
+    ANALYTICS_REFRESH_INTERVAL_SECONDS: int = 300
+    # each scheduled refresh re-aggregates the hours touched since the last
+    # one, looking back this much further for transactions that committed late
+    ANALYTICS_REFRESH_OVERLAP_SECONDS: int = 300
+    
+    # =========== PREDICTION HISTORY ==============
+    # audit events are buffered and written in bulk when either trigger fires
+    HISTORY_FLUSH_INTERVAL_SECONDS: float = 2.0
+    HISTORY_FLUSH_BATCH_SIZE: int = 500
+    # beyond this the oldest unflushed events are dropped (and counted)
+    HISTORY_MAX_BUFFERED_EVENTS: int = 20000
+    HISTORY_PARTITION_MONTHS_AHEAD: int = 3
+    
     # ================================= CORS =====================
     BACKEND_CORS_ORIGINS: List[str] = ["http://localhost:3000"]
     
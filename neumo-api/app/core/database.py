@@ -1,37 +1,177 @@
 # database connection
 
+import asyncio
 import logging
-from sqlalchemy import create_engine, text
+import time
+from datetime import datetime, timezone
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from typing import Optional
 import asyncpg
 from .config import settings
+from .metrics import (
+    DB_POOL_CHECKED_OUT, DB_POOL_IDLE, DB_POOL_OVERFLOW, DB_POOL_ACQUIRE_SECONDS,
+    DB_REPLICA_HEALTHY, DB_REPLICA_LAG_SECONDS, DB_READ_SESSIONS,
+)
+from ..utils.cache import TTLCache
+from .instrumentation import instrument_engine
 
 logger = logging.getLogger(__name__)
 
 # Convert PostgreSQL URL for async if needed
 ASYNC_DATABASE_URL = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
 
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection"""
+    
+    engine_label = "unknown"
+    
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_ACQUIRE_SECONDS.labels(engine=self.engine_label).observe(time.perf_counter() - start)
+
+def create_database_engine(url: str, name: str) -> AsyncEngine:
+    """
+    Create an async engine with the pool settings and metrics shared by every engine.
+    
+    Args:
+        url: postgresql:// or postgresql+asyncpg:// URL
+        name: label for the engine's pool metrics
+    """
+    async_url = make_url(url.replace("postgresql://", "postgresql+asyncpg://")).update_query_dict(
+        {"prepared_statement_cache_size": str(settings.DB_PREPARED_STATEMENT_CACHE_SIZE)}
+    )
+    # a subclass per engine, since the pool is rebuilt from its class on dispose()
+    pool_class = type(f"{name.title()}AsyncPool", (InstrumentedAsyncPool,), {"engine_label": name})
+    engine = create_async_engine(
+        async_url,
+        echo=settings.DEBUG,
+        poolclass=pool_class,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=True,
+        connect_args={"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    )
+    DB_POOL_CHECKED_OUT.labels(engine=name).set_function(lambda: engine.pool.checkedout())
+    DB_POOL_IDLE.labels(engine=name).set_function(lambda: engine.pool.checkedin())
+    DB_POOL_OVERFLOW.labels(engine=name).set_function(lambda: engine.pool.overflow())
+    instrument_engine(engine, name)
+    return engine
+
+async def warm_up_pool(engine: AsyncEngine, connections: int) -> int:
+    """
+    Open up to `connections` pooled connections and return them to the pool.
+    
+    Returns:
+        int: number of connections opened
+    """
+    connections = min(connections, settings.DB_POOL_SIZE)
+    results = await asyncio.gather(
+        *(engine.connect() for _ in range(connections)), return_exceptions=True
+    )
+    opened = [conn for conn in results if not isinstance(conn, BaseException)]
+    for conn in opened:
+        await conn.close()
+    for error in results:
+        if isinstance(error, BaseException):
+            logger.warning(f"Could not pre-warm a database connection: {error}")
+    return len(opened)
+
 # the async engine.
-async_engine = create_async_engine(
-    ASYNC_DATABASE_URL,
-    echo=True,
-    pool_timeout=30,
-    pool_recycle=1800,
-    pool_pre_ping=True
-)
+async_engine = create_database_engine(settings.DATABASE_URL, "primary")
 AsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
 
-# Sync engine for Alembic and utilities
-sync_engine = create_engine(
-    settings.DATABASE_URL,
-    pool_timeout=30,
-    pool_recycle=1800,
-    pool_pre_ping=True
+# 0 on a primary; on a standby 0 while fully replayed, else time since the
+# last replayed transaction.
+REPLICA_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() IS NOT NULL
+             AND pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+class ReplicaRouter:
+    """
+    Hands out read-only sessions on the replica while it is healthy and caught up.
+    
+    The replica starts out unused until the first health check passes, and
+    any failed or lagging check sends reads back to the primary. Users who
+    just wrote are kept on the primary so they read their own writes.
+    """
+    
+    def __init__(self, engine: Optional[AsyncEngine], max_lag: float, read_your_writes_seconds: float):
+        self.engine = engine
+        self.max_lag = max_lag
+        self._sessionmaker = (
+            sessionmaker(engine, class_=AsyncSession, expire_on_commit=False) if engine is not None else None
+        )
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self._recent_writers = TTLCache(maxsize=100000, default_ttl=read_your_writes_seconds)
+        DB_REPLICA_HEALTHY.set_function(lambda: 1 if self.healthy else 0)
+    
+    async def check(self):
+        """Health check job: measure replay lag and decide where reads go"""
+        if self.engine is None:
+            return
+        try:
+            async with self.engine.connect() as conn:
+                result = await asyncio.wait_for(
+                    conn.execute(REPLICA_LAG_QUERY), settings.READ_REPLICA_CHECK_TIMEOUT_SECONDS
+                )
+                self.lag_seconds = float(result.scalar())
+        except Exception as e:
+            if self.healthy:
+                logger.warning(f"Read replica unavailable, reading from the primary: {e}")
+            self.healthy = False
+            return
+        
+        DB_REPLICA_LAG_SECONDS.set(self.lag_seconds)
+        healthy = self.lag_seconds <= self.max_lag
+        if healthy != self.healthy:
+            logger.info(f"Read replica {'in use' if healthy else 'lagging'} (lag {self.lag_seconds:.1f}s)")
+        self.healthy = healthy
+    
+    def note_write(self, user_id: int):
+        """Keep this user's reads on the primary for the read-your-writes window"""
+        if self.engine is not None:
+            self._recent_writers.set(user_id, True)
+    
+    def session(self, user_id: Optional[int] = None) -> AsyncSession:
+        """Session for read-only work, on the replica when it is safe to use"""
+        if (
+            self.healthy
+            and self._sessionmaker is not None
+            and (user_id is None or self._recent_writers.get(user_id) is None)
+        ):
+            DB_READ_SESSIONS.labels(engine="replica").inc()
+            return self._sessionmaker()
+        DB_READ_SESSIONS.labels(engine="primary").inc()
+        return AsyncSessionLocal()
+
+# the read replica, unless disabled or pointing at the primary itself
+replica_engine = (
+    create_database_engine(settings.NEON_DATABASE_URL, "replica")
+    if settings.READ_REPLICA_ENABLED and settings.NEON_DATABASE_URL != settings.DATABASE_URL
+    else None
+)
+replica_router = ReplicaRouter(
+    replica_engine,
+    max_lag=settings.READ_REPLICA_MAX_LAG_SECONDS,
+    read_your_writes_seconds=settings.READ_YOUR_WRITES_SECONDS
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
 
 Base = declarative_base()
 
@@ -43,6 +183,11 @@ async def get_db():
         finally:
             await session.close()
 
+def _connection_info() -> dict:
+    return {
+        "async_url": ASYNC_DATABASE_URL.split('@')[1] if '@' in ASYNC_DATABASE_URL else "hidden"
+    }
+
 # Database utility functions
 async def test_database_connection() -> dict:
     """
@@ -52,18 +197,14 @@ async def test_database_connection() -> dict:
         dict: Connection status with details
     """
     try:
-        # Test sync connection first (used by Alembic)
-        with sync_engine.connect() as conn:
+        async with async_engine.connect() as conn:
             # Test basic connection
-            result = conn.execute(text("SELECT 1 as test"))
-            test_value = result.fetchone()[0]
-            
+            test_value = (await conn.execute(text("SELECT 1 as test"))).scalar()
             if test_value != 1:
                 raise Exception("Database test query returned unexpected value")
             
             # Get database info
-            db_info_query = text("SELECT version()")
-            db_version = conn.execute(db_info_query).fetchone()[0]
+            db_version = (await conn.execute(text("SELECT version()"))).scalar()
             
             # Check tables
             tables_query = text("""
@@ -72,34 +213,15 @@ async def test_database_connection() -> dict:
                 WHERE table_schema = 'public'
                 ORDER BY table_name
             """)
-            tables_result = conn.execute(tables_query)
-            tables = [row[0] for row in tables_result.fetchall()]
-            
-            # Test async connection
-            async_status = "not_tested"
-            try:
-                async with async_engine.begin() as async_conn:
-                    async_result = await async_conn.execute(text("SELECT 1 as async_test"))
-                    async_row = await async_result.fetchone()
-                    async_test_value = async_row[0]
-                    if async_test_value == 1:
-                        async_status = "connected"
-                    else:
-                        async_status = "error"
-            except Exception as e:
-                async_status = f"error: {str(e)}"
+            tables = (await conn.execute(tables_query)).scalars().all()
             
             return {
                 "status": "connected",
-                "sync_engine": "connected",
-                "async_engine": async_status,
+                "async_engine": "connected",
                 "database_version": db_version.split()[0:2],  # Just PostgreSQL version
                 "tables_count": len(tables),
-                "tables": tables,
-                "connection_info": {
-                    "sync_url": settings.DATABASE_URL.split('@')[1] if '@' in settings.DATABASE_URL else "hidden",
-                    "async_url": ASYNC_DATABASE_URL.split('@')[1] if '@' in ASYNC_DATABASE_URL else "hidden"
-                }
+                "tables": list(tables),
+                "connection_info": _connection_info()
             }
             
     except SQLAlchemyError as e:
@@ -108,10 +230,7 @@ async def test_database_connection() -> dict:
             "status": "error",
             "error_type": "SQLAlchemyError",
             "error": str(e),
-            "connection_info": {
-                "sync_url": settings.DATABASE_URL.split('@')[1] if '@' in settings.DATABASE_URL else "hidden",
-                "async_url": ASYNC_DATABASE_URL.split('@')[1] if '@' in ASYNC_DATABASE_URL else "hidden"
-            }
+            "connection_info": _connection_info()
         }
     except Exception as e:
         logger.error(f"Database connection error: {e}")
@@ -119,13 +238,10 @@ async def test_database_connection() -> dict:
             "status": "error",
             "error_type": "ConnectionError", 
             "error": str(e),
-            "connection_info": {
-                "sync_url": settings.DATABASE_URL.split('@')[1] if '@' in settings.DATABASE_URL else "hidden",
-                "async_url": ASYNC_DATABASE_URL.split('@')[1] if '@' in ASYNC_DATABASE_URL else "hidden"
-            }
+            "connection_info": _connection_info()
         }
 
-def check_migrations_status() -> dict:
+async def check_migrations_status() -> dict:
     """
     Check if database migrations are up to date.
     
@@ -133,7 +249,7 @@ def check_migrations_status() -> dict:
         dict: Migration status information
     """
     try:
-        with sync_engine.connect() as conn:
+        async with async_engine.connect() as conn:
             # Check if alembic_version table exists
             alembic_check = text("""
                 SELECT EXISTS (
@@ -142,7 +258,7 @@ def check_migrations_status() -> dict:
                     AND table_name = 'alembic_version'
                 )
             """)
-            has_alembic = conn.execute(alembic_check).fetchone()[0]
+            has_alembic = (await conn.execute(alembic_check)).scalar()
             
             if not has_alembic:
                 return {
@@ -153,12 +269,12 @@ def check_migrations_status() -> dict:
             
             # Get current migration version
             version_query = text("SELECT version_num FROM alembic_version")
-            current_version = conn.execute(version_query).fetchone()
+            current_version = (await conn.execute(version_query)).scalar()
             
             if current_version:
                 return {
                     "status": "migrations_applied",
-                    "current_version": current_version[0],
+                    "current_version": current_version,
                     "message": "Database migrations are applied",
                     "has_alembic_table": True
                 }
@@ -177,21 +293,6 @@ def check_migrations_status() -> dict:
             "message": "Could not check migration status"
         }
 
-def test_sync_connection() -> bool:
-    """
-    Simple sync connection test for startup checks.
-    
-    Returns:
-        bool: True if connection successful, False otherwise
-    """
-    try:
-        with sync_engine.connect() as conn:
-            result = conn.execute(text("SELECT 1"))
-            return result.fetchone()[0] == 1
-    except Exception as e:
-        logger.error(f"Sync connection test failed: {e}")
-        return False
-
 async def test_async_connection() -> bool:
     """
     Simple async connection test.
@@ -200,24 +301,24 @@ async def test_async_connection() -> bool:
         bool: True if connection successful, False otherwise
     """
     try:
-        async with async_engine.begin() as conn:
+        async with async_engine.connect() as conn:
             result = await conn.execute(text("SELECT 1"))
-            row = await result.fetchone()
-            return row[0] == 1
+            return result.scalar() == 1
     except Exception as e:
         logger.error(f"Async connection test failed: {e}")
         return False
 
-# Health check function for FastAPI endpoint
 async def get_database_health() -> dict:
     """
-    Comprehensive database health check.
+    Comprehensive database health check. Hits the database; request handlers
+    should read database_health.snapshot() instead.
     
     Returns:
         dict: Health status information
     """
-    connection_info = await test_database_connection()
-    migration_info = check_migrations_status()
+    connection_info, migration_info = await asyncio.gather(
+        test_database_connection(), check_migrations_status()
+    )
     
     overall_status = "healthy" if connection_info["status"] == "connected" else "unhealthy"
     
@@ -225,8 +326,50 @@ async def get_database_health() -> dict:
         "overall_status": overall_status,
         "connection": connection_info,
         "migrations": migration_info,
+        "replica": {
+            "enabled": replica_engine is not None,
+            "in_use": replica_router.healthy,
+            "lag_seconds": replica_router.lag_seconds
+        },
         "engines": {
-            "sync_engine_echo": sync_engine.echo,
             "async_engine_echo": async_engine.echo
         }
-    }
\ No newline at end of file
+    }
+
+class DatabaseHealthMonitor:
+    """
+    Runs the database health check in the background and keeps the latest result.
+    
+    /db-health serves the cached snapshot, so probes never wait on, or add
+    load to, the database.
+    """
+    
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._snapshot: Optional[dict] = None
+        self._checked_at: Optional[datetime] = None
+    
+    async def refresh(self) -> dict:
+        """Run the checks now and cache the result"""
+        try:
+            snapshot = await asyncio.wait_for(get_database_health(), self.timeout)
+        except asyncio.TimeoutError:
+            snapshot = {
+                "overall_status": "unhealthy",
+                "connection": {"status": "error", "error": f"health check timed out after {self.timeout}s"}
+            }
+        self._snapshot = snapshot
+        self._checked_at = datetime.now(timezone.utc)
+        return snapshot
+    
+    def snapshot(self) -> dict:
+        """Latest result with its age; 'unknown' until the first check completes"""
+        if self._snapshot is None:
+            return {"overall_status": "unknown", "checked_at": None, "age_seconds": None}
+        return {
+            **self._snapshot,
+            "checked_at": self._checked_at.isoformat(),
+            "age_seconds": round((datetime.now(timezone.utc) - self._checked_at).total_seconds(), 3)
+        }
+
+database_health = DatabaseHealthMonitor(timeout=settings.DB_HEALTH_CHECK_TIMEOUT_SECONDS)
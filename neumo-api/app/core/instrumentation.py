@@ -0,0 +1,137 @@
+# per-statement database instrumentation.
+import hashlib
+import json
+import logging
+import re
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .config import settings
+from .metrics import DB_QUERY_SECONDS, DB_QUERIES_PER_REQUEST
+
+logger = logging.getLogger("neumo.sql")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|\?")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_REPEATED_GROUPS = re.compile(r"(\([^()]*\))(?:\s*,\s*\1)+")
+_WHITESPACE = re.compile(r"\s+")
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+\"?([\w.]+)", re.I)
+
+# fingerprints beyond this many are reported as "other" to bound label cardinality
+MAX_FINGERPRINTS = 500
+_seen_fingerprints = set()
+
+
+def normalize_statement(statement: str) -> str:
+    """Strip literals and parameter lists so statements differing only in values compare equal"""
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("(?...)", normalized)
+    # multi-row VALUES
+    normalized = _REPEATED_GROUPS.sub(r"\1", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+@lru_cache(maxsize=4096)
+def statement_fingerprint(statement: str) -> str:
+    """
+    Short, readable label for a statement, e.g. "SELECT predictions 3fa2c1d9".
+    
+    Args:
+        statement: SQL as sent to the driver
+    
+    Returns:
+        str: verb, first table and a digest of the normalized statement
+    """
+    normalized = normalize_statement(statement)
+    verb = normalized.split(" ", 1)[0].upper()
+    table = _TABLE.search(normalized)
+    head = f"{verb} {table.group(1)}" if table else verb
+    fingerprint = f"{head} {hashlib.sha1(normalized.encode()).hexdigest()[:8]}"
+    if fingerprint not in _seen_fingerprints:
+        if len(_seen_fingerprints) >= MAX_FINGERPRINTS:
+            return "other"
+        _seen_fingerprints.add(fingerprint)
+    return fingerprint
+
+
+class RequestQueries:
+    """Statements executed on behalf of one HTTP request"""
+    
+    def __init__(self):
+        self.count = 0
+
+
+# set by the HTTP middleware; statements outside a request are not counted
+_request_queries: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+def start_request_queries() -> RequestQueries:
+    """Begin counting statements for the current request"""
+    queries = RequestQueries()
+    _request_queries.set(queries)
+    return queries
+
+
+def finish_request_queries(queries: RequestQueries):
+    DB_QUERIES_PER_REQUEST.observe(queries.count)
+
+
+def _redact(parameters) -> str:
+    """Parameter shapes only, never values"""
+    if isinstance(parameters, dict):
+        return json.dumps({key: type(value).__name__ for key, value in parameters.items()})
+    if isinstance(parameters, (list, tuple)):
+        return json.dumps([type(value).__name__ for value in parameters])
+    return type(parameters).__name__
+
+
+def instrument_engine(engine: AsyncEngine, name: str):
+    """
+    Time every statement run on `engine` and count it against the current request.
+    
+    Args:
+        engine: async engine; listeners attach to its sync core
+        name: engine label for the latency histogram
+    """
+    sync_engine = engine.sync_engine
+    
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+    
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        fingerprint = statement_fingerprint(statement)
+        DB_QUERY_SECONDS.labels(engine=name, fingerprint=fingerprint).observe(elapsed)
+        
+        queries = _request_queries.get()
+        if queries is not None:
+            queries.count += 1
+        
+        if elapsed * 1000 >= settings.DB_SLOW_QUERY_MS:
+            logger.warning(json.dumps({
+                "event": "slow_query",
+                "engine": name,
+                "fingerprint": fingerprint,
+                "duration_ms": round(elapsed * 1000, 2),
+                "statement": normalize_statement(statement),
+                "parameters": _redact(parameters),
+                "executemany": executemany,
+            }))
+    
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        # the failed statement never reaches after_cursor_execute
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start"):
+            connection.info["query_start"].pop()
@@ -0,0 +1,168 @@
+# application prometheus metrics.
+# The instrumentator in main.py covers HTTP traffic, everything else lives here
+# so it is registered once and exposed on /metrics with the rest.
+from prometheus_client import Counter, Gauge, Histogram
+
+# ================= DATABASE POOL =================
+DB_POOL_CHECKED_OUT = Gauge(
+    "neumo_db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    ["engine"],
+)
+DB_POOL_IDLE = Gauge(
+    "neumo_db_pool_idle",
+    "Idle connections held in the pool",
+    ["engine"],
+)
+DB_POOL_OVERFLOW = Gauge(
+    "neumo_db_pool_overflow",
+    "Connections open beyond pool_size (negative while the pool is not yet full)",
+    ["engine"],
+)
+DB_POOL_ACQUIRE_SECONDS = Histogram(
+    "neumo_db_pool_acquire_seconds",
+    "Time spent waiting to check a connection out of the pool",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+)
+DB_QUERY_SECONDS = Histogram(
+    "neumo_db_query_seconds",
+    "Statement latency by engine and normalized statement fingerprint",
+    ["engine", "fingerprint"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "neumo_db_queries_per_request",
+    "Statements executed while serving one HTTP request",
+    buckets=(0, 1, 2, 3, 4, 5, 8, 12, 20, 50, 100),
+)
+DB_REPLICA_HEALTHY = Gauge(
+    "neumo_db_replica_healthy",
+    "1 while read-only traffic is routed to the replica",
+)
+DB_REPLICA_LAG_SECONDS = Gauge(
+    "neumo_db_replica_lag_seconds",
+    "Replica replay lag at the last health check",
+)
+DB_READ_SESSIONS = Counter(
+    "neumo_db_read_sessions_total",
+    "Read-only sessions by the engine they were routed to",
+    ["engine"],
+)
+
+# ================= S3 PRESIGNED URLS =================
+PRESIGN_CACHE_REQUESTS = Counter(
+    "neumo_presign_cache_requests_total",
+    "Presigned URL lookups by cache result",
+    ["result"],
+)
+PRESIGN_CACHE_HIT_RATIO = Gauge(
+    "neumo_presign_cache_hit_ratio",
+    "Presigned URL cache hit ratio since process start",
+)
+PRESIGN_CACHE_ENTRIES = Gauge(
+    "neumo_presign_cache_entries",
+    "Presigned URLs currently cached",
+)
+
+# ================= AUTHENTICATION =================
+PRINCIPAL_CACHE_REQUESTS = Counter(
+    "neumo_principal_cache_requests_total",
+    "Authenticated user lookups by cache result",
+    ["result"],
+)
+PRINCIPAL_DB_LOOKUPS_SAVED = Counter(
+    "neumo_principal_db_lookups_saved_total",
+    "User SELECTs avoided by the principal cache",
+)
+PRINCIPAL_CACHE_HIT_RATIO = Gauge(
+    "neumo_principal_cache_hit_ratio",
+    "Principal cache hit ratio since process start",
+)
+TOKEN_CACHE_REQUESTS = Counter(
+    "neumo_token_cache_requests_total",
+    "JWT verifications by verified-token cache result",
+    ["result"],
+)
+TOKEN_CACHE_HIT_RATIO = Gauge(
+    "neumo_token_cache_hit_ratio",
+    "Verified-token cache hit ratio since process start",
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "neumo_password_hash_seconds",
+    "Time spent in bcrypt per call",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0),
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "neumo_password_hash_rejected_total",
+    "Password hash/verify calls rejected because the bcrypt pool was saturated",
+)
+LOGIN_THROTTLED = Counter(
+    "neumo_login_throttled_total",
+    "Login attempts rejected by the per-source throttle",
+)
+
+# ================= CHANGE EVENTS =================
+EVENT_STREAMS_OPEN = Gauge(
+    "neumo_event_streams_open",
+    "Server-sent event streams currently open in this process",
+)
+EVENT_NOTIFICATIONS = Counter(
+    "neumo_event_notifications_total",
+    "prediction_changes notifications received from Postgres",
+)
+
+# ================= INFERENCE ADMISSION =================
+ADMISSION_QUEUE_SECONDS = Histogram(
+    "neumo_inference_queue_seconds",
+    "Time inference work waited for an admission slot",
+    ["priority"],
+)
+ADMISSION_SHED = Counter(
+    "neumo_inference_shed_total",
+    "Inference work refused by admission control",
+    ["priority", "reason"],
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "neumo_inference_in_flight",
+    "Inference slots held in this process",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "neumo_inference_queue_depth",
+    "Inference work waiting for a slot in this process",
+)
+
+# ================= PREDICTION JOBS =================
+PREDICTION_JOBS_PROCESSED = Counter(
+    "neumo_prediction_jobs_processed_total",
+    "Queued prediction jobs finished by this worker",
+    ["outcome"],
+)
+PREDICTION_JOB_BATCH_SIZE = Histogram(
+    "neumo_prediction_job_batch_size",
+    "Jobs claimed per worker batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+PREDICTION_JOB_BATCH_SECONDS = Histogram(
+    "neumo_prediction_job_batch_seconds",
+    "Time from claiming a batch of jobs to storing its results",
+)
+
+# ================= PREDICTION HISTORY =================
+HISTORY_EVENTS_BUFFERED = Gauge(
+    "neumo_history_events_buffered",
+    "Audit events waiting to be flushed",
+)
+HISTORY_EVENTS_FLUSHED = Counter(
+    "neumo_history_events_flushed_total",
+    "Audit events written to the database",
+)
+HISTORY_EVENTS_DROPPED = Counter(
+    "neumo_history_events_dropped_total",
+    "Audit events dropped because the buffer was full",
+)
+HISTORY_FLUSH_SECONDS = Histogram(
+    "neumo_history_flush_seconds",
+    "Time spent writing one batch of audit events",
+)
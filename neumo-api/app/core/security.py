@@ -1,11 +1,23 @@
 # jwt, password hashing
 
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from passlib.hash import bcrypt
 from .config import settings
+from .metrics import (
+    TOKEN_CACHE_REQUESTS, TOKEN_CACHE_HIT_RATIO,
+    PASSWORD_HASH_SECONDS, PASSWORD_HASH_REJECTED, LOGIN_THROTTLED,
+)
+from ..utils.cache import TTLCache
+from ..utils.exceptions import OverloadedError
 
 # password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -18,6 +30,80 @@ def get_password_hash(password: str) -> str:
     """Hashing the password"""
     return pwd_context.hash(password)
 
+class PasswordHasher:
+    """
+    Runs bcrypt on its own bounded thread pool so it never blocks the event loop.
+    
+    At most `workers` hashes run at once and `max_pending` more may wait;
+    anything beyond that is rejected immediately with OverloadedError.
+    """
+    
+    def __init__(self, workers: int, max_pending: int, retry_after: float):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._capacity = workers + max_pending
+        self._retry_after = retry_after
+        # only touched from the event loop thread
+        self._in_flight = 0
+    
+    @staticmethod
+    def _timed(operation: str, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            PASSWORD_HASH_SECONDS.labels(operation=operation).observe(time.perf_counter() - start)
+    
+    async def _run(self, operation: str, fn, *args):
+        if self._in_flight >= self._capacity:
+            PASSWORD_HASH_REJECTED.inc()
+            raise OverloadedError("Too many concurrent sign-ins, retry shortly", self._retry_after)
+        
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._timed, operation, fn, *args)
+        finally:
+            self._in_flight -= 1
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", verify_password, plain_password, hashed_password)
+    
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", get_password_hash, password)
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER_SECONDS
+)
+
+class LoginThrottle:
+    """Fixed-window count of login attempts per source address"""
+    
+    def __init__(self, attempts: int, window: float, max_sources: int = 100000):
+        self.attempts = attempts
+        self.window = window
+        # source -> (window start, attempts so far)
+        self._windows = TTLCache(maxsize=max_sources)
+    
+    def check(self, source: str):
+        """Count an attempt from `source`; raise OverloadedError once over the limit"""
+        now = time.time()
+        window_start, count = self._windows.get(source, (now, 0))
+        count += 1
+        self._windows.set(source, (window_start, count), expires_at=window_start + self.window)
+        if count > self.attempts:
+            LOGIN_THROTTLED.inc()
+            raise OverloadedError(
+                "Too many login attempts, retry later",
+                retry_after=max(1, int(window_start + self.window - now))
+            )
+
+login_throttle = LoginThrottle(
+    attempts=settings.LOGIN_ATTEMPTS_PER_WINDOW,
+    window=settings.LOGIN_WINDOW_SECONDS
+)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -26,7 +112,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         
-    to_encode.update({"exp": expire, "type": "access"})
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex, "type": "access"})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -34,16 +120,87 @@ def create_refresh_token(data: dict) -> str:
     """Create JWT refresh token"""
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex, "type": "refresh"})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+# sha256(token) -> verified payload, kept until the token's own exp
+_verified_tokens = TTLCache(maxsize=settings.TOKEN_CACHE_MAX_ENTRIES)
+TOKEN_CACHE_HIT_RATIO.set_function(lambda: _verified_tokens.hit_ratio)
+
+def _token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+def token_hash(token: str) -> str:
+    """Hex sha256 of a token, the form refresh tokens are stored in"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def forget_token(token: str):
+    """Drop a token from the verified-token cache (logout)"""
+    _verified_tokens.pop(_token_digest(token))
+
+class TokenDenylist:
+    """
+    sha256 hex of access tokens revoked before their exp (per-device logout).
+    
+    Each entry lives until the token's own exp, after which the token is
+    rejected anyway. Unlike the caches this never evicts a live entry, so a
+    revocation cannot be forgotten under memory pressure; its size is bounded
+    by the logouts within one ACCESS_TOKEN_EXPIRE_MINUTES.
+    """
+    
+    def __init__(self):
+        self._expiry = {}
+        self._lock = threading.Lock()
+    
+    def add(self, digest: str, expires_at: float):
+        now = time.time()
+        with self._lock:
+            if expires_at > now:
+                self._expiry[digest] = expires_at
+            for key in [key for key, expiry in self._expiry.items() if expiry <= now]:
+                del self._expiry[key]
+    
+    def __contains__(self, digest: str) -> bool:
+        expiry = self._expiry.get(digest)
+        return expiry is not None and expiry > time.time()
+    
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+# filled by logout in this process and synced from revoked_access_tokens
+access_token_denylist = TokenDenylist()
+
+def deny_token(token: str, expires_at: float):
+    """Reject an access token in this process until `expires_at` (its exp)"""
+    access_token_denylist.add(token_hash(token), expires_at)
+    forget_token(token)
+
+def is_token_denied(token: str) -> bool:
+    return token_hash(token) in access_token_denylist
+
 def verify_token(token: str, token_type:str = "access")->Optional[dict]:
-    """Verify JWT token and return payload"""
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        if payload.get("type") != token_type:
+    """
+    Verify JWT token and return payload.
+    
+    Signature checks are cached per token until it expires, so a client
+    reusing the same access token only pays for the decode once. Revocation
+    is enforced by the caller, against the access token denylist and the
+    user's tokens_valid_after.
+    """
+    key = _token_digest(token)
+    payload = _verified_tokens.get(key)
+    if payload is not None:
+        TOKEN_CACHE_REQUESTS.labels(result="hit").inc()
+    else:
+        TOKEN_CACHE_REQUESTS.labels(result="miss").inc()
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
             return None
-        return payload
-    except JWTError:
-        return None
\ No newline at end of file
+        if "exp" in payload:
+            _verified_tokens.set(key, payload, expires_at=float(payload["exp"]))
+    
+    if payload.get("type") != token_type:
+        return None
+    return payload
\ No newline at end of file
@@ -1,11 +1,26 @@
-from fastapi import FastAPI, Response
+import math
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
 from .core.config import settings
-from .core.database import test_database_connection, check_migrations_status, get_database_health
+from .core.database import (
+    database_health, async_engine, warm_up_pool, replica_engine, replica_router
+)
 from .api.v1.auth import router as auth_router
 from .api.v1.predictions import router as prediction_router
+from .api.v1.admin import router as admin_router
+from .api.v1.history import router as history_router
+from .core.background import PeriodicTask
+from .services.analytics_service import refresh_changed_aggregates
+from .services.history_service import history_recorder, ensure_history_partitions
+from .services.auth_service import purge_expired_refresh_tokens, sync_revoked_access_tokens
+from .services.idempotency_service import purge_expired_idempotency_keys
+from .services.changes_service import purge_expired_tombstones
+from .services.events_service import change_notifier
+from .services.job_service import prediction_job_worker
+from .utils.exceptions import OverloadedError
+from .core.instrumentation import start_request_queries, finish_request_queries
 from prometheus_fastapi_instrumentator import Instrumentator
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from fastapi.responses import JSONResponse
@@ -21,10 +36,11 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Starting Pneumonia API...")
     
-    # Test database connection
+    # Test database connection (the first health snapshot)
     try:
         logger.info("🔌 Testing database connection...")
-        connection_result = await test_database_connection()
+        health = await database_health.refresh()
+        connection_result = health["connection"]
         
         if connection_result["status"] == "connected":
             logger.info("✅ Database connection successful!")
@@ -33,14 +49,8 @@ async def lifespan(app: FastAPI):
             if connection_result["tables"]:
                 logger.info(f"   Tables: {', '.join(connection_result['tables'])}")
             
-            # Check sync and async engines
-            if connection_result.get("async_engine") == "connected":
-                logger.info("✅ Async database engine working!")
-            else:
-                logger.warning(f"⚠️  Async engine issue: {connection_result.get('async_engine', 'unknown')}")
-            
             # Check migrations
-            migration_status = check_migrations_status()
+            migration_status = health["migrations"]
             if migration_status["status"] == "migrations_applied":
                 logger.info(f"✅ Migrations up to date (version: {migration_status['current_version']})")
             elif migration_status["status"] == "no_migrations":
@@ -57,6 +67,61 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ Database startup check failed: {e}")
         logger.warning("⚠️  Continuing startup without database connection...")
     
+    # Open the first pooled connections before traffic arrives
+    for engine in filter(None, (async_engine, replica_engine)):
+        try:
+            warmed = await warm_up_pool(engine, settings.DB_POOL_PREWARM_CONNECTIONS)
+            logger.info(f"🔥 Pre-warmed {warmed} database connection(s) to {engine.url.host}")
+        except Exception as e:
+            logger.warning(f"⚠️  Database pool warm-up failed: {e}")
+    
+    # Background jobs
+    history_recorder.start()
+    change_notifier.start()
+    background_tasks = [
+        PeriodicTask("db-health", settings.DB_HEALTH_CHECK_INTERVAL_SECONDS, database_health.refresh),
+        PeriodicTask("history-partitions", 24 * 3600, ensure_history_partitions, run_immediately=True),
+        PeriodicTask("tombstone-cleanup", 24 * 3600, purge_expired_tombstones),
+        PeriodicTask(
+            "refresh-token-cleanup",
+            settings.REFRESH_TOKEN_CLEANUP_INTERVAL_SECONDS,
+            purge_expired_refresh_tokens
+        ),
+        PeriodicTask(
+            "revoked-token-sync",
+            settings.REVOKED_TOKEN_SYNC_INTERVAL_SECONDS,
+            sync_revoked_access_tokens,
+            run_immediately=True
+        ),
+        PeriodicTask(
+            "idempotency-key-cleanup",
+            settings.IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS,
+            purge_expired_idempotency_keys
+        )
+    ]
+    if replica_engine is not None:
+        background_tasks.append(PeriodicTask(
+            "replica-health",
+            settings.READ_REPLICA_CHECK_INTERVAL_SECONDS,
+            replica_router.check,
+            run_immediately=True
+        ))
+    if settings.PREDICTION_JOBS_WORKER_ENABLED:
+        background_tasks.append(PeriodicTask(
+            "prediction-jobs",
+            settings.PREDICTION_JOBS_POLL_INTERVAL_SECONDS,
+            prediction_job_worker.drain
+        ))
+    if settings.ANALYTICS_REFRESH_ENABLED:
+        background_tasks.append(PeriodicTask(
+            "analytics-refresh",
+            settings.ANALYTICS_REFRESH_INTERVAL_SECONDS,
+            refresh_changed_aggregates,
+            run_immediately=True
+        ))
+    for task in background_tasks:
+        task.start()
+    
     logger.info("✅ Pneumonia API startup complete!")
     logger.info("📊 Prometheus metrics available at /metrics")
     
@@ -64,6 +129,14 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("🛑 Shutting down Pneumonia API...")
+    for task in background_tasks:
+        await task.stop()
+    await change_notifier.stop()
+    # write out buffered audit events before the process exits
+    await history_recorder.stop()
+    await async_engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -94,9 +167,30 @@ app.add_middleware(
     allow_origins=["*"]
 )
 
+@app.middleware("http")
+async def count_queries(request: Request, call_next):
+    """Count database statements per request; exposed as a header in debug mode"""
+    queries = start_request_queries()
+    response = await call_next(request)
+    finish_request_queries(queries)
+    if settings.DEBUG:
+        response.headers["X-DB-Query-Count"] = str(queries.count)
+    return response
+
+@app.exception_handler(OverloadedError)
+async def overloaded_handler(request: Request, exc: OverloadedError):
+    """Shed load with a fast response telling the client when to retry"""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.message},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
+
 # including the routers.
 app.include_router(auth_router, prefix=f"{settings.API_V1_STR}/auth", tags=["authentication"])
 app.include_router(prediction_router, prefix=f"{settings.API_V1_STR}/prediction", tags=["prediction"])
+app.include_router(history_router, prefix=f"{settings.API_V1_STR}/history", tags=["history"])
+app.include_router(admin_router, prefix=f"{settings.API_V1_STR}/admin", tags=["admin"])
 
 @app.get("/")
 async def root():
@@ -114,5 +208,5 @@ async def health_check():
 
 @app.get("/db-health")
 async def db_health_check():
-    """Comprehensive database health check endpoint."""
-    return await get_database_health()
\ No newline at end of file
+    """Latest background database health check, with its age."""
+    return database_health.snapshot()
\ No newline at end of file
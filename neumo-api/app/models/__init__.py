@@ -1,2 +1,10 @@
 from .user import User
-from .prediction import Prediction
\ No newline at end of file
+from .prediction import Prediction
+from .prediction_stats import PredictionDailyStats
+from .prediction_analytics import PredictionHourlyAggregate
+from .history import PredictionEvent
+from .refresh_token import RefreshToken
+from .revoked_access_token import RevokedAccessToken
+from .prediction_tombstone import PredictionTombstone
+from .prediction_job import PredictionJob
+from .idempotency_key import IdempotencyKey
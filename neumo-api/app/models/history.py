@@ -1 +1,51 @@
-# history sqlalchemy model
\ No newline at end of file
+# history sqlalchemy model
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Identity, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+# event types recorded for predictions
+EVENT_CREATED = "created"
+EVENT_VIEWED = "viewed"
+EVENT_UPDATED = "updated"
+EVENT_FLAGGED = "flagged"
+EVENT_REVIEWED = "reviewed"
+EVENT_DELETED = "deleted"
+
+class PredictionEvent(Base):
+    """
+    Audit trail of what happened to each prediction.
+    
+    Range partitioned by month on created_at (partitions are created ahead of
+    time by HistoryService.ensure_partitions), so the primary key has to
+    include the partition key. There is deliberately no foreign key to
+    predictions: events must outlive the rows they describe.
+    """
+    __tablename__ = "prediction_events"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
+    
+    id = Column(BigInteger, Identity(), primary_key=True)
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
+    
+    prediction_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    event_type = Column(String, nullable=False)
+    details = Column(JSONB, nullable=True)
+    
+    def __repr__(self):
+        return f"<PredictionEvent(id={self.id}, prediction_id={self.prediction_id}, type={self.event_type})>"
+
+
+# a user's history, newest first, with keyset pagination over (created_at, id)
+Index(
+    "ix_prediction_events_user_id_created_at_id",
+    PredictionEvent.user_id,
+    PredictionEvent.created_at.desc(),
+    PredictionEvent.id.desc(),
+)
+# the trail of one prediction
+Index(
+    "ix_prediction_events_prediction_id_created_at",
+    PredictionEvent.prediction_id,
+    PredictionEvent.created_at.desc(),
+)
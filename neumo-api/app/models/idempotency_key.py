@@ -0,0 +1,30 @@
+# sqlalchemy idempotency keys for POST /prediction/predict.
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+class IdempotencyKey(Base):
+    """
+    A client-chosen Idempotency-Key and the response it produced.
+    
+    The first request claims the row with an INSERT ... ON CONFLICT; while
+    `response` is null it is still running and retries wait for it. Claims
+    of requests that died are taken over once `locked_until` passes, and
+    the row itself is reusable (and purged) after `expires_at`.
+    """
+    __tablename__ = "idempotency_keys"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    # sha256 of the request; a key reused for a different request is refused
+    fingerprint = Column(String(64), nullable=False)
+    response = Column(JSONB, nullable=True)
+    locked_until = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<IdempotencyKey(user_id={self.user_id}, key={self.key!r})>"
+
+Index("ix_idempotency_keys_expires_at", IdempotencyKey.expires_at)
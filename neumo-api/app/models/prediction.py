@@ -1,5 +1,5 @@
 # sqlalchemy prediction model.
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Boolean, Index, true
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..core.database import Base
@@ -10,8 +10,8 @@ class Prediction(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     
-    # foreign key to link user.
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    # foreign key to link user (indexed through the composite history index below).
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     image_filename = Column(String, nullable=False) # url to the image from aws buckets
     
@@ -21,9 +21,10 @@ class Prediction(Base):
     
     # Processing information
     inference_time_ms = Column(Float, nullable=True)
+    model_version = Column(String, nullable=True)  # settings.MODEL_VERSION that produced the result
     
     # Metadata
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # medical review fields
@@ -44,4 +45,54 @@ class Prediction(Base):
     user = relationship("User", back_populates="predictions")
     
     def __repr__(self):
-        return f"<Prediction(id={self.id}, user_id={self.user_id}, class={self.prediction_class}, confidence={self.confidence_score})>"
\ No newline at end of file
+        return f"<Prediction(id={self.id}, user_id={self.user_id}, class={self.prediction_class}, confidence={self.confidence_score})>"
+
+
+# serves per-user history pages ordered newest first, including keyset
+# pagination over (created_at, id).
+Index(
+    "ix_predictions_user_id_created_at_id",
+    Prediction.user_id,
+    Prediction.created_at.desc(),
+    Prediction.id.desc(),
+)
+
+# per-user class filter (/prediction/class/{prediction_class}).
+Index(
+    "ix_predictions_user_id_class_created_at_id",
+    Prediction.user_id,
+    Prediction.prediction_class,
+    Prediction.created_at.desc(),
+    Prediction.id.desc(),
+)
+
+# history filters (GET /prediction/?...). The flagged/reviewed indexes are
+# partial: those rows are a small slice of each user's history.
+Index(
+    "ix_predictions_user_id_flagged_created_at",
+    Prediction.user_id,
+    Prediction.created_at.desc(),
+    Prediction.id.desc(),
+    postgresql_where=Prediction.is_flagged == true(),
+)
+Index(
+    "ix_predictions_user_id_reviewed_created_at",
+    Prediction.user_id,
+    Prediction.created_at.desc(),
+    Prediction.id.desc(),
+    postgresql_where=Prediction.reviewed_by_doctor == true(),
+)
+Index("ix_predictions_user_id_confidence", Prediction.user_id, Prediction.confidence_score)
+Index("ix_predictions_user_id_age", Prediction.user_id, Prediction.patient_age)
+Index(
+    "ix_predictions_user_id_gender_age",
+    Prediction.user_id,
+    Prediction.patient_gender,
+    Prediction.patient_age,
+)
+
+# list ETags: max(updated_at) and count(*) over a user's predictions.
+Index("ix_predictions_user_id_updated_at", Prediction.user_id, Prediction.updated_at)
+
+# rows changed since the last analytics refresh, across all users.
+Index("ix_predictions_updated_at", Prediction.updated_at)
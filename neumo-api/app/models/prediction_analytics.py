@@ -0,0 +1,34 @@
+# sqlalchemy system-wide prediction aggregates.
+from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy.dialects.postgresql import ARRAY
+from ..core.database import Base
+
+# Upper bounds (ms) of the inference latency histogram buckets; the last
+# bucket of every histogram counts all observations (+Inf).
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+class PredictionHourlyAggregate(Base):
+    """
+    Hourly prediction aggregates across all users, for operator analytics.
+    
+    Refreshed on a schedule by AnalyticsService.refresh_changed, which
+    re-aggregates the hours whose predictions changed since the last run. Every column is additive, so any time range or grouping can be
+    served by summing rows; latency percentiles come from the cumulative
+    histogram (`latency_histogram[i]` = observations <= LATENCY_BUCKETS_MS[i]).
+    """
+    __tablename__ = "prediction_hourly_aggregates"
+    
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    model_version = Column(String, primary_key=True)
+    prediction_class = Column(String, primary_key=True)
+    status = Column(String, primary_key=True)
+    
+    prediction_count = Column(Integer, nullable=False)
+    confidence_sum = Column(Float, nullable=False)
+    latency_count = Column(Integer, nullable=False)
+    latency_sum_ms = Column(Float, nullable=False)
+    latency_histogram = Column(ARRAY(Integer), nullable=False)
+    refreshed_at = Column(DateTime(timezone=True), nullable=False)
+    
+    def __repr__(self):
+        return f"<PredictionHourlyAggregate(bucket_start={self.bucket_start}, model_version={self.model_version}, class={self.prediction_class}, status={self.status})>"
@@ -0,0 +1,29 @@
+# sqlalchemy queued prediction jobs.
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+class PredictionJob(Base):
+    """
+    Work queue entry for a prediction submitted through POST /prediction/jobs.
+    
+    The prediction row itself holds the image and, once processed, the
+    result; the job id is the prediction id. Workers claim due jobs with
+    FOR UPDATE SKIP LOCKED and push available_at forward as a lease, so a job
+    whose worker died is picked up again once the lease runs out. The row is
+    deleted when the prediction is completed or failed.
+    """
+    __tablename__ = "prediction_jobs"
+    
+    prediction_id = Column(Integer, ForeignKey("predictions.id", ondelete="CASCADE"), primary_key=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    # claimable from this time on (enqueue time, then end of the current lease)
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    
+    def __repr__(self):
+        return f"<PredictionJob(prediction_id={self.prediction_id}, attempts={self.attempts})>"
+
+
+# workers claim the oldest due jobs first
+Index("ix_prediction_jobs_available_at", PredictionJob.available_at, PredictionJob.prediction_id)
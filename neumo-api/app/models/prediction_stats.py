@@ -0,0 +1,26 @@
+# sqlalchemy per-user prediction rollups.
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
+from ..core.database import Base
+
+class PredictionDailyStats(Base):
+    """
+    Per user, per UTC day, per class prediction counters.
+    
+    Maintained incrementally by the `predictions_daily_stats` trigger on every
+    insert/update/delete of predictions (see migration 45e6daa60b88), so the
+    application never writes to it directly except for rebuilds.
+    """
+    __tablename__ = "prediction_daily_stats"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    prediction_class = Column(String, primary_key=True)
+    
+    prediction_count = Column(Integer, nullable=False, default=0)
+    confidence_sum = Column(Float, nullable=False, default=0.0)
+    flagged_count = Column(Integer, nullable=False, default=0)
+    reviewed_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<PredictionDailyStats(user_id={self.user_id}, day={self.day}, class={self.prediction_class}, count={self.prediction_count})>"
@@ -0,0 +1,37 @@
+# sqlalchemy prediction deletion tombstones.
+from sqlalchemy import Column, Integer, DateTime, Index
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+class PredictionTombstone(Base):
+    """
+    Marks a deleted prediction so GET /prediction/changes can report it.
+    
+    Written by the `predictions_tombstone` trigger on every delete (see
+    migration 8c1e4b7d2f60) and purged after CHANGES_TOMBSTONE_RETENTION_DAYS.
+    No foreign key to users: a user's deletion cascades through predictions
+    and fires the trigger while the user row is going away.
+    """
+    __tablename__ = "prediction_tombstones"
+    
+    prediction_id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # the deleted prediction's created_at, i.e. its analytics hour bucket;
+    # NULL for tombstones written before it was recorded
+    prediction_created_at = Column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self):
+        return f"<PredictionTombstone(prediction_id={self.prediction_id}, deleted_at={self.deleted_at})>"
+
+
+# a user's deletions in change-feed order
+Index(
+    "ix_prediction_tombstones_user_id_deleted_at",
+    PredictionTombstone.user_id,
+    PredictionTombstone.deleted_at,
+    PredictionTombstone.prediction_id,
+)
+
+# hour buckets with deletions since the last analytics refresh
+Index("ix_prediction_tombstones_deleted_at", PredictionTombstone.deleted_at)
@@ -0,0 +1,25 @@
+# sqlalchemy refresh token storage.
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+class RefreshToken(Base):
+    """
+    One row per live refresh token (one per signed-in device).
+    
+    Only the sha256 of the token is stored. Rotation rewrites the row in a
+    single UPDATE ... RETURNING keyed by the old hash, so a token can be
+    redeemed exactly once even under concurrent refreshes.
+    """
+    __tablename__ = "refresh_tokens"
+    
+    token_hash = Column(String(64), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<RefreshToken(user_id={self.user_id}, expires_at={self.expires_at})>"
+
+Index("ix_refresh_tokens_user_id", RefreshToken.user_id)
+Index("ix_refresh_tokens_expires_at", RefreshToken.expires_at)
@@ -0,0 +1,24 @@
+# sqlalchemy revoked access token storage.
+from sqlalchemy import Column, String, DateTime, Index
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+class RevokedAccessToken(Base):
+    """
+    Access tokens signed out before their exp (per-device logout).
+    
+    Only the sha256 of the token is stored, until the token's own exp. Every
+    process mirrors the live rows into its in-memory denylist, picking up
+    rows created since its last sync.
+    """
+    __tablename__ = "revoked_access_tokens"
+    
+    token_hash = Column(String(64), primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<RevokedAccessToken(expires_at={self.expires_at})>"
+
+Index("ix_revoked_access_tokens_created_at", RevokedAccessToken.created_at)
+Index("ix_revoked_access_tokens_expires_at", RevokedAccessToken.expires_at)
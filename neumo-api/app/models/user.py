@@ -1,5 +1,5 @@
 # sqlalchemy model
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..core.database import Base
@@ -18,8 +18,8 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    # refresh token storage.
-    refresh_token = Column(Text, nullable=True)
+    # tokens issued before this moment are rejected (logout / revocation).
+    tokens_valid_after = Column(DateTime(timezone=True), nullable=True)
     
     # Relationships.
     predictions = relationship("Prediction", back_populates="user")
\ No newline at end of file
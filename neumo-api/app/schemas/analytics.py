@@ -0,0 +1,44 @@
+# admin analytics pydantic schemas.
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+from datetime import datetime
+
+class LatencySummary(BaseModel):
+    """Inference latency, percentiles estimated from the hourly histograms"""
+    count: int
+    average_ms: Optional[float] = None
+    p50_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+    p99_ms: Optional[float] = None
+
+class PredictionAggregate(BaseModel):
+    total: int
+    failed: int
+    failure_rate: Optional[float] = None
+    by_class: dict[str, int]
+    average_confidence: Optional[float] = None
+    latency: LatencySummary
+
+class PredictionVolumeBucket(PredictionAggregate):
+    """Predictions in one hour or day bucket"""
+    bucket_start: datetime
+
+class ModelVersionBreakdown(PredictionAggregate):
+    """Predictions made by one model version"""
+    # `model_version` is a field, not pydantic's model_ namespace
+    model_config = ConfigDict(protected_namespaces=())
+    
+    model_version: str
+
+class PredictionSeriesResponse(BaseModel):
+    success: bool
+    message: str
+    # when the aggregates were last refreshed; data is at most one refresh interval old
+    refreshed_at: Optional[datetime] = None
+    data: list[PredictionVolumeBucket]
+
+class ModelBreakdownResponse(BaseModel):
+    success: bool
+    message: str
+    refreshed_at: Optional[datetime] = None
+    data: list[ModelVersionBreakdown]
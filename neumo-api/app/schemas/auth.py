@@ -24,6 +24,11 @@ class RegisterRequest(BaseModel):
 class RefreshTokenRequest(BaseModel):
     refresh_token: str
     
+class LogoutRequest(BaseModel):
+    # the refresh token of the session (device) being signed out; defaults
+    # to the session of the presented access token
+    refresh_token: Optional[str] = None
+    
 class PasswordResetRequest(BaseModel):
     email: EmailStr
     
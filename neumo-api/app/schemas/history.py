@@ -1 +1,26 @@
-# history pydantic schemas.
\ No newline at end of file
+# history pydantic schemas.
+from pydantic import BaseModel
+from typing import Optional, Literal
+from datetime import datetime
+
+EventType = Literal["created", "viewed", "updated", "flagged", "reviewed", "deleted"]
+
+class PredictionEvent(BaseModel):
+    """One audit event for a prediction"""
+    id: int
+    prediction_id: int
+    event_type: str
+    created_at: datetime
+    details: Optional[dict] = None
+    
+    class Config:
+        from_attributes = True
+
+class PredictionEventListResponse(BaseModel):
+    """API response for listing prediction events"""
+    success: bool
+    message: str
+    data: list[PredictionEvent]
+    per_page: int
+    # pass as `cursor` to fetch the next (older) page
+    next_cursor: Optional[str] = None
@@ -1,7 +1,7 @@
 #  prediction pydantic schemas.
 from pydantic import BaseModel, validator, Field, HttpUrl
 from typing import Optional, Literal
-from datetime import datetime
+from datetime import datetime, date
 from .user import User
 
 class PredictionBase(BaseModel):
@@ -59,17 +59,66 @@ class PredictionWithUser(Prediction):
     user: User
     
 class PredictionSummary(BaseModel):
-    """Lightweight prediction schema for lists/summaries"""
+    """
+    Lightweight prediction schema for lists/summaries.
+    
+    List endpoints only return the fields that were selected (see `fields=`),
+    so everything but the id is optional and unset fields are left out.
+    """
     id: int
-    prediction_class: str
-    confidence_score: float
-    created_at: datetime
+    prediction_class: Optional[str] = None
+    confidence_score: Optional[float] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    status: Optional[str] = None
     is_flagged: Optional[bool] = None
     reviewed_by_doctor: Optional[bool] = None
     
+    # detail fields, returned with include_images=true or on request
+    user_id: Optional[int] = None
+    image_filename: Optional[str] = None
+    image_url: Optional[str] = None
+    inference_time_ms: Optional[float] = None
+    patient_age: Optional[int] = None
+    patient_gender: Optional[str] = None
+    patient_symptoms: Optional[str] = None
+    doctor_diagnosis: Optional[str] = None
+    doctor_notes: Optional[str] = None
+    
     class Config:
         from_attributes = True
 
+class PredictionFilter(BaseModel):
+    """Filters for listing a user's predictions; all bounds are inclusive except created_to"""
+    prediction_class: Optional[Literal["NORMAL", "PNEUMONIA"]] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    min_confidence: Optional[float] = Field(None, ge=0.0, le=1.0)
+    max_confidence: Optional[float] = Field(None, ge=0.0, le=1.0)
+    is_flagged: Optional[bool] = None
+    reviewed_by_doctor: Optional[bool] = None
+    min_age: Optional[int] = Field(None, ge=0, le=150)
+    max_age: Optional[int] = Field(None, ge=0, le=150)
+    patient_gender: Optional[Literal["Male", "Female", "Other"]] = None
+    
+    @validator('created_to')
+    def validate_created_range(cls, v, values):
+        if v and values.get('created_from') and v <= values['created_from']:
+            raise ValueError('created_to must be after created_from')
+        return v
+    
+    @validator('max_confidence')
+    def validate_confidence_range(cls, v, values):
+        if v is not None and values.get('min_confidence') is not None and v < values['min_confidence']:
+            raise ValueError('max_confidence must not be below min_confidence')
+        return v
+    
+    @validator('max_age')
+    def validate_age_range(cls, v, values):
+        if v is not None and values.get('min_age') is not None and v < values['min_age']:
+            raise ValueError('max_age must not be below min_age')
+        return v
+
 # Response schemas for API endpoints
 class PredictionResponse(BaseModel):
     """Standard API response for prediction operations"""
@@ -84,4 +133,68 @@ class PredictionListResponse(BaseModel):
     data: list[PredictionSummary]
     total: int
     page: int
-    per_page: int
\ No newline at end of file
+    per_page: int
+    # keyset pagination: pass as `cursor` to fetch the next page.
+    next_cursor: Optional[str] = None
+    total_is_estimate: bool = False
+
+class DailyPredictionVolume(BaseModel):
+    """Predictions made on one UTC day"""
+    day: date
+    total: int
+    by_class: dict[str, int]
+
+class PredictionStats(BaseModel):
+    """Per-user prediction statistics"""
+    since: Optional[date] = None
+    total: int
+    by_class: dict[str, int]
+    average_confidence: Optional[float] = None
+    flagged: int
+    reviewed: int
+    failed: int
+    daily: list[DailyPredictionVolume]
+
+class PredictionStatsResponse(BaseModel):
+    """API response for prediction statistics"""
+    success: bool
+    message: str
+    data: PredictionStats
+
+class PredictionChange(BaseModel):
+    """A prediction created, updated or deleted since the cursor"""
+    id: int
+    changed_at: datetime
+    deleted: bool
+    # current values; null for deletions
+    prediction_class: Optional[str] = None
+    confidence_score: Optional[float] = None
+    created_at: Optional[datetime] = None
+    status: Optional[str] = None
+    is_flagged: Optional[bool] = None
+    reviewed_by_doctor: Optional[bool] = None
+
+class PredictionChangesResponse(BaseModel):
+    """API response for the prediction change feed"""
+    success: bool
+    message: str
+    data: list[PredictionChange]
+    # pass as `since` on the next call
+    cursor: str
+    # more changes are ready; call again right away
+    has_more: bool
+
+class PredictionJobStatus(BaseModel):
+    """A prediction submitted through POST /prediction/jobs"""
+    # the id of the prediction the job fills in
+    job_id: int
+    status: Literal["queued", "processing", "completed", "failed"]
+    attempts: int = 0
+    # set once the job is completed or failed
+    prediction: Optional[Prediction] = None
+
+class PredictionJobResponse(BaseModel):
+    """API response for prediction jobs"""
+    success: bool
+    message: str
+    data: PredictionJobStatus
@@ -0,0 +1,255 @@
+# services/analytics_service.py
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, text, func, bindparam, DateTime
+from sqlalchemy.dialects.postgresql import ARRAY
+from typing import Optional, List, Sequence
+from datetime import datetime, timedelta, timezone
+from ..models.prediction_analytics import PredictionHourlyAggregate, LATENCY_BUCKETS_MS
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+
+# any constant works, it only has to be shared by every process refreshing
+REFRESH_LOCK_ID = 7_330_033
+
+# cumulative latency histogram, one count per bucket upper bound plus +Inf
+_LATENCY_HISTOGRAM_SQL = "ARRAY[{}]".format(", ".join(
+    [f"count(inference_time_ms) FILTER (WHERE inference_time_ms <= {bound})" for bound in LATENCY_BUCKETS_MS]
+    + ["count(inference_time_ms)"]
+))
+
+REFRESH_QUERY = f"""
+INSERT INTO prediction_hourly_aggregates (
+    bucket_start, model_version, prediction_class, status, prediction_count,
+    confidence_sum, latency_count, latency_sum_ms, latency_histogram, refreshed_at
+)
+SELECT
+    date_trunc('hour', created_at),
+    coalesce(model_version, 'unknown'),
+    prediction_class,
+    coalesce(status, 'unknown'),
+    count(*),
+    coalesce(sum(confidence_score), 0),
+    count(inference_time_ms),
+    coalesce(sum(inference_time_ms), 0),
+    {_LATENCY_HISTOGRAM_SQL},
+    now()
+FROM predictions
+{{scope}}
+WHERE coalesce(status, '') NOT IN ('queued', 'processing')
+  {{where}}
+GROUP BY 1, 2, 3, 4
+"""
+
+# re-aggregates just the listed hour buckets, each read as an index range
+BUCKETS_SCOPE = (
+    "JOIN unnest(:buckets) AS bucket(start) "
+    "ON created_at >= bucket.start AND created_at < bucket.start + interval '1 hour'"
+)
+
+# hour buckets whose rows were inserted, updated or deleted since :since
+CHANGED_BUCKETS_QUERY = """
+SELECT date_trunc('hour', created_at) FROM predictions
+WHERE updated_at >= :since
+UNION
+SELECT date_trunc('hour', prediction_created_at) FROM prediction_tombstones
+WHERE deleted_at >= :since AND prediction_created_at IS NOT NULL
+"""
+
+def histogram_quantile(q: float, cumulative: Sequence[int]) -> Optional[float]:
+    """
+    Estimate a latency quantile (ms) from a cumulative histogram, interpolating
+    linearly inside the bucket like Prometheus' histogram_quantile.
+    """
+    total = cumulative[-1] if cumulative else 0
+    if not total:
+        return None
+    rank = q * total
+    lower_bound, lower_count = 0.0, 0
+    for bound, count in zip(LATENCY_BUCKETS_MS, cumulative):
+        if count >= rank:
+            if count == lower_count:
+                return float(bound)
+            return lower_bound + (bound - lower_bound) * (rank - lower_count) / (count - lower_count)
+        lower_bound, lower_count = float(bound), count
+    # falls in the +Inf bucket, the best we can say is "above the last bound"
+    return float(LATENCY_BUCKETS_MS[-1])
+
+class _Accumulator:
+    """Sums aggregate rows for one output group"""
+    
+    def __init__(self):
+        self.total = 0
+        self.failed = 0
+        self.by_class = {}
+        self.confidence_sum = 0.0
+        self.latency_count = 0
+        self.latency_sum_ms = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    
+    def add(self, row: PredictionHourlyAggregate):
+        self.total += row.prediction_count
+        if row.status == "failed":
+            self.failed += row.prediction_count
+        else:
+            self.confidence_sum += row.confidence_sum
+        self.by_class[row.prediction_class] = self.by_class.get(row.prediction_class, 0) + row.prediction_count
+        self.latency_count += row.latency_count
+        self.latency_sum_ms += row.latency_sum_ms
+        for i, count in enumerate(row.latency_histogram):
+            self.histogram[i] += count
+    
+    def summary(self) -> dict:
+        scored = self.total - self.failed
+        return {
+            "total": self.total,
+            "failed": self.failed,
+            "failure_rate": self.failed / self.total if self.total else None,
+            "by_class": self.by_class,
+            "average_confidence": self.confidence_sum / scored if scored else None,
+            "latency": {
+                "count": self.latency_count,
+                "average_ms": self.latency_sum_ms / self.latency_count if self.latency_count else None,
+                "p50_ms": histogram_quantile(0.50, self.histogram),
+                "p95_ms": histogram_quantile(0.95, self.histogram),
+                "p99_ms": histogram_quantile(0.99, self.histogram),
+            }
+        }
+
+class AnalyticsService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def _lock(self) -> bool:
+        """Take the refresh lock for this transaction; False if another process holds it"""
+        locked = await self.db.execute(
+            text("SELECT pg_try_advisory_xact_lock(:lock_id)"),
+            {"lock_id": REFRESH_LOCK_ID}
+        )
+        if not locked.scalar():
+            await self.db.rollback()
+            return False
+        return True
+    
+    async def _refresh_range(self, since: datetime):
+        since = since.replace(minute=0, second=0, microsecond=0)
+        await self.db.execute(
+            delete(PredictionHourlyAggregate).where(PredictionHourlyAggregate.bucket_start >= since)
+        )
+        await self.db.execute(
+            text(REFRESH_QUERY.format(scope="", where="AND created_at >= :since")),
+            {"since": since}
+        )
+    
+    async def refresh(self, since: datetime) -> bool:
+        """
+        Re-aggregate every hour bucket from `since` (truncated to the hour) onwards.
+        
+        Only one process refreshes at a time; the others skip the run.
+        
+        Returns:
+            bool: False if another process held the refresh lock
+        """
+        if not await self._lock():
+            return False
+        await self._refresh_range(since)
+        await self.db.commit()
+        return True
+    
+    async def refresh_changed(self) -> bool:
+        """
+        Re-aggregate every hour bucket touched since the last refresh.
+        
+        A bucket is touched when one of its predictions was inserted or
+        updated (updated_at) or deleted (tombstone), however old the
+        prediction. The watermark is the newest refreshed_at, less
+        ANALYTICS_REFRESH_OVERLAP_SECONDS for transactions that committed
+        late; without one (first run) all history is aggregated.
+        
+        Returns:
+            bool: False if another process held the refresh lock
+        """
+        if not await self._lock():
+            return False
+        
+        result = await self.db.execute(select(func.max(PredictionHourlyAggregate.refreshed_at)))
+        watermark = result.scalar()
+        if watermark is None:
+            await self._refresh_range(datetime(1970, 1, 1, tzinfo=timezone.utc))
+            await self.db.commit()
+            return True
+        
+        since = watermark - timedelta(seconds=settings.ANALYTICS_REFRESH_OVERLAP_SECONDS)
+        result = await self.db.execute(text(CHANGED_BUCKETS_QUERY), {"since": since})
+        buckets = result.scalars().all()
+        if buckets:
+            await self.db.execute(
+                delete(PredictionHourlyAggregate).where(PredictionHourlyAggregate.bucket_start.in_(buckets))
+            )
+            await self.db.execute(
+                text(REFRESH_QUERY.format(scope=BUCKETS_SCOPE, where="")).bindparams(
+                    bindparam("buckets", type_=ARRAY(DateTime(timezone=True)))
+                ),
+                {"buckets": buckets}
+            )
+        await self.db.commit()
+        return True
+    
+    async def _load(self, since: datetime, until: Optional[datetime] = None) -> List[PredictionHourlyAggregate]:
+        query = (
+            select(PredictionHourlyAggregate)
+            .where(PredictionHourlyAggregate.bucket_start >= since)
+            .order_by(PredictionHourlyAggregate.bucket_start)
+        )
+        if until:
+            query = query.where(PredictionHourlyAggregate.bucket_start < until)
+        result = await self.db.execute(query)
+        return result.scalars().all()
+    
+    async def get_prediction_series(
+        self,
+        since: datetime,
+        until: Optional[datetime] = None,
+        bucket: str = "hour"
+    ) -> dict:
+        """Prediction volume, class mix, failure rate and latency per hour or day"""
+        rows = await self._load(since, until)
+        
+        buckets = {}
+        refreshed_at = None
+        for row in rows:
+            start = row.bucket_start
+            if bucket == "day":
+                start = start.astimezone(timezone.utc).replace(hour=0)
+            buckets.setdefault(start, _Accumulator()).add(row)
+            refreshed_at = max(refreshed_at or row.refreshed_at, row.refreshed_at)
+        
+        return {
+            "refreshed_at": refreshed_at,
+            "buckets": [
+                {"bucket_start": start, **acc.summary()}
+                for start, acc in sorted(buckets.items())
+            ]
+        }
+    
+    async def get_model_breakdown(self, since: datetime, until: Optional[datetime] = None) -> dict:
+        """The same figures per model version over the whole window"""
+        rows = await self._load(since, until)
+        
+        versions = {}
+        refreshed_at = None
+        for row in rows:
+            versions.setdefault(row.model_version, _Accumulator()).add(row)
+            refreshed_at = max(refreshed_at or row.refreshed_at, row.refreshed_at)
+        
+        return {
+            "refreshed_at": refreshed_at,
+            "models": [
+                {"model_version": version, **acc.summary()}
+                for version, acc in sorted(versions.items())
+            ]
+        }
+
+async def refresh_changed_aggregates():
+    """Scheduled job: refresh the touched hourly aggregates in a session of its own"""
+    async with AsyncSessionLocal() as session:
+        await AnalyticsService(session).refresh_changed()
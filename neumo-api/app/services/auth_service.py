@@ -1,11 +1,44 @@
 # authentication logic.
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import Optional
+from sqlalchemy import select, insert, update, delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import datetime, timedelta, timezone
+from typing import Optional, NamedTuple, Tuple
 from ..models.user import User
-from ..schemas.user import UserCreate
+from ..models.refresh_token import RefreshToken
+from ..models.revoked_access_token import RevokedAccessToken
+from ..schemas.user import UserCreate, UserUpdate
 from ..schemas.auth import LoginRequest
-from ..core.security import verify_password, get_password_hash, create_access_token, create_refresh_token, verify_token
+from ..core.security import (
+    password_hasher, create_access_token, create_refresh_token, verify_token, forget_token, token_hash,
+    deny_token, access_token_denylist
+)
+from ..core.database import AsyncSessionLocal
+from ..core.config import settings
+from ..core.metrics import PRINCIPAL_CACHE_REQUESTS, PRINCIPAL_DB_LOOKUPS_SAVED, PRINCIPAL_CACHE_HIT_RATIO
+from ..utils.cache import TTLCache
+
+class UserPrincipal(NamedTuple):
+    """What a request needs to know about the authenticated user"""
+    id: int
+    is_active: bool
+    is_superuser: bool
+    # unix time; tokens issued before it are revoked
+    tokens_valid_after: Optional[float] = None
+
+# user id -> UserPrincipal, shared by every request in this process
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    default_ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+PRINCIPAL_CACHE_HIT_RATIO.set_function(lambda: principal_cache.hit_ratio)
+
+def invalidate_principal(user_id: int):
+    """Drop a cached principal; call whenever a user's active/superuser state changes"""
+    principal_cache.pop(user_id)
+
+def _refresh_token_expiry() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
 
 class AuthService:
     def __init__(self, db: AsyncSession):
@@ -24,7 +57,7 @@ class AuthService:
         if not user:
             return None
         
-        if not verify_password(login_data.password, user.hashed_password):
+        if not await password_hasher.verify(login_data.password, user.hashed_password):
             return None
         
         if not user.is_active:
@@ -49,7 +82,7 @@ class AuthService:
                 raise ValueError("Username already taken")
             
         # creating the new user.
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await password_hasher.hash(user_data.password)
         db_user = User(
             email=user_data.email,
             username=user_data.username,
@@ -69,48 +102,235 @@ class AuthService:
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
     
+    async def get_principal(self, user_id: int) -> Optional[UserPrincipal]:
+        """Get the authenticated user's principal, from the cache when possible"""
+        principal = principal_cache.get(user_id)
+        if principal is not None:
+            PRINCIPAL_CACHE_REQUESTS.labels(result="hit").inc()
+            PRINCIPAL_DB_LOOKUPS_SAVED.inc()
+            return principal
+        
+        PRINCIPAL_CACHE_REQUESTS.labels(result="miss").inc()
+        query = select(
+            User.id, User.is_active, User.is_superuser, User.tokens_valid_after
+        ).where(User.id == user_id)
+        result = await self.db.execute(query)
+        row = result.one_or_none()
+        if row is None:
+            return None
+        
+        principal = UserPrincipal(
+            id=row.id,
+            is_active=bool(row.is_active),
+            is_superuser=bool(row.is_superuser),
+            tokens_valid_after=row.tokens_valid_after.timestamp() if row.tokens_valid_after else None
+        )
+        principal_cache.set(user_id, principal)
+        return principal
+    
+    async def update_user(self, user_id: int, user_data: UserUpdate) -> Optional[User]:
+        """Update a user's profile"""
+        user = await self.get_user_by_id(user_id)
+        if not user:
+            return None
+        
+        update_dict = user_data.dict(exclude_unset=True)
+        password = update_dict.pop("password", None)
+        if password:
+            user.hashed_password = await password_hasher.hash(password)
+        for field, value in update_dict.items():
+            setattr(user, field, value)
+        
+        await self.db.commit()
+        await self.db.refresh(user)
+        invalidate_principal(user_id)
+        return user
+    
+    async def set_user_active(self, user_id: int, is_active: bool) -> Optional[User]:
+        """Activate or deactivate a user"""
+        user = await self.get_user_by_id(user_id)
+        if not user:
+            return None
+        
+        user.is_active = is_active
+        await self.db.commit()
+        invalidate_principal(user_id)
+        return user
+    
     async def get_user_by_username(self, username: str) -> Optional[User]:
         query = select(User).where(User.username == username)
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
     
     async def store_refresh_token(self, user_id: int, refresh_token: str):
-        """Store refresh token for user"""
-        query = select(User).where(User.id == user_id)
-        result = await self.db.execute(query)
-        user = result.scalar_one_or_none()
+        """Store a newly issued refresh token (one row per device)"""
+        await self.db.execute(
+            insert(RefreshToken).values(
+                token_hash=token_hash(refresh_token),
+                user_id=user_id,
+                expires_at=_refresh_token_expiry()
+            )
+        )
+        await self.db.commit()
+    
+    async def rotate_refresh_token(self, refresh_token: str) -> Optional[Tuple[int, str]]:
+        """
+        Redeem a refresh token for a new one.
         
-        if user:
-            user.refresh_token = refresh_token
-            await self.db.commit()
-            
-    async def verify_refresh_token(self, refresh_token: str) -> Optional[User]:
-        """Verify refresh token and return user"""
-        # we will verify the token signature and expiration.
+        Returns (user_id, new refresh token), or None if the token is invalid,
+        expired, already redeemed or revoked.
+        """
         payload = verify_token(refresh_token, "refresh")
-        if not payload:
+        if not payload or not payload.get("sub"):
             return None
+        user_id = int(payload["sub"])
         
-        user_id = payload.get("sub")
-        if not user_id:
+        principal = await self.get_principal(user_id)
+        if principal is None or not principal.is_active:
             return None
         
-        # check if token matches stored token.
-        query = select(User).where(User.id == int(user_id))
-        result = await self.db.execute(query)
-        user = result.scalar_one_or_none()
-        
-        if not user or user.refresh_token != refresh_token:
+        # swap the stored hash in place; only one concurrent caller can match
+        # the old hash, everyone else gets no row back.
+        new_token = create_refresh_token(data={"sub": str(user_id)})
+        result = await self.db.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == token_hash(refresh_token),
+                RefreshToken.user_id == user_id,
+                RefreshToken.expires_at > func.now()
+            )
+            .values(token_hash=token_hash(new_token), expires_at=_refresh_token_expiry())
+            .returning(RefreshToken.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        if result.scalar_one_or_none() is None:
+            await self.db.rollback()
             return None
         
-        return user
+        await self.db.commit()
+        forget_token(refresh_token)
+        return user_id, new_token
     
-    async def revoke_refresh_token(self, user_id: int):
-        """Revoking refresh token(logout)"""
-        query = select(User).where(User.id == user_id)
-        result = await self.db.execute(query)
-        user = result.scalar_one_or_none()
+    async def purge_expired_refresh_tokens(self) -> int:
+        """Delete refresh tokens past their expiry; returns the number removed"""
+        result = await self.db.execute(
+            delete(RefreshToken)
+            .where(RefreshToken.expires_at <= func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount
+    
+    async def revoke_refresh_token(self, user_id: int, refresh_token: str) -> bool:
+        """
+        Revoke one device's refresh token (logout); the user's other sessions
+        are untouched. Returns False if the token was not a live token of this user.
+        """
+        revoked = await self.revoke_session(user_id, token_hash(refresh_token))
+        forget_token(refresh_token)
+        return revoked
+    
+    async def revoke_session(self, user_id: int, session_id: str) -> bool:
+        """
+        Revoke the refresh token whose hash is `session_id`, the "sid" claim
+        of the access tokens issued with it. Returns False if there was none.
+        """
+        result = await self.db.execute(
+            delete(RefreshToken)
+            .where(
+                RefreshToken.token_hash == session_id,
+                RefreshToken.user_id == user_id
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount > 0
+    
+    async def revoke_access_token(self, access_token: str, expires_at: float):
+        """
+        Reject an access token before its exp (logout of this device).
+        
+        Takes effect at once in this process and, through the
+        revoked_access_tokens table, in the others within
+        REVOKED_TOKEN_SYNC_INTERVAL_SECONDS.
+        """
+        await self.db.execute(
+            pg_insert(RevokedAccessToken)
+            .values(
+                token_hash=token_hash(access_token),
+                expires_at=datetime.fromtimestamp(expires_at, timezone.utc)
+            )
+            .on_conflict_do_nothing(index_elements=[RevokedAccessToken.token_hash])
+        )
+        await self.db.commit()
+        deny_token(access_token, expires_at)
+    
+    async def purge_expired_revoked_access_tokens(self) -> int:
+        """Delete access token revocations past the token's exp; returns the number removed"""
+        result = await self.db.execute(
+            delete(RevokedAccessToken)
+            .where(RevokedAccessToken.expires_at <= func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount
+    
+    async def revoke_all_tokens(self, user_id: int):
+        """Reject every access and refresh token issued to the user so far (logout everywhere)"""
+        await self.db.execute(
+            update(User)
+            .where(User.id == user_id)
+            # app clock, the same one that stamps iat on issued tokens
+            .values(tokens_valid_after=datetime.now(timezone.utc))
+        )
+        await self.db.execute(
+            delete(RefreshToken)
+            .where(RefreshToken.user_id == user_id)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        invalidate_principal(user_id)
+
+async def purge_expired_refresh_tokens():
+    """Scheduled job: drop expired refresh tokens and access token revocations in a session of its own"""
+    async with AsyncSessionLocal() as session:
+        auth_service = AuthService(session)
+        await auth_service.purge_expired_refresh_tokens()
+        await auth_service.purge_expired_revoked_access_tokens()
+
+class RevokedTokenSync:
+    """
+    Mirrors revoked_access_tokens into this process' access token denylist.
+    
+    Each run loads the live rows created since the newest one already seen,
+    minus an overlap for transactions that committed after a later row.
+    """
+    
+    OVERLAP = timedelta(seconds=60)
+    
+    def __init__(self):
+        self.seen_until: Optional[datetime] = None
+    
+    async def sync(self, session: AsyncSession) -> int:
+        """Load new revocations into the denylist; returns the number of rows read"""
+        query = select(
+            RevokedAccessToken.token_hash, RevokedAccessToken.expires_at, RevokedAccessToken.created_at
+        ).where(RevokedAccessToken.expires_at > func.now())
+        if self.seen_until is not None:
+            query = query.where(RevokedAccessToken.created_at >= self.seen_until - self.OVERLAP)
+        result = await session.execute(query)
+        rows = result.all()
+        await session.rollback()
         
-        if user:
-            user.refresh_token = None
-            await self.db.commit()
\ No newline at end of file
+        for row in rows:
+            access_token_denylist.add(row.token_hash, row.expires_at.timestamp())
+            if self.seen_until is None or row.created_at > self.seen_until:
+                self.seen_until = row.created_at
+        return len(rows)
+
+revoked_token_sync = RevokedTokenSync()
+
+async def sync_revoked_access_tokens():
+    """Scheduled job: pick up access tokens revoked through other processes"""
+    async with AsyncSessionLocal() as session:
+        await revoked_token_sync.sync(session)
@@ -0,0 +1,118 @@
+# prediction change feed.
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, union_all, func, tuple_, cast, null, true, false
+from datetime import datetime, timedelta, timezone
+from typing import List, NamedTuple, Optional
+from ..models.prediction import Prediction
+from ..models.prediction_tombstone import PredictionTombstone
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..utils.pagination import encode_cursor, decode_cursor
+from ..utils.exceptions import CursorExpiredError
+
+# prediction fields included with every upsert; deletions carry them as null
+CHANGE_COLUMNS = (
+    Prediction.prediction_class,
+    Prediction.confidence_score,
+    Prediction.created_at,
+    Prediction.status,
+    Prediction.is_flagged,
+    Prediction.reviewed_by_doctor,
+)
+
+# where a sync without a cursor starts
+FEED_START = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+class ChangesPage(NamedTuple):
+    """One page of the change feed"""
+    items: List[dict]
+    # pass as `since` next time; unchanged when there was nothing new
+    cursor: str
+    has_more: bool
+
+class ChangesService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_changes(self, user_id: int, since: Optional[str] = None, limit: int = 500) -> ChangesPage:
+        """
+        Predictions created, updated or deleted after `since`, oldest first.
+        
+        Upserts come from the (user_id, updated_at) index, deletions from the
+        tombstone table, merged in (changed_at, id) order. Changes newer than
+        CHANGES_SETTLE_SECONDS are held back: updated_at is the writing
+        transaction's start time, so a slow transaction can commit a change
+        stamped earlier than one already served.
+        
+        Raises:
+            ValueError: on a malformed cursor
+            CursorExpiredError: if deletions since the cursor may have been purged
+        """
+        if since:
+            after_at, after_id = decode_cursor(since)
+            retention = timedelta(days=settings.CHANGES_TOMBSTONE_RETENTION_DAYS)
+            if after_at < datetime.now(timezone.utc) - retention:
+                raise CursorExpiredError("Cursor is too old, resync from GET /prediction/")
+        else:
+            after_at, after_id = FEED_START, 0
+        
+        horizon = func.now() - timedelta(seconds=settings.CHANGES_SETTLE_SECONDS)
+        upserts = (
+            select(
+                Prediction.id.label("id"),
+                Prediction.updated_at.label("changed_at"),
+                false().label("deleted"),
+                *[column.label(column.key) for column in CHANGE_COLUMNS]
+            )
+            .where(
+                Prediction.user_id == user_id,
+                tuple_(Prediction.updated_at, Prediction.id) > tuple_(after_at, after_id),
+                Prediction.updated_at < horizon
+            )
+            .order_by(Prediction.updated_at, Prediction.id)
+            .limit(limit + 1)
+        )
+        deletions = (
+            select(
+                PredictionTombstone.prediction_id.label("id"),
+                PredictionTombstone.deleted_at.label("changed_at"),
+                true().label("deleted"),
+                *[cast(null(), column.type).label(column.key) for column in CHANGE_COLUMNS]
+            )
+            .where(
+                PredictionTombstone.user_id == user_id,
+                tuple_(PredictionTombstone.deleted_at, PredictionTombstone.prediction_id) > tuple_(after_at, after_id),
+                PredictionTombstone.deleted_at < horizon
+            )
+            .order_by(PredictionTombstone.deleted_at, PredictionTombstone.prediction_id)
+            .limit(limit + 1)
+        )
+        changes = union_all(upserts, deletions).subquery()
+        query = select(changes).order_by(changes.c.changed_at, changes.c.id).limit(limit + 1)
+        
+        result = await self.db.execute(query)
+        items = [dict(row._mapping) for row in result.all()]
+        
+        has_more = len(items) > limit
+        items = items[:limit]
+        if items:
+            cursor = encode_cursor(items[-1]["changed_at"], items[-1]["id"])
+        else:
+            cursor = since or encode_cursor(after_at, after_id)
+        return ChangesPage(items=items, cursor=cursor, has_more=has_more)
+    
+    async def purge_tombstones(self) -> int:
+        """Delete tombstones past the retention period; returns the number removed"""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.CHANGES_TOMBSTONE_RETENTION_DAYS)
+        result = await self.db.execute(
+            delete(PredictionTombstone)
+            .where(PredictionTombstone.deleted_at < cutoff)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount
+
+async def purge_expired_tombstones():
+    """Scheduled job: drop tombstones no valid cursor can reach any more"""
+    async with AsyncSessionLocal() as session:
+        await ChangesService(session).purge_tombstones()
@@ -0,0 +1,186 @@
+# live prediction change streams (server-sent events).
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, Optional, Set
+
+import asyncpg
+import orjson
+
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..core.metrics import EVENT_STREAMS_OPEN, EVENT_NOTIFICATIONS
+from ..utils.exceptions import OverloadedError, CursorExpiredError
+from ..utils.pagination import encode_cursor
+from .changes_service import ChangesService
+
+logger = logging.getLogger(__name__)
+
+# channel the predictions_change_notify trigger publishes on
+CHANGES_CHANNEL = "prediction_changes"
+
+class ChangeNotifier:
+    """
+    Fans change notifications out to the event streams open in this process.
+    
+    One dedicated connection per process LISTENs on CHANGES_CHANNEL, so a
+    write handled by any worker or pod wakes the streams of the affected user
+    everywhere. It must be a direct connection (DATABASE_LISTEN_URL): a
+    transaction pooler drops the LISTEN between transactions. Notifications carry no data: woken streams read the change
+    feed from their own cursor, so nothing is lost if a notification is.
+    """
+    
+    def __init__(self, dsn: str, max_streams_per_user: int, ping_interval: float):
+        self.dsn = dsn
+        self.max_streams_per_user = max_streams_per_user
+        self.ping_interval = ping_interval
+        self._subscribers: Dict[int, Set[asyncio.Event]] = defaultdict(set)
+        self._task: Optional[asyncio.Task] = None
+    
+    def check_capacity(self, user_id: int):
+        """Raise OverloadedError if the user already has the maximum number of streams open"""
+        if len(self._subscribers.get(user_id, ())) >= self.max_streams_per_user:
+            raise OverloadedError("Too many open event streams", retry_after=30)
+    
+    def subscribe(self, user_id: int) -> asyncio.Event:
+        """Register a stream; the returned event is set whenever the user's predictions change"""
+        self.check_capacity(user_id)
+        wake = asyncio.Event()
+        self._subscribers[user_id].add(wake)
+        return wake
+    
+    def unsubscribe(self, user_id: int, wake: asyncio.Event):
+        streams = self._subscribers.get(user_id)
+        if streams is not None:
+            streams.discard(wake)
+            if not streams:
+                del self._subscribers[user_id]
+    
+    def publish(self, user_id: int):
+        for wake in self._subscribers.get(user_id, ()):
+            wake.set()
+    
+    def publish_all(self):
+        for user_id in list(self._subscribers):
+            self.publish(user_id)
+    
+    def _on_notification(self, connection, pid, channel, payload):
+        EVENT_NOTIFICATIONS.inc()
+        try:
+            user_id = int(json.loads(payload)["user_id"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Ignoring malformed {channel} notification: {payload!r}")
+            return
+        self.publish(user_id)
+    
+    def start(self):
+        if self._task is None:
+            if "-pooler" in self.dsn:
+                logger.warning(
+                    "Change notifier is listening through a pooled connection; notifications "
+                    "will be lost and event streams only advance on heartbeats. "
+                    "Set DATABASE_LISTEN_URL to the direct database host."
+                )
+            self._task = asyncio.create_task(self._run(), name="change-notifier")
+    
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    async def _run(self):
+        backoff = 1
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                await connection.add_listener(CHANGES_CHANNEL, self._on_notification)
+                logger.info(f"Listening for {CHANGES_CHANNEL} notifications")
+                backoff = 1
+                # anything may have changed while we were not listening
+                self.publish_all()
+                while True:
+                    await asyncio.sleep(self.ping_interval)
+                    await connection.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Change listener disconnected, retrying in {backoff}s: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+change_notifier = ChangeNotifier(
+    # LISTEN needs a session of its own, which a transaction pooler won't keep
+    dsn=settings.DATABASE_LISTEN_URL or settings.DATABASE_URL,
+    max_streams_per_user=settings.EVENTS_MAX_STREAMS_PER_USER,
+    ping_interval=settings.EVENTS_HEARTBEAT_SECONDS
+)
+
+def stream_start_cursor() -> str:
+    """Cursor for a stream opened without Last-Event-ID: changes from now on"""
+    start = datetime.now(timezone.utc) - timedelta(seconds=settings.CHANGES_SETTLE_SECONDS)
+    return encode_cursor(start, 0)
+
+def _format_event(event: str, data: bytes, event_id: Optional[str] = None) -> bytes:
+    lines = [f"id: {event_id}".encode()] if event_id else []
+    lines.append(f"event: {event}".encode())
+    lines.append(b"data: " + data)
+    return b"\n".join(lines) + b"\n\n"
+
+async def stream_changes(user_id: int, cursor: str) -> AsyncIterator[bytes]:
+    """
+    Server-sent events for one subscriber, starting after `cursor`.
+    
+    Each change is one `change` event whose id is its change-feed cursor, so
+    a reconnect with Last-Event-ID resumes exactly where the client left off.
+    Comment lines keep idle connections alive.
+    
+    The stream registers with change_notifier only once iteration starts, and
+    unregisters when it ends, so a response that is never sent holds no slot.
+    Callers check change_notifier.check_capacity() up front to answer 429.
+    """
+    wake = change_notifier.subscribe(user_id)
+    EVENT_STREAMS_OPEN.inc()
+    try:
+        yield f"retry: {settings.EVENTS_RETRY_MS}\n\n".encode()
+        while True:
+            # changes are read on the primary: a replica may not have replayed
+            # the commit that triggered the notification yet.
+            async with AsyncSessionLocal() as session:
+                page = await ChangesService(session).get_changes(
+                    user_id, since=cursor, limit=settings.EVENTS_BATCH_SIZE
+                )
+            for item in page.items:
+                item_cursor = encode_cursor(item["changed_at"], item["id"])
+                yield _format_event("change", orjson.dumps(item), item_cursor)
+            cursor = page.cursor
+            if page.has_more:
+                continue
+            
+            # idle until notified; heartbeats don't touch the database
+            # (a listener reconnect wakes every stream, covering anything missed)
+            while True:
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+                    break
+                except asyncio.TimeoutError:
+                    yield b": heartbeat\n\n"
+            # let the writing transaction age past the feed's settle window,
+            # folding any further notifications into one read.
+            await asyncio.sleep(settings.CHANGES_SETTLE_SECONDS)
+            wake.clear()
+    except CursorExpiredError as e:
+        yield _format_event("resync", orjson.dumps({"detail": str(e)}))
+    finally:
+        change_notifier.unsubscribe(user_id, wake)
+        EVENT_STREAMS_OPEN.dec()
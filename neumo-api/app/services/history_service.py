@@ -1 +1,223 @@
-# history operations.
\ No newline at end of file
+# history operations.
+import asyncio
+import logging
+from collections import deque
+from datetime import date, datetime, timezone
+from typing import Optional, List, NamedTuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, text, tuple_
+from sqlalchemy.exc import ProgrammingError
+from ..models.history import PredictionEvent
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..core.metrics import (
+    HISTORY_EVENTS_BUFFERED, HISTORY_EVENTS_FLUSHED, HISTORY_EVENTS_DROPPED, HISTORY_FLUSH_SECONDS
+)
+from ..utils.pagination import encode_cursor, decode_cursor
+
+logger = logging.getLogger(__name__)
+
+# serializes partition maintenance across workers; any constant works, it
+# only has to be shared by every process running it
+PARTITIONS_LOCK_ID = 7_330_034
+# SQLSTATE duplicate_table
+DUPLICATE_TABLE = "42P07"
+
+class HistoryPage(NamedTuple):
+    """One page of prediction events"""
+    items: List[PredictionEvent]
+    next_cursor: Optional[str]
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+class HistoryRecorder:
+    """
+    Write-behind buffer for prediction audit events.
+    
+    `record` only appends to memory, so auditing adds nothing to the request's
+    own transaction. A background task flushes the buffer as multi-row INSERTs
+    every HISTORY_FLUSH_INTERVAL_SECONDS, or as soon as a full batch is waiting.
+    Events still buffered when the process dies are lost; the buffer is
+    flushed on shutdown.
+    """
+    
+    def __init__(self, batch_size: int, flush_interval: float, max_buffered: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = deque(maxlen=max_buffered)
+        self._batch_ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        HISTORY_EVENTS_BUFFERED.set_function(lambda: len(self._buffer))
+    
+    def record(
+        self,
+        event_type: str,
+        prediction_id: int,
+        user_id: int,
+        details: Optional[dict] = None
+    ):
+        """Queue an event; never blocks and never touches the database"""
+        if len(self._buffer) == self._buffer.maxlen:
+            HISTORY_EVENTS_DROPPED.inc()
+        self._buffer.append({
+            "created_at": datetime.now(timezone.utc),
+            "prediction_id": prediction_id,
+            "user_id": user_id,
+            "event_type": event_type,
+            "details": details
+        })
+        if len(self._buffer) >= self.batch_size:
+            self._batch_ready.set()
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="history-flush")
+    
+    async def stop(self):
+        """Stop the flush loop and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception(f"Could not flush prediction history on shutdown, {len(self._buffer)} events lost")
+    
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Flushing prediction history failed, will retry")
+    
+    async def flush(self):
+        """Write every buffered event, one multi-row INSERT per batch"""
+        while self._buffer:
+            count = min(self.batch_size, len(self._buffer))
+            batch = [self._buffer.popleft() for _ in range(count)]
+            try:
+                with HISTORY_FLUSH_SECONDS.time():
+                    async with AsyncSessionLocal() as session:
+                        await session.execute(insert(PredictionEvent).values(batch))
+                        await session.commit()
+            except Exception:
+                # put the batch back in order for the next attempt. Events
+                # recorded meanwhile may have filled the buffer: the oldest
+                # ones are dropped (and counted), as record() would.
+                free = self._buffer.maxlen - len(self._buffer)
+                if free < len(batch):
+                    HISTORY_EVENTS_DROPPED.inc(len(batch) - free)
+                    batch = batch[len(batch) - free:]
+                self._buffer.extendleft(reversed(batch))
+                raise
+            HISTORY_EVENTS_FLUSHED.inc(count)
+
+history_recorder = HistoryRecorder(
+    batch_size=settings.HISTORY_FLUSH_BATCH_SIZE,
+    flush_interval=settings.HISTORY_FLUSH_INTERVAL_SECONDS,
+    max_buffered=settings.HISTORY_MAX_BUFFERED_EVENTS
+)
+
+class HistoryService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_user_events(
+        self,
+        user_id: int,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        prediction_id: Optional[int] = None,
+        event_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> HistoryPage:
+        """
+        Get a page of a user's events, newest first.
+        
+        Bounding the window with since/until lets Postgres skip whole monthly
+        partitions; the cursor continues from the previous page's last event.
+        """
+        query = (
+            select(PredictionEvent)
+            .where(PredictionEvent.user_id == user_id)
+            .order_by(PredictionEvent.created_at.desc(), PredictionEvent.id.desc())
+            .limit(limit + 1)
+        )
+        if prediction_id is not None:
+            query = query.where(PredictionEvent.prediction_id == prediction_id)
+        if event_type:
+            query = query.where(PredictionEvent.event_type == event_type)
+        if since:
+            query = query.where(PredictionEvent.created_at >= since)
+        if until:
+            query = query.where(PredictionEvent.created_at < until)
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+            query = query.where(
+                tuple_(PredictionEvent.created_at, PredictionEvent.id) < tuple_(cursor_created_at, cursor_id)
+            )
+        
+        result = await self.db.execute(query)
+        events = result.scalars().all()
+        
+        next_cursor = None
+        if len(events) > limit:
+            events = events[:limit]
+            next_cursor = encode_cursor(events[-1].created_at, events[-1].id)
+        return HistoryPage(items=events, next_cursor=next_cursor)
+    
+    async def ensure_partitions(self, months_ahead: Optional[int] = None) -> List[str]:
+        """
+        Create the monthly prediction_events partitions from this month to
+        `months_ahead` months out. Safe to run repeatedly.
+        
+        Every worker runs this at startup and on a schedule, so runs are
+        serialized on an advisory lock: concurrent CREATE TABLE ... PARTITION
+        OF statements fail on each other even with IF NOT EXISTS. A partition
+        created by someone else anyway (e.g. by hand) is skipped.
+        
+        Returns:
+            list: names of the partitions that were checked
+        """
+        if months_ahead is None:
+            months_ahead = settings.HISTORY_PARTITION_MONTHS_AHEAD
+        await self.db.execute(
+            text("SELECT pg_advisory_xact_lock(:lock_id)"),
+            {"lock_id": PARTITIONS_LOCK_ID}
+        )
+        first = datetime.now(timezone.utc).date().replace(day=1)
+        names = []
+        for offset in range(months_ahead + 1):
+            start, end = _add_months(first, offset), _add_months(first, offset + 1)
+            name = f"prediction_events_y{start.year}m{start.month:02d}"
+            try:
+                # a failed CREATE only rolls back its own savepoint
+                async with self.db.begin_nested():
+                    await self.db.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF prediction_events "
+                        f"FOR VALUES FROM ('{start}') TO ('{end}')"
+                    ))
+            except ProgrammingError as e:
+                if getattr(e.orig, "sqlstate", None) != DUPLICATE_TABLE:
+                    raise
+                logger.info(f"History partition {name} already exists")
+            names.append(name)
+        await self.db.commit()
+        return names
+
+async def ensure_history_partitions():
+    """Scheduled job: keep monthly partitions created ahead of time"""
+    async with AsyncSessionLocal() as session:
+        await HistoryService(session).ensure_partitions()
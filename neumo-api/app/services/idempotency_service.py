@@ -0,0 +1,145 @@
+# Idempotency-Key handling for retried requests.
+import asyncio
+import hashlib
+import time
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..models.idempotency_key import IdempotencyKey
+from ..utils.exceptions import IdempotencyKeyMismatchError, RequestInProgressError
+
+def request_fingerprint(*parts) -> str:
+    """sha256 over the parts of a request that must match on a retry"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if part is None:
+            part = b""
+        elif not isinstance(part, bytes):
+            part = str(part).encode()
+        # length-prefixed so ("ab", "c") and ("a", "bc") differ
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+class IdempotencyService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def build_claim_statement(self, user_id: int, key: str, fingerprint: str):
+        """
+        Insert the key, or take over one that expired or whose request died.
+        Returns a row only when the caller now owns the key.
+        """
+        now = func.now()
+        statement = pg_insert(IdempotencyKey).values(
+            user_id=user_id,
+            key=key,
+            fingerprint=fingerprint,
+            locked_until=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+            expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+        )
+        return statement.on_conflict_do_update(
+            index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+            set_={
+                "fingerprint": statement.excluded.fingerprint,
+                "response": None,
+                "locked_until": statement.excluded.locked_until,
+                "expires_at": statement.excluded.expires_at,
+                "created_at": now
+            },
+            where=or_(
+                IdempotencyKey.expires_at <= now,
+                and_(IdempotencyKey.response.is_(None), IdempotencyKey.locked_until <= now)
+            )
+        ).returning(IdempotencyKey.key)
+
+    async def begin(self, user_id: int, key: str, fingerprint: str) -> Optional[dict]:
+        """
+        Claim `key` for this request.
+
+        Returns None when the caller owns the key and should run the request
+        (then call complete() or release()), or the stored response of the
+        original request. A retry that finds the original still running polls
+        until it finishes, for up to IDEMPOTENCY_WAIT_SECONDS.
+
+        Raises:
+            IdempotencyKeyMismatchError: the key was used for a different request
+            RequestInProgressError: the original is still running after the wait
+        """
+        give_up_at = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            result = await self.db.execute(self.build_claim_statement(user_id, key, fingerprint))
+            claimed = result.scalar_one_or_none() is not None
+            await self.db.commit()
+            if claimed:
+                return None
+
+            result = await self.db.execute(
+                select(IdempotencyKey.fingerprint, IdempotencyKey.response).where(
+                    IdempotencyKey.user_id == user_id,
+                    IdempotencyKey.key == key
+                )
+            )
+            existing = result.one_or_none()
+            # don't hold a pooled connection while waiting
+            await self.db.rollback()
+
+            if existing is not None:
+                if existing.fingerprint != fingerprint:
+                    raise IdempotencyKeyMismatchError(
+                        "Idempotency-Key was already used for a different request"
+                    )
+                if existing.response is not None:
+                    return existing.response
+                if time.monotonic() >= give_up_at:
+                    raise RequestInProgressError(
+                        "A request with this Idempotency-Key is still in progress",
+                        settings.IDEMPOTENCY_POLL_INTERVAL_SECONDS
+                    )
+                await asyncio.sleep(settings.IDEMPOTENCY_POLL_INTERVAL_SECONDS)
+            # a missing row was purged in between: claim again right away
+
+    async def complete(self, user_id: int, key: str, response: dict):
+        """Store the response that retries of `key` will get"""
+        await self.db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            .values(response=response)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+
+    async def release(self, user_id: int, key: str):
+        """Give up a claim without a response, so a retry runs the request again"""
+        await self.db.rollback()
+        await self.db.execute(
+            delete(IdempotencyKey)
+            .where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key,
+                IdempotencyKey.response.is_(None)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+
+    async def purge_expired(self) -> int:
+        """Delete keys past their TTL; returns the number removed"""
+        result = await self.db.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.expires_at <= func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount
+
+async def purge_expired_idempotency_keys():
+    """Scheduled job: drop expired idempotency keys in a session of its own"""
+    async with AsyncSessionLocal() as session:
+        await IdempotencyService(session).purge_expired()
@@ -0,0 +1,241 @@
+# queued prediction jobs: claiming, running and storing results.
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.admission import inference_admission, Priority
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..core.metrics import PREDICTION_JOBS_PROCESSED, PREDICTION_JOB_BATCH_SIZE, PREDICTION_JOB_BATCH_SECONDS
+from ..models.prediction import Prediction
+from ..models.prediction_job import PredictionJob
+from ..utils.aws_utils import s3_manager
+from ..utils.exceptions import OverloadedError
+from .prediction_service import PredictionService
+
+logger = logging.getLogger(__name__)
+
+class ClaimedJob(NamedTuple):
+    """A job leased to this worker"""
+    prediction_id: int
+    image_filename: str
+    # including this claim
+    attempts: int
+
+class PredictionJobService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def build_claim_statement(self, limit: int, lease_seconds: float):
+        """
+        Lease up to `limit` due jobs and mark their predictions "processing".
+
+        One statement: the due jobs are picked with FOR UPDATE SKIP LOCKED so
+        concurrent workers never wait on or double-claim each other's rows,
+        their lease is pushed forward in a data-modifying CTE, and the
+        predictions are updated from it.
+        """
+        due = (
+            select(PredictionJob.prediction_id)
+            .where(PredictionJob.available_at <= func.now())
+            .order_by(PredictionJob.available_at, PredictionJob.prediction_id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        claimed = (
+            update(PredictionJob)
+            .where(PredictionJob.prediction_id.in_(due))
+            .values(
+                attempts=PredictionJob.attempts + 1,
+                available_at=func.now() + timedelta(seconds=lease_seconds)
+            )
+            .returning(PredictionJob.prediction_id, PredictionJob.attempts)
+            .cte("claimed")
+        )
+        return (
+            update(Prediction)
+            .where(Prediction.id == claimed.c.prediction_id)
+            .values(status="processing")
+            .returning(Prediction.id, Prediction.image_filename, claimed.c.attempts)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def claim(self, limit: int, lease_seconds: float) -> List[ClaimedJob]:
+        result = await self.db.execute(self.build_claim_statement(limit, lease_seconds))
+        jobs = [ClaimedJob(*row) for row in result.all()]
+        await self.db.commit()
+        return jobs
+
+    async def finish(self, results: Dict[int, dict], failures: Dict[int, str]):
+        """
+        Store completed and failed predictions and drop their jobs, in one
+        transaction. `results` maps prediction ids to prediction_class,
+        confidence_score and inference_time_ms; `failures` to the error.
+        """
+        table = Prediction.__table__
+        # bind names must differ from the column names they set
+        store = (
+            update(table)
+            .where(table.c.id == bindparam("job_id"))
+            .values(
+                prediction_class=bindparam("result_class"),
+                confidence_score=bindparam("result_confidence"),
+                inference_time_ms=bindparam("result_time_ms"),
+                model_version=settings.MODEL_VERSION,
+                status=bindparam("result_status")
+            )
+        )
+        params = [
+            {
+                "job_id": prediction_id,
+                "result_class": values["prediction_class"],
+                "result_confidence": values["confidence_score"],
+                "result_time_ms": values["inference_time_ms"],
+                "result_status": "completed",
+            }
+            for prediction_id, values in results.items()
+        ] + [
+            {
+                "job_id": prediction_id,
+                "result_class": "UNKNOWN",
+                "result_confidence": 0.0,
+                "result_time_ms": None,
+                "result_status": "failed",
+            }
+            for prediction_id in failures
+        ]
+        if not params:
+            return
+
+        await self.db.execute(store, params)
+        await self.db.execute(
+            delete(PredictionJob).where(PredictionJob.prediction_id.in_([p["job_id"] for p in params]))
+        )
+        await self.db.commit()
+
+    async def get_job(self, job_id: int, user_id: int) -> Optional[dict]:
+        """A user's job, with the prediction once it is completed or failed"""
+        query = (
+            select(*Prediction.__table__.columns, func.coalesce(PredictionJob.attempts, 0).label("attempts"))
+            .outerjoin(PredictionJob, PredictionJob.prediction_id == Prediction.id)
+            .where(Prediction.id == job_id, Prediction.user_id == user_id)
+        )
+        result = await self.db.execute(query)
+        row = result.one_or_none()
+        if row is None:
+            return None
+
+        prediction = None
+        if row.status in ("completed", "failed"):
+            prediction = PredictionService(self.db)._predictions_with_presigned_urls([row])[0]
+        return {
+            "job_id": row.id,
+            "status": row.status,
+            "attempts": row.attempts,
+            "prediction": prediction
+        }
+
+class PredictionJobWorker:
+    """
+    Claims queued jobs in batches and runs them through the model.
+
+    Runs inside the API processes (a PeriodicTask) or on its own via
+    `python -m app.cli prediction-worker`; any number of workers can share the
+    queue. The model is loaded once per worker. A batch that fails as a whole
+    (model or database error) is retried when its lease runs out, up to
+    max_attempts claims per job.
+    """
+
+    def __init__(self, batch_size: int, lease_seconds: float, max_attempts: int):
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._predictor: Optional[PredictionService] = None
+
+    async def _get_predictor(self) -> PredictionService:
+        if self._predictor is None:
+            predictor = PredictionService(db=None)
+            await predictor.load_model_if_needed()
+            self._predictor = predictor
+        return self._predictor
+
+    async def _prepare(self, predictor: PredictionService, job: ClaimedJob):
+        image = await s3_manager.download_image_from_s3(job.image_filename)
+        return await predictor.process_image(image)
+
+    async def run_batch(self) -> int:
+        """Claim and process one batch; returns the number of jobs claimed"""
+        # take the inference slot before leasing jobs, so being shed never
+        # burns an attempt
+        async with inference_admission.admit(Priority.BATCH):
+            return await self._run_batch()
+
+    async def _run_batch(self) -> int:
+        async with AsyncSessionLocal() as session:
+            jobs = await PredictionJobService(session).claim(self.batch_size, self.lease_seconds)
+        if not jobs:
+            return 0
+
+        start_time = time.time()
+        PREDICTION_JOB_BATCH_SIZE.observe(len(jobs))
+        failures = {
+            job.prediction_id: f"Gave up after {self.max_attempts} attempts"
+            for job in jobs if job.attempts > self.max_attempts
+        }
+        active = [job for job in jobs if job.prediction_id not in failures]
+
+        results = {}
+        if active:
+            predictor = await self._get_predictor()
+            # a bad or missing image fails only its own job
+            prepared = await asyncio.gather(
+                *(self._prepare(predictor, job) for job in active),
+                return_exceptions=True
+            )
+            ready = []
+            for job, image in zip(active, prepared):
+                if isinstance(image, Exception):
+                    failures[job.prediction_id] = str(image)
+                else:
+                    ready.append((job, image))
+
+            if ready:
+                outputs = await predictor.predict_batch([image for _, image in ready])
+                inference_time = (time.time() - start_time) * 1000
+                for (job, _), output in zip(ready, outputs):
+                    results[job.prediction_id] = {
+                        "prediction_class": output["class"],
+                        "confidence_score": output["confidence"],
+                        "inference_time_ms": inference_time
+                    }
+
+        for prediction_id, error in failures.items():
+            logger.warning(f"Prediction job {prediction_id} failed: {error}")
+
+        async with AsyncSessionLocal() as session:
+            await PredictionJobService(session).finish(results, failures)
+
+        PREDICTION_JOBS_PROCESSED.labels(outcome="completed").inc(len(results))
+        PREDICTION_JOBS_PROCESSED.labels(outcome="failed").inc(len(failures))
+        PREDICTION_JOB_BATCH_SECONDS.observe(time.time() - start_time)
+        return len(jobs)
+
+    async def drain(self):
+        """Process batches until the queue has no due jobs left"""
+        try:
+            while await self.run_batch() >= self.batch_size:
+                pass
+        except OverloadedError:
+            # interactive requests took precedence; try again next tick
+            logger.info("Prediction job batch deferred by inference admission control")
+
+prediction_job_worker = PredictionJobWorker(
+    batch_size=settings.PREDICTION_JOBS_BATCH_SIZE,
+    lease_seconds=settings.PREDICTION_JOBS_LEASE_SECONDS,
+    max_attempts=settings.PREDICTION_JOBS_MAX_ATTEMPTS
+)
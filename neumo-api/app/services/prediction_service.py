@@ -1,23 +1,88 @@
 # services/prediction_service.py
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import Optional, List
+from sqlalchemy import select, insert, func, text, tuple_, true, false
+from typing import Optional, List, NamedTuple, Sequence, Tuple
 import torch
 import torch.nn as nn
 from torchvision import transforms
 from PIL import Image
 import io
+import json
 import time
 import asyncio
+from datetime import datetime
 import os
 from ..models.prediction import Prediction
+from ..models.prediction_job import PredictionJob
 from ..models.user import User
-from ..schemas.prediction import PredictionCreate, PredictionUpdate
+from ..schemas.prediction import PredictionCreate, PredictionUpdate, PredictionFilter
 from ..utils.image_processing import process_image_for_prediction
-from ..utils.model_utils import load_model, predict_image
+from ..utils.model_utils import load_model, predict_image, predict_batch
 from ..utils.aws_utils import s3_manager
+from ..utils.pagination import encode_cursor, decode_cursor
 from ..core.config import settings
 
+# fields a listing can return, mapped to the column each is read from
+# (image_url is presigned from the stored image_filename).
+LIST_FIELD_COLUMNS = {
+    "id": Prediction.id,
+    "user_id": Prediction.user_id,
+    "image_filename": Prediction.image_filename,
+    "image_url": Prediction.image_filename,
+    "prediction_class": Prediction.prediction_class,
+    "confidence_score": Prediction.confidence_score,
+    "inference_time_ms": Prediction.inference_time_ms,
+    "patient_age": Prediction.patient_age,
+    "patient_gender": Prediction.patient_gender,
+    "patient_symptoms": Prediction.patient_symptoms,
+    "created_at": Prediction.created_at,
+    "updated_at": Prediction.updated_at,
+    "reviewed_by_doctor": Prediction.reviewed_by_doctor,
+    "doctor_diagnosis": Prediction.doctor_diagnosis,
+    "doctor_notes": Prediction.doctor_notes,
+    "status": Prediction.status,
+    "is_flagged": Prediction.is_flagged,
+}
+
+# what list views show by default
+SUMMARY_FIELDS = (
+    "id", "prediction_class", "confidence_score", "created_at",
+    "status", "is_flagged", "reviewed_by_doctor",
+)
+
+# the full prediction as returned with include_images=true
+DETAIL_FIELDS = (
+    "id", "user_id", "image_filename", "image_url", "prediction_class",
+    "confidence_score", "inference_time_ms", "patient_age", "patient_gender",
+    "patient_symptoms", "created_at", "updated_at", "reviewed_by_doctor",
+    "status", "is_flagged",
+)
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Parse a comma separated `fields=` parameter into listable field names.
+    
+    `id` is always included. Returns None when no fields were requested.
+    
+    Raises:
+        ValueError: on unknown field names
+    """
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in LIST_FIELD_COLUMNS]
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(LIST_FIELD_COLUMNS)}"
+        )
+    return tuple(dict.fromkeys(["id", *requested]))
+
+class PredictionPage(NamedTuple):
+    """One page of a prediction listing"""
+    items: List[dict]
+    # opaque cursor for the next page, None on the last page
+    next_cursor: Optional[str]
+
 class PredictionService:
     def __init__(self, db: AsyncSession, model_path: str = None):
         if model_path is None:
@@ -64,21 +129,20 @@ class PredictionService:
         patient_age: Optional[int] = None,
         patient_gender: Optional[str] = None,
         patient_symptoms: Optional[str] = None
-    ) -> Prediction:
+    ) -> dict:
         """
         Complete prediction workflow:
-        1. Verify user exists
-        2. Load model if needed
-        3. Process image for model input (keeping original file intact)
-        4. Run inference
-        5. Upload image to AWS S3 (in parallel with or after processing)
-        6. Store prediction in database
-        """
+        1. Load model if needed
+        2. Process image for model input (keeping original file intact)
+        3. Run inference
+        4. Upload image to AWS S3 (in parallel with or after processing)
+        5. Store prediction in database
         
-        # Verify user exists
-        user = await self.get_user_by_id(user_id)
-        if not user:
-            raise ValueError("User not found")
+        user_id must come from an authenticated principal; the user is not
+        looked up again here. The row is stored with a single INSERT ...
+        RETURNING and one commit, and serialized (with a presigned image URL)
+        straight from the returned values.
+        """
         
         start_time = time.time()
         
@@ -128,40 +192,92 @@ class PredictionService:
                 patient_symptoms=patient_symptoms
             )
             
-            db_prediction = Prediction(
-                user_id=user_id,
-                image_filename=prediction_data.image_filename,
-                prediction_class=prediction_data.prediction_class,
-                confidence_score=prediction_data.confidence_score,
-                inference_time_ms=prediction_data.inference_time_ms,
-                patient_age=prediction_data.patient_age,
-                patient_gender=prediction_data.patient_gender,
-                patient_symptoms=prediction_data.patient_symptoms,
-                status="completed"
+            result = await self.db.execute(
+                insert(Prediction)
+                .values(
+                    user_id=user_id,
+                    image_filename=prediction_data.image_filename,
+                    prediction_class=prediction_data.prediction_class,
+                    confidence_score=prediction_data.confidence_score,
+                    inference_time_ms=prediction_data.inference_time_ms,
+                    patient_age=prediction_data.patient_age,
+                    patient_gender=prediction_data.patient_gender,
+                    patient_symptoms=prediction_data.patient_symptoms,
+                    model_version=settings.MODEL_VERSION,
+                    status="completed"
+                )
+                .returning(*Prediction.__table__.columns)
             )
-            
-            self.db.add(db_prediction)
+            row = result.one()
             await self.db.commit()
-            await self.db.refresh(db_prediction)
             
-            return db_prediction
+            return self._predictions_with_presigned_urls([row])[0]
             
         except Exception as e:
             # Create failed prediction record for tracking
-            db_prediction = Prediction(
-                user_id=user_id,
-                image_filename=filename,
-                prediction_class="UNKNOWN",
-                confidence_score=0.0,
-                inference_time_ms=(time.time() - start_time) * 1000,
-                status="failed"
+            await self.db.rollback()
+            await self.db.execute(
+                insert(Prediction).values(
+                    user_id=user_id,
+                    image_filename=filename,
+                    prediction_class="UNKNOWN",
+                    confidence_score=0.0,
+                    inference_time_ms=(time.time() - start_time) * 1000,
+                    model_version=settings.MODEL_VERSION,
+                    status="failed"
+                )
             )
-            
-            self.db.add(db_prediction)
             await self.db.commit()
             
             raise ValueError(f"Prediction failed: {str(e)}")
     
+    async def enqueue_prediction(
+        self,
+        user_id: int,
+        image_file,
+        filename: str,
+        patient_age: Optional[int] = None,
+        patient_gender: Optional[str] = None,
+        patient_symptoms: Optional[str] = None
+    ) -> dict:
+        """
+        Store the image and queue it for a job worker (see job_service).
+        
+        Inserts the prediction with status "queued" and its prediction_jobs row
+        in one transaction; the prediction id is the job id.
+        """
+        image_url = await s3_manager.upload_image_to_s3(
+            image_file,
+            filename,
+            user_id,
+            self._get_content_type(filename)
+        )
+        
+        try:
+            result = await self.db.execute(
+                insert(Prediction)
+                .values(
+                    user_id=user_id,
+                    image_filename=image_url,
+                    prediction_class="PENDING",
+                    confidence_score=0.0,
+                    patient_age=patient_age,
+                    patient_gender=patient_gender,
+                    patient_symptoms=patient_symptoms,
+                    status="queued"
+                )
+                .returning(*Prediction.__table__.columns)
+            )
+            row = result.one()
+            await self.db.execute(insert(PredictionJob).values(prediction_id=row.id))
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            await s3_manager.delete_image_from_s3(image_url)
+            raise
+        
+        return self._predictions_with_presigned_urls([row])[0]
+    
     def _create_image_copy(self, image_file):
         """Create a copy of the image file for processing"""
         if hasattr(image_file, 'read'):
@@ -209,12 +325,86 @@ class PredictionService:
             self.class_names
         )
     
+    async def predict_batch(self, processed_images: List[torch.Tensor]) -> List[dict]:
+        """Run inference on several processed images in one forward pass"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None,
+            predict_batch,
+            self.model,
+            processed_images,
+            self.class_names
+        )
+    
     async def get_prediction_by_id(self, prediction_id: int) -> Optional[Prediction]:
         """Get prediction by ID"""
         query = select(Prediction).where(Prediction.id == prediction_id)
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
     
+    async def get_prediction_version(self, prediction_id: int, user_id: int) -> Optional[datetime]:
+        """updated_at of one of the user's predictions, without loading the row"""
+        query = select(Prediction.updated_at).where(
+            Prediction.id == prediction_id,
+            Prediction.user_id == user_id
+        )
+        result = await self.db.execute(query)
+        return result.scalar_one_or_none()
+    
+    async def get_listing_version(self, user_id: int) -> Tuple[Optional[datetime], int]:
+        """
+        max(updated_at) and count of the user's predictions, the inputs of the
+        list ETag. Index-only scan of ix_predictions_user_id_updated_at.
+        """
+        query = select(func.max(Prediction.updated_at), func.count()).where(
+            Prediction.user_id == user_id
+        )
+        result = await self.db.execute(query)
+        last_updated, count = result.one()
+        return last_updated, count
+    
+    def _prediction_to_dict(self, prediction: Prediction, image_url: Optional[str] = None) -> dict:
+        """Serialize a prediction row for API responses"""
+        return {
+            "id": prediction.id,
+            "user_id": prediction.user_id,
+            "image_filename": prediction.image_filename,
+            "image_url": image_url,  # presigned URL for frontend access
+            "prediction_class": prediction.prediction_class,
+            "confidence_score": prediction.confidence_score,
+            "inference_time_ms": prediction.inference_time_ms,
+            "patient_age": prediction.patient_age,
+            "patient_gender": prediction.patient_gender,
+            "patient_symptoms": prediction.patient_symptoms,
+            "created_at": prediction.created_at.isoformat(),
+            "updated_at": prediction.updated_at.isoformat(),
+            "reviewed_by_doctor": prediction.reviewed_by_doctor,
+            "status": prediction.status,
+            "is_flagged": prediction.is_flagged
+        }
+    
+    def _predictions_with_presigned_urls(self, predictions: List[Prediction]) -> List[dict]:
+        """Serialize predictions, signing all their image URLs in one batch"""
+        presigned_urls = s3_manager.get_s3_presigned_urls(
+            [p.image_filename for p in predictions],
+            expiration=settings.PRESIGNED_URL_EXPIRATION_SECONDS
+        )
+        return [
+            self._prediction_to_dict(p, presigned_urls.get(p.image_filename))
+            for p in predictions
+        ]
+
+    def with_presigned_url(self, prediction: dict) -> dict:
+        """
+        Re-sign the image URL of an already serialized prediction, e.g. one
+        stored for an idempotent replay that outlives the original URL.
+        """
+        presigned_urls = s3_manager.get_s3_presigned_urls(
+            [prediction["image_filename"]],
+            expiration=settings.PRESIGNED_URL_EXPIRATION_SECONDS
+        )
+        return {**prediction, "image_url": presigned_urls.get(prediction["image_filename"])}
+
     async def get_prediction_with_presigned_url(self, prediction_id: int, user_id: int = None) -> Optional[dict]:
         """Get prediction with presigned URL for image access"""
         prediction = await self.get_prediction_by_id(prediction_id)
@@ -225,87 +415,186 @@ class PredictionService:
         if user_id and prediction.user_id != user_id:
             return None
         
-        try:
-            # Generate presigned URL for the image
-            presigned_url = await s3_manager.get_s3_presigned_url(
-                prediction.image_filename, 
-                expiration=3600  # 1 hour
+        # image_url is None if the URL could not be signed
+        return self._predictions_with_presigned_urls([prediction])[0]
+    
+    def _apply_filters(
+        self,
+        query,
+        prediction_class: Optional[str] = None,
+        filters: Optional[PredictionFilter] = None
+    ):
+        """
+        Add listing filters as plain column comparisons so every predicate stays
+        sargable against the per-user indexes. Booleans compare to literal
+        true/false (not bind parameters) so the partial indexes on
+        is_flagged/reviewed_by_doctor can match.
+        """
+        if prediction_class:
+            query = query.where(Prediction.prediction_class == prediction_class)
+        if filters is None:
+            return query
+        
+        if filters.prediction_class:
+            query = query.where(Prediction.prediction_class == filters.prediction_class)
+        if filters.created_from:
+            query = query.where(Prediction.created_at >= filters.created_from)
+        if filters.created_to:
+            query = query.where(Prediction.created_at < filters.created_to)
+        if filters.min_confidence is not None:
+            query = query.where(Prediction.confidence_score >= filters.min_confidence)
+        if filters.max_confidence is not None:
+            query = query.where(Prediction.confidence_score <= filters.max_confidence)
+        if filters.is_flagged is not None:
+            query = query.where(Prediction.is_flagged == (true() if filters.is_flagged else false()))
+        if filters.reviewed_by_doctor is not None:
+            query = query.where(
+                Prediction.reviewed_by_doctor == (true() if filters.reviewed_by_doctor else false())
             )
-            
-            # Convert prediction to dict and add presigned URL
-            prediction_dict = {
-                "id": prediction.id,
-                "user_id": prediction.user_id,
-                "image_filename": prediction.image_filename,
-                "image_url": presigned_url,  # Add presigned URL for frontend access
-                "prediction_class": prediction.prediction_class,
-                "confidence_score": prediction.confidence_score,
-                "inference_time_ms": prediction.inference_time_ms,
-                "patient_age": prediction.patient_age,
-                "patient_gender": prediction.patient_gender,
-                "patient_symptoms": prediction.patient_symptoms,
-                "created_at": prediction.created_at.isoformat(),
-                "updated_at": prediction.updated_at.isoformat(),
-                "reviewed_by_doctor": prediction.reviewed_by_doctor,
-                "status": prediction.status,
-                "is_flagged": prediction.is_flagged
-            }
-            
-            return prediction_dict
-            
-        except Exception as e:
-            print(f"Error generating presigned URL: {e}")
-            # Return prediction without presigned URL if generation fails
-            return {
-                "id": prediction.id,
-                "user_id": prediction.user_id,
-                "image_filename": prediction.image_filename,
-                "prediction_class": prediction.prediction_class,
-                "confidence_score": prediction.confidence_score,
-                "inference_time_ms": prediction.inference_time_ms,
-                "created_at": prediction.created_at.isoformat(),
-                "updated_at": prediction.updated_at.isoformat(),
-                "status": prediction.status
-            }
+        if filters.min_age is not None:
+            query = query.where(Prediction.patient_age >= filters.min_age)
+        if filters.max_age is not None:
+            query = query.where(Prediction.patient_age <= filters.max_age)
+        if filters.patient_gender:
+            query = query.where(Prediction.patient_gender == filters.patient_gender)
+        return query
+    
+    def build_history_query(
+        self,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        prediction_class: Optional[str] = None,
+        fields: Sequence[str] = SUMMARY_FIELDS,
+        filters: Optional[PredictionFilter] = None
+    ):
+        """
+        Build the per-user history query, newest first.
+        
+        Only the columns behind `fields` are selected (plus the id/created_at sort
+        key), so rows come back as plain tuples without loading the Text columns
+        or hydrating ORM entities.
+        
+        Every filter starts with user_id and the ordering matches the
+        (user_id, [prediction_class,] created_at DESC, id DESC) indexes, so pages
+        are index range scans however large the table grows. Fetches limit + 1
+        rows; the extra one tells the caller whether there is a next page.
+        """
+        columns = {"id": Prediction.id, "created_at": Prediction.created_at}
+        for field in fields:
+            column = LIST_FIELD_COLUMNS[field]
+            columns.setdefault(column.key, column)
+        
+        query = (
+            select(*columns.values())
+            .where(Prediction.user_id == user_id)
+            .order_by(Prediction.created_at.desc(), Prediction.id.desc())
+            .limit(limit + 1)
+        )
+        query = self._apply_filters(query, prediction_class, filters)
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+            query = query.where(
+                tuple_(Prediction.created_at, Prediction.id) < tuple_(cursor_created_at, cursor_id)
+            )
+        elif skip:
+            query = query.offset(skip)
+        return query
     
     async def get_user_predictions(
         self, 
         user_id: int, 
         skip: int = 0, 
         limit: int = 100,
-        include_presigned_urls: bool = False
-    ) -> List[dict]:
-        """Get all predictions for a user with optional presigned URLs"""
-        query = (
-            select(Prediction)
-            .where(Prediction.user_id == user_id)
-            .offset(skip)
-            .limit(limit)
-            .order_by(Prediction.created_at.desc())
+        include_presigned_urls: bool = False,
+        cursor: Optional[str] = None,
+        prediction_class: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+        filters: Optional[PredictionFilter] = None
+    ) -> PredictionPage:
+        """
+        Get a page of predictions for a user, newest first, with optional presigned URLs.
+        
+        Pass the `next_cursor` of the previous page as `cursor` for keyset
+        pagination; `skip` is kept for offset paging and ignored when a cursor is given.
+        Items contain exactly `fields` (see `parse_fields`); by default the summary
+        fields, or every listable field when presigned URLs are requested.
+        """
+        if fields is None:
+            fields = DETAIL_FIELDS if include_presigned_urls else SUMMARY_FIELDS
+        elif include_presigned_urls and "image_url" not in fields:
+            fields = (*fields, "image_url")
+        
+        query = self.build_history_query(
+            user_id,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            prediction_class=prediction_class,
+            fields=fields,
+            filters=filters
         )
         result = await self.db.execute(query)
-        predictions = result.scalars().all()
+        rows = [row._mapping for row in result.all()]
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
         
-        if not include_presigned_urls:
-            return [
-                {
-                    "id": p.id,
-                    "prediction_class": p.prediction_class,
-                    "confidence_score": p.confidence_score,
-                    "created_at": p.created_at.isoformat(),
-                    "status": p.status
-                }
-                for p in predictions
-            ]
+        presigned_urls = {}
+        if "image_url" in fields:
+            # sign the whole page in one pass
+            presigned_urls = s3_manager.get_s3_presigned_urls(
+                [row["image_filename"] for row in rows],
+                expiration=settings.PRESIGNED_URL_EXPIRATION_SECONDS
+            )
         
-        # Generate presigned URLs for each prediction
-        predictions_with_urls = []
-        for prediction in predictions:
-            pred_dict = await self.get_prediction_with_presigned_url(prediction.id, user_id)
-            if pred_dict:
-                predictions_with_urls.append(pred_dict)
+        items = []
+        for row in rows:
+            item = {}
+            for field in fields:
+                if field == "image_url":
+                    item[field] = presigned_urls.get(row["image_filename"])
+                else:
+                    item[field] = row[field]
+            items.append(item)
         
-        return predictions_with_urls
+        return PredictionPage(items=items, next_cursor=next_cursor)
+    
+    async def count_user_predictions(
+        self,
+        user_id: int,
+        estimated: bool = False,
+        prediction_class: Optional[str] = None,
+        filters: Optional[PredictionFilter] = None
+    ) -> int:
+        """
+        Count a user's predictions.
+        
+        The exact count is an index-only scan over the user's slice of the history
+        index. The estimate reads the planner's row estimate instead and costs no scan
+        at all, which is enough for "about N results" displays.
+        """
+        if estimated:
+            # EXPLAIN does not accept bind parameters, so render the (validated) literals.
+            count_query = select(1).select_from(Prediction).where(Prediction.user_id == int(user_id))
+            count_query = self._apply_filters(count_query, prediction_class, filters)
+            compiled = count_query.compile(
+                dialect=self.db.get_bind().dialect,
+                compile_kwargs={"literal_binds": True}
+            )
+            result = await self.db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+            plan = result.scalar_one()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+        
+        query = select(func.count()).select_from(Prediction).where(Prediction.user_id == user_id)
+        query = self._apply_filters(query, prediction_class, filters)
+        result = await self.db.execute(query)
+        return result.scalar_one()
     
     async def update_prediction(
         self, 
@@ -342,20 +631,22 @@ class PredictionService:
     
     async def get_predictions_by_class(
         self, 
+        user_id: int,
         prediction_class: str, 
         skip: int = 0, 
-        limit: int = 100
-    ) -> List[Prediction]:
-        """Get predictions by class"""
-        query = (
-            select(Prediction)
-            .where(Prediction.prediction_class == prediction_class)
-            .offset(skip)
-            .limit(limit)
-            .order_by(Prediction.created_at.desc())
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> PredictionPage:
+        """Get a user's predictions of one class, served by the (user_id, prediction_class, created_at) index"""
+        return await self.get_user_predictions(
+            user_id=user_id,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            prediction_class=prediction_class,
+            fields=fields
         )
-        result = await self.db.execute(query)
-        return result.scalars().all()
     
     async def get_user_by_id(self, user_id: int) -> Optional[User]:
         """Get user by ID"""
@@ -0,0 +1,113 @@
+# services/stats_service.py
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, text
+from typing import Optional
+from datetime import datetime, timedelta, timezone
+from ..models.prediction_stats import PredictionDailyStats
+
+# Recomputes rollup rows from predictions; same aggregation as the migration
+# backfill and the per-row trigger. Queued and processing predictions only
+# count once the worker has stored their result.
+REBUILD_QUERY = """
+INSERT INTO prediction_daily_stats (
+    user_id, day, prediction_class, prediction_count, confidence_sum,
+    flagged_count, reviewed_count, failed_count
+)
+SELECT
+    user_id,
+    (created_at AT TIME ZONE 'UTC')::date,
+    prediction_class,
+    count(*),
+    coalesce(sum(confidence_score), 0),
+    count(*) FILTER (WHERE is_flagged),
+    count(*) FILTER (WHERE reviewed_by_doctor),
+    count(*) FILTER (WHERE status = 'failed')
+FROM predictions
+WHERE coalesce(status, '') NOT IN ('queued', 'processing')
+{where}
+GROUP BY 1, 2, 3
+"""
+
+class StatsService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_user_stats(self, user_id: int, days: Optional[int] = None) -> dict:
+        """
+        Aggregate a user's finished prediction statistics from the daily rollup.
+        
+        Reads one row per (day, class), so the cost depends on how many days are
+        covered, not on how many predictions the user has.
+        
+        Args:
+            user_id: owner of the predictions
+            days: only count the last `days` UTC days (today included); None for all history
+        """
+        query = (
+            select(PredictionDailyStats)
+            .where(PredictionDailyStats.user_id == user_id)
+            .order_by(PredictionDailyStats.day)
+        )
+        since = None
+        if days:
+            since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+            query = query.where(PredictionDailyStats.day >= since)
+        
+        result = await self.db.execute(query)
+        rows = result.scalars().all()
+        
+        by_class = {}
+        daily = {}
+        total = flagged = reviewed = failed = 0
+        confidence_sum = 0.0
+        for row in rows:
+            if row.prediction_count <= 0:
+                continue
+            total += row.prediction_count
+            flagged += row.flagged_count
+            reviewed += row.reviewed_count
+            failed += row.failed_count
+            confidence_sum += row.confidence_sum
+            by_class[row.prediction_class] = by_class.get(row.prediction_class, 0) + row.prediction_count
+            
+            day = daily.setdefault(row.day, {"day": row.day, "total": 0, "by_class": {}})
+            day["total"] += row.prediction_count
+            day["by_class"][row.prediction_class] = row.prediction_count
+        
+        # failed predictions carry a 0.0 placeholder confidence
+        scored = total - failed
+        return {
+            "since": since,
+            "total": total,
+            "by_class": by_class,
+            "average_confidence": confidence_sum / scored if scored else None,
+            "flagged": flagged,
+            "reviewed": reviewed,
+            "failed": failed,
+            "daily": list(daily.values())
+        }
+    
+    async def rebuild(self, user_id: Optional[int] = None) -> int:
+        """
+        Recompute the rollup from predictions, for one user or everyone.
+        
+        Holds a SHARE lock on predictions for the duration so no write can slip
+        between the delete and the re-aggregation; meant for backfills and repairs.
+        
+        Returns:
+            int: number of rollup rows written
+        """
+        await self.db.execute(text("LOCK TABLE predictions IN SHARE MODE"))
+        
+        clear = delete(PredictionDailyStats)
+        params = {}
+        where = ""
+        if user_id is not None:
+            clear = clear.where(PredictionDailyStats.user_id == user_id)
+            where = "AND user_id = :user_id"
+            params["user_id"] = user_id
+        
+        await self.db.execute(clear)
+        result = await self.db.execute(text(REBUILD_QUERY.format(where=where)), params)
+        await self.db.commit()
+        return result.rowcount
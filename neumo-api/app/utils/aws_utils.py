@@ -2,11 +2,17 @@
 import boto3
 from botocore.exceptions import ClientError
 import os
-from typing import Optional, BinaryIO
+from typing import Optional, BinaryIO, Dict, Iterable
 import uuid
 import asyncio
 from functools import partial
 import io
+import math
+import time
+from .cache import TTLCache
+from .etag import presign_window, presign_window_length
+from ..core.config import settings
+from ..core.metrics import PRESIGN_CACHE_REQUESTS, PRESIGN_CACHE_HIT_RATIO, PRESIGN_CACHE_ENTRIES
 
 class S3Manager:
     def __init__(self):
@@ -17,6 +23,11 @@ class S3Manager:
             region_name=os.getenv('AWS_REGION', 'eu-north-1')  # Match your region
         )
         self.bucket_name = os.getenv('AWS_S3_BUCKET', 'kenyamall')  # Your bucket name
+        
+        # presigned URLs keyed by (object key, expiration)
+        self._presign_cache = TTLCache(maxsize=settings.PRESIGN_CACHE_MAX_ENTRIES)
+        PRESIGN_CACHE_HIT_RATIO.set_function(lambda: self._presign_cache.hit_ratio)
+        PRESIGN_CACHE_ENTRIES.set_function(lambda: len(self._presign_cache))
 
     def _upload_file_sync(self, file_obj: BinaryIO, s3_key: str, content_type: str) -> str:
         """Synchronous upload function to run in thread pool"""
@@ -114,11 +125,9 @@ class S3Manager:
         """
         try:
             # Extract S3 key from URL
-            # URL format: https://bucket-name.s3.amazonaws.com/key
-            if self.bucket_name in s3_url:
-                s3_key = s3_url.split(f"{self.bucket_name}.s3.amazonaws.com/")[1].split('?')[0]
-            else:
+            if self.bucket_name not in s3_url:
                 return False
+            s3_key = self._extract_s3_key(s3_url)
             
             # Run delete in thread pool
             loop = asyncio.get_event_loop()
@@ -134,8 +143,40 @@ class S3Manager:
             print(f"Error deleting image: {e}")
             return False
 
+    def _download_file_sync(self, s3_key: str) -> bytes:
+        """Synchronous download function to run in thread pool"""
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
+            return response['Body'].read()
+        except ClientError as e:
+            raise RuntimeError(f"AWS S3 download failed: {str(e)}")
+
+    async def download_image_from_s3(self, s3_url: str) -> bytes:
+        """
+        Download an uploaded image (used by the prediction job workers)
+        
+        Args:
+            s3_url: Full S3 URL of the image
+            
+        Returns:
+            bytes: the image file content
+        """
+        if self.bucket_name not in s3_url:
+            raise ValueError(f"Not an image in bucket {self.bucket_name}: {s3_url}")
+        s3_key = self._extract_s3_key(s3_url)
+        
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self._download_file_sync, s3_key)
+
+    def _extract_s3_key(self, s3_url: str) -> str:
+        """Extract the object key from a full S3 URL"""
+        # URL format: https://bucket-name.s3.amazonaws.com/key
+        if self.bucket_name not in s3_url:
+            raise ValueError("Invalid S3 URL format")
+        return s3_url.split(f"{self.bucket_name}.s3.amazonaws.com/")[1].split('?')[0]
+
     def _generate_presigned_url_sync(self, s3_key: str, expiration: int) -> str:
-        """Synchronous presigned URL generation"""
+        """Synchronous presigned URL generation (SigV4 signing is local, no network call)"""
         try:
             response = self.s3_client.generate_presigned_url(
                 'get_object',
@@ -146,6 +187,72 @@ class S3Manager:
         except ClientError as e:
             raise RuntimeError(f"Error generating presigned URL: {e}")
 
+    def get_s3_presigned_urls(
+        self,
+        s3_urls: Iterable[str],
+        expiration: Optional[int] = None
+    ) -> Dict[str, Optional[str]]:
+        """
+        Presign a batch of S3 URLs in one call, reusing cached signatures.
+
+        Signing is pure CPU work, so this runs inline rather than in the
+        thread pool. URLs are signed once per presign window (the ETag's
+        variant) and reused for the rest of it; each is signed to stay valid
+        until PRESIGN_CACHE_SAFETY_MARGIN_SECONDS past the window's end, so
+        it outlives any ETag it was served under.
+
+        Args:
+            s3_urls: Full S3 URLs as stored on predictions
+            expiration: URL expiration time in seconds, at most; URLs signed
+                late in a window get less, but never less than the margin
+
+        Returns:
+            dict: Maps each input URL to its presigned URL, or None if it could not be signed
+        """
+        if expiration is None:
+            expiration = settings.PRESIGNED_URL_EXPIRATION_SECONDS
+        window_length = presign_window_length(expiration)
+        now = time.time()
+        window = window_end = None
+        signed_for = expiration
+        if window_length > 0:
+            window = presign_window(now, expiration)
+            window_end = (window + 1) * window_length
+            signed_for = math.ceil(window_end + settings.PRESIGN_CACHE_SAFETY_MARGIN_SECONDS - now)
+
+        presigned: Dict[str, Optional[str]] = {}
+        hits = misses = 0
+        for s3_url in s3_urls:
+            if s3_url in presigned:
+                continue
+            try:
+                s3_key = self._extract_s3_key(s3_url)
+            except (ValueError, IndexError):
+                presigned[s3_url] = None
+                continue
+
+            cache_key = (s3_key, expiration, window)
+            url = self._presign_cache.get(cache_key) if window is not None else None
+            if url is not None:
+                hits += 1
+            else:
+                misses += 1
+                try:
+                    url = self._generate_presigned_url_sync(s3_key, signed_for)
+                except RuntimeError as e:
+                    print(f"Error generating presigned URL: {e}")
+                    presigned[s3_url] = None
+                    continue
+                if window is not None:
+                    self._presign_cache.set(cache_key, url, expires_at=window_end)
+            presigned[s3_url] = url
+
+        if hits:
+            PRESIGN_CACHE_REQUESTS.labels(result="hit").inc(hits)
+        if misses:
+            PRESIGN_CACHE_REQUESTS.labels(result="miss").inc(misses)
+        return presigned
+
     async def get_s3_presigned_url(self, s3_url: str, expiration: int = 3600) -> str:
         """
         Generate presigned URL for private S3 objects
@@ -158,21 +265,10 @@ class S3Manager:
             str: Presigned URL
         """
         try:
-            # Extract S3 key from URL
-            if self.bucket_name in s3_url:
-                s3_key = s3_url.split(f"{self.bucket_name}.s3.amazonaws.com/")[1].split('?')[0]
-            else:
-                raise ValueError("Invalid S3 URL format")
-            
-            # Run presigned URL generation in thread pool
-            loop = asyncio.get_event_loop()
-            presigned_url = await loop.run_in_executor(
-                None,
-                self._generate_presigned_url_sync,
-                s3_key,
-                expiration
-            )
-            
+            self._extract_s3_key(s3_url)
+            presigned_url = self.get_s3_presigned_urls([s3_url], expiration)[s3_url]
+            if presigned_url is None:
+                raise RuntimeError("URL could not be signed")
             return presigned_url
             
         except Exception as e:
@@ -0,0 +1,75 @@
+"""
+Entity tags for conditional GETs.
+"""
+import hashlib
+import time
+from datetime import datetime
+from typing import Optional
+
+from ..core.config import settings
+
+
+def presign_window_length(expiration: Optional[int] = None) -> int:
+    """Seconds per presign window for URLs requested for `expiration` seconds"""
+    if expiration is None:
+        expiration = settings.PRESIGNED_URL_EXPIRATION_SECONDS
+    return expiration - settings.PRESIGN_CACHE_SAFETY_MARGIN_SECONDS
+
+
+def presign_window(now: Optional[float] = None, expiration: Optional[int] = None) -> int:
+    """
+    Index of the current presigned URL window.
+
+    URLs are signed per window (see S3Manager.get_s3_presigned_urls) to stay
+    valid until PRESIGN_CACHE_SAFETY_MARGIN_SECONDS past its end. Responses
+    that embed presigned URLs fold the index into their ETag, so the tag
+    changes before any URL in a cached copy can expire.
+    """
+    if now is None:
+        now = time.time()
+    return int(now // max(presign_window_length(expiration), 1))
+
+
+def prediction_etag(prediction_id: int, updated_at: datetime) -> str:
+    """
+    Strong ETag for one prediction.
+
+    Arguements:
+        prediction_id = primary key of the prediction
+        updated_at = its last modification time
+    """
+    return f'"p{prediction_id}-{updated_at.timestamp():.6f}-{presign_window()}"'
+
+
+def listing_etag(user_id: int, last_updated: Optional[datetime], count: int, variant: str = "") -> str:
+    """
+    Weak ETag for a page of a user's predictions.
+
+    Any insert, update or delete in the user's scope changes either the
+    latest updated_at or the count, which changes the tag.
+
+    Arguements:
+        user_id = owner of the listing
+        last_updated = max(updated_at) over the user's predictions
+        count = number of predictions the user has
+        variant = anything else the page depends on (e.g. the presign window)
+    """
+    stamp = last_updated.timestamp() if last_updated else 0
+    digest = hashlib.sha1(f"{user_id}:{stamp:.6f}:{count}:{variant}".encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
@@ -1 +1,27 @@
-# custom exceptions
\ No newline at end of file
+# custom exceptions
+
+class OverloadedError(Exception):
+    """Raised when a bounded resource is saturated and the caller should back off"""
+    
+    status_code = 429
+    
+    def __init__(self, message: str, retry_after: float = 1):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+
+class InferenceUnavailableError(OverloadedError):
+    """Raised when inference can't start within the request's deadline"""
+    
+    status_code = 503
+
+class RequestInProgressError(OverloadedError):
+    """Raised when a retry gives up waiting for the original request to finish"""
+    
+    status_code = 409
+
+class IdempotencyKeyMismatchError(ValueError):
+    """Raised when an Idempotency-Key is reused for a different request"""
+
+class CursorExpiredError(ValueError):
+    """Raised when a change-feed cursor is older than the data kept to serve it"""
@@ -134,6 +134,37 @@ def predict_image(model, image_tensor: torch.Tensor, class_name: List[str]) -> D
     except Exception as e:
         raise RuntimeError(f"Error during prediction: {str(e)}")
     
+def predict_batch(model, image_tensors: List[torch.Tensor], class_name: List[str]) -> List[Dict]:
+    """
+    Running inference on several images in one forward pass.
+    
+    Takes the (1, C, H, W) tensors from process_image_for_prediction and
+    returns one result per image, shaped like predict_image's.
+    """
+    try:
+        device = next(model.parameters()).device
+        batch = torch.cat(image_tensors).to(device)
+        
+        with torch.no_grad():
+            probabilities = F.softmax(model(batch), dim=1).cpu()
+        
+        results = []
+        for probs in probabilities:
+            predicted_class_idx = int(probs.argmax())
+            results.append({
+                "class": class_name[predicted_class_idx],
+                "confidence": float(probs[predicted_class_idx]),
+                "class_probabilities": {
+                    class_name[i]: float(probs[i])
+                    for i in range(len(class_name))
+                },
+                "predicted_index": predicted_class_idx
+            })
+        return results
+        
+    except Exception as e:
+        raise RuntimeError(f"Error during batch prediction: {str(e)}")
+    
 def get_model_info(model) -> Dict:
     """
     Getting info about the loaded model.
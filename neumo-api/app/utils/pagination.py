@@ -0,0 +1,41 @@
+"""
+Opaque keyset pagination cursors.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Encode the sort key of the last row on a page into an opaque cursor.
+
+    Arguements:
+        created_at = timestamp of the last row returned
+        row_id = primary key of the last row returned (tie breaker)
+    """
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Cursors always carry a UTC offset; a naive timestamp could not be
+    compared with the timezone-aware columns, so it is rejected too.
+
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(created_at)
+        row_id = int(row_id)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+    if created_at.utcoffset() is None:
+        raise ValueError("Invalid pagination cursor")
+    return created_at, row_id
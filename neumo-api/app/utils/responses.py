@@ -0,0 +1,34 @@
+# fast JSON responses for read endpoints.
+from typing import Type
+
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def trusted_response(
+    response_model: Type[BaseModel],
+    exclude_unset: bool = False,
+    status_code: int = 200,
+    headers: dict = None,
+    **fields
+) -> ORJSONResponse:
+    """
+    Serialize a response built from values the service already produced.
+    
+    The model is built with model_construct (defaults filled in, nothing
+    re-validated) and its values go straight to orjson, so rows and dicts are
+    never copied through pydantic. Only use this with data read from our own
+    database; the route keeps `response_model` for the OpenAPI schema.
+    
+    Args:
+        response_model: response schema the route declares
+        exclude_unset: leave out fields not passed in, like response_model_exclude_unset
+        **fields: response fields; nested values must be JSON/orjson serializable
+    
+    Returns:
+        ORJSONResponse: the rendered response
+    """
+    model = response_model.model_construct(**fields)
+    names = model.model_fields_set if exclude_unset else model.model_fields
+    content = {name: getattr(model, name) for name in names}
+    return ORJSONResponse(content=content, status_code=status_code, headers=headers)
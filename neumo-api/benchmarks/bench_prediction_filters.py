@@ -0,0 +1,76 @@
+"""
+History filter latency and index usage at realistic table sizes.
+
+For every filter GET /prediction/ supports, times the first page for the
+benchmarked user and checks from the query plan that it is answered through
+an index rather than a sequential scan of predictions.
+
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_prediction_filters
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.schemas.prediction import PredictionFilter
+from app.services.prediction_service import PredictionService
+from benchmarks.common import (
+    BENCH_USER_ID, BENCH_USER_ROWS, bench_engine, bench_sessionmaker, grow_predictions,
+    plan_nodes, print_row, reset_schema, table_sizes, time_async,
+)
+
+PAGE_SIZE = 100
+NOW = datetime.now(timezone.utc)
+
+FILTERS = {
+    "last 30 days": PredictionFilter(created_from=NOW - timedelta(days=30)),
+    "confidence 0.5-0.6": PredictionFilter(min_confidence=0.5, max_confidence=0.6),
+    "flagged": PredictionFilter(is_flagged=True),
+    "reviewed": PredictionFilter(reviewed_by_doctor=True),
+    "age 60-80": PredictionFilter(min_age=60, max_age=80),
+    "female": PredictionFilter(patient_gender="Female"),
+    "female age 60-80": PredictionFilter(patient_gender="Female", min_age=60, max_age=80),
+    "flagged pneumonia 90d": PredictionFilter(
+        is_flagged=True, prediction_class="PNEUMONIA", created_from=NOW - timedelta(days=90)
+    ),
+}
+
+
+async def main():
+    engine = bench_engine()
+    Session = bench_sessionmaker(engine)
+    await reset_schema(engine)
+    rows = BENCH_USER_ROWS
+    failures = []
+
+    print_row("rows", "filter", "p50 ms", "p95 ms", "index", widths=(12, 24, 10, 10, 50))
+    for size in table_sizes("1000000,5000000"):
+        rows = await grow_predictions(engine, rows, size)
+
+        async with Session() as session:
+            service = PredictionService(session)
+            for name, filters in FILTERS.items():
+
+                async def first_page():
+                    await service.get_user_predictions(
+                        user_id=BENCH_USER_ID, limit=PAGE_SIZE, filters=filters
+                    )
+
+                stats = await time_async(first_page, repeat=30)
+                nodes = await plan_nodes(
+                    session,
+                    service.build_history_query(BENCH_USER_ID, limit=PAGE_SIZE, filters=filters),
+                )
+                indexes = ",".join(sorted({index for _, index in nodes if index})) or "-"
+                if any(node_type == "Seq Scan" for node_type, _ in nodes):
+                    failures.append((size, name))
+                print_row(
+                    rows, name, f"{stats['p50']:.2f}", f"{stats['p95']:.2f}", indexes,
+                    widths=(12, 24, 10, 10, 50),
+                )
+
+    await engine.dispose()
+    if failures:
+        raise SystemExit(f"Sequential scans for: {failures}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
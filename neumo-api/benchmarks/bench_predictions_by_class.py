@@ -0,0 +1,82 @@
+"""
+Latency of /prediction/class/{prediction_class} as the predictions table grows.
+
+The benchmarked user keeps the same history size while other tenants' rows
+are added around it; with the user-scoped (user_id, prediction_class,
+created_at DESC, id DESC) index the numbers should stay flat.
+
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_predictions_by_class
+"""
+import asyncio
+
+from app.services.prediction_service import PredictionService
+from benchmarks.common import (
+    BENCH_USER_ID, BENCH_USER_ROWS, bench_engine, bench_sessionmaker, explain,
+    grow_predictions, print_row, reset_schema, table_sizes, time_async,
+)
+
+PREDICTION_CLASS = "PNEUMONIA"
+PAGE_SIZE = 100
+DEEP_PAGE = 20
+
+
+async def main():
+    engine = bench_engine()
+    Session = bench_sessionmaker(engine)
+    await reset_schema(engine)
+    rows = BENCH_USER_ROWS
+
+    print_row("rows", "query", "p50 ms", "p95 ms", "max ms")
+    for size in table_sizes():
+        rows = await grow_predictions(engine, rows, size)
+
+        async with Session() as session:
+            service = PredictionService(session)
+
+            async def first_page():
+                await service.get_predictions_by_class(
+                    user_id=BENCH_USER_ID, prediction_class=PREDICTION_CLASS, limit=PAGE_SIZE
+                )
+
+            # walk the cursor once to find a deep page, then time that page alone
+            cursor = None
+            for _ in range(DEEP_PAGE):
+                page = await service.get_predictions_by_class(
+                    user_id=BENCH_USER_ID, prediction_class=PREDICTION_CLASS,
+                    limit=PAGE_SIZE, cursor=cursor
+                )
+                if not page.next_cursor:
+                    break
+                cursor = page.next_cursor
+
+            async def deep_page():
+                await service.get_predictions_by_class(
+                    user_id=BENCH_USER_ID, prediction_class=PREDICTION_CLASS,
+                    limit=PAGE_SIZE, cursor=cursor
+                )
+
+            async def exact_total():
+                await service.count_user_predictions(
+                    BENCH_USER_ID, prediction_class=PREDICTION_CLASS
+                )
+
+            for name, fn in (
+                ("first page", first_page),
+                (f"cursor page {DEEP_PAGE}", deep_page),
+                ("exact total", exact_total),
+            ):
+                stats = await time_async(fn)
+                print_row(rows, name, f"{stats['p50']:.2f}", f"{stats['p95']:.2f}", f"{stats['max']:.2f}")
+
+            plan = await explain(
+                session,
+                service.build_history_query(
+                    BENCH_USER_ID, limit=PAGE_SIZE, cursor=cursor, prediction_class=PREDICTION_CLASS
+                ),
+            )
+    print("\nPlan at the largest size:\n" + plan)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+Per-page response serialization cost of the prediction listing, before and after
+the orjson fast path.
+
+"before" is what FastAPI did with the returned PredictionListResponse: build
+and validate the model, validate it again against response_model, dump it
+to JSON-able values and json.dumps the result. "after" is trusted_response(),
+which model_constructs the envelope and hands the rows to orjson. The rows
+are what PredictionService returns for a page, so no database is needed:
+
+    python -m benchmarks.bench_serialization
+"""
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.responses import JSONResponse
+
+from app.schemas.prediction import PredictionListResponse
+from app.services.prediction_service import SUMMARY_FIELDS
+from app.utils.responses import trusted_response
+from benchmarks.common import print_row
+
+PAGE_SIZES = (25, 100, 500)
+REPEAT = 200
+WIDTHS = (10, 10, 14, 14, 10)
+
+
+def make_page(size: int) -> dict:
+    now = datetime.now(timezone.utc)
+    items = []
+    for i in range(size):
+        item = {field: None for field in SUMMARY_FIELDS}
+        item.update(
+            id=i,
+            prediction_class="PNEUMONIA" if i % 2 else "NORMAL",
+            confidence_score=0.91,
+            created_at=now - timedelta(minutes=i),
+            status="completed",
+            is_flagged=False,
+            reviewed_by_doctor=False,
+            image_url=f"https://bucket.s3.amazonaws.com/predictions/1/{i}.jpg?X-Amz-Signature=abc",
+        )
+        items.append(item)
+    return {
+        "success": True,
+        "message": "Predictions retrieved successfully",
+        "data": items,
+        "total": size,
+        "page": 1,
+        "per_page": size,
+        "next_cursor": "MjAyNi0xMC0xOVQxMDowMDowMHwxMjM0",
+        "total_is_estimate": False,
+    }
+
+
+def before(page: dict) -> bytes:
+    model = PredictionListResponse(**page)
+    validated = PredictionListResponse.model_validate(model.model_dump(exclude_unset=True))
+    return JSONResponse(validated.model_dump(mode="json", exclude_unset=True)).body
+
+
+def after(page: dict) -> bytes:
+    return trusted_response(PredictionListResponse, exclude_unset=True, **page).body
+
+
+def time_per_page(fn, page: dict) -> float:
+    for _ in range(10):
+        fn(page)
+    samples = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn(page)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    print(f"median milliseconds per page over {REPEAT} runs")
+    print_row("page", "variant", "ms/page", "us/row", "speedup", widths=WIDTHS)
+    for size in PAGE_SIZES:
+        page = make_page(size)
+        baseline = time_per_page(before, page)
+        fast = time_per_page(after, page)
+        print_row(size, "before", f"{baseline:.3f}", f"{baseline * 1000 / size:.1f}", "", widths=WIDTHS)
+        print_row(size, "after", f"{fast:.3f}", f"{fast * 1000 / size:.1f}", f"{baseline / fast:.1f}x", widths=WIDTHS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Per-request JWT verification overhead with and without the verified-token cache.
+
+"before" decodes and checks the signature on every call, as every request did
+before the cache; "after" is verify_token() as get_current_user calls it, with
+the same token reused across requests. No database is needed:
+
+    python -m benchmarks.bench_token_verify
+"""
+import statistics
+import time
+
+from jose import jwt
+
+from app.core.config import settings
+from app.core.security import create_access_token, verify_token
+from benchmarks.common import print_row
+
+REQUESTS = 20000
+WIDTHS = (12, 12, 12, 12)
+
+
+def uncached_verify(token: str):
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    return payload if payload.get("type") == "access" else None
+
+
+def time_per_call(fn, token: str) -> dict:
+    samples = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        assert fn(token) is not None
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p95": samples[int(len(samples) * 0.95) - 1],
+        "mean": statistics.fmean(samples),
+    }
+
+
+def main():
+    token = create_access_token(data={"sub": "1"})
+
+    print(f"{REQUESTS} verifications of one access token, microseconds per call")
+    print_row("variant", "p50", "p95", "mean", widths=WIDTHS)
+    for name, fn in (("before", uncached_verify), ("after", verify_token)):
+        timings = time_per_call(fn, token)
+        print_row(
+            name, f"{timings['p50']:.1f}", f"{timings['p95']:.1f}", f"{timings['mean']:.1f}",
+            widths=WIDTHS,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Shared helpers for the database benchmarks.
+
+The benchmarks run against a throwaway Postgres database given by
+BENCH_DATABASE_URL (never point it at a real database) and build their own
+copy of the tables in a separate `bench` schema, so they can be run from the
+neumo-api directory with the usual .env in place:
+
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_predictions_by_class
+"""
+import json
+import os
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+import app.models  # noqa: F401  registers every table on Base.metadata
+
+BENCH_SCHEMA = "bench"
+# the user whose queries are timed; their own history size stays fixed while
+# the rest of the table grows around it.
+BENCH_USER_ID = 1
+BENCH_USER_ROWS = 5000
+BENCH_OTHER_USERS = 999
+
+
+def bench_engine():
+    url = os.environ["BENCH_DATABASE_URL"].replace("postgresql://", "postgresql+asyncpg://")
+    return create_async_engine(
+        url,
+        execution_options={"schema_translate_map": {None: BENCH_SCHEMA}},
+    )
+
+
+def bench_sessionmaker(engine):
+    return sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def table_sizes(default: str = "100000,1000000,5000000"):
+    """Table sizes to measure, overridable with BENCH_TABLE_SIZES=10000,100000"""
+    return [int(size) for size in os.getenv("BENCH_TABLE_SIZES", default).split(",")]
+
+
+_PREDICTION_ROWS = """
+    INSERT INTO {schema}.predictions (
+        user_id, image_filename, prediction_class, confidence_score, inference_time_ms,
+        created_at, updated_at, reviewed_by_doctor, is_flagged, status,
+        patient_age, patient_gender
+    )
+    SELECT
+        {user_expr},
+        'https://bench.s3.amazonaws.com/predictions/' || g || '.jpg',
+        CASE WHEN random() < 0.4 THEN 'PNEUMONIA' ELSE 'NORMAL' END,
+        0.5 + random() / 2,
+        20 + random() * 200,
+        ts,
+        ts,
+        random() < 0.2,
+        random() < 0.05,
+        CASE WHEN random() < 0.02 THEN 'failed' ELSE 'completed' END,
+        (random() * 90)::int,
+        (ARRAY['Male', 'Female', 'Other'])[1 + floor(random() * 3)::int]
+    FROM (
+        SELECT g, now() - random() * interval '365 days' AS ts
+        FROM generate_series(:start, :stop - 1) AS g
+    ) AS rows
+"""
+
+
+async def reset_schema(engine) -> None:
+    """Recreate the bench schema with the benchmarked user's history in place"""
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {BENCH_SCHEMA}"))
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            text(f"""
+                INSERT INTO {BENCH_SCHEMA}.users
+                    (id, email, username, full_name, hashed_password, is_active, is_superuser)
+                SELECT g, 'user' || g || '@bench.local', 'user' || g, 'Bench User', 'x', true, false
+                FROM generate_series(1, :users) AS g
+            """),
+            {"users": BENCH_OTHER_USERS + 1},
+        )
+        await conn.execute(
+            text(_PREDICTION_ROWS.format(schema=BENCH_SCHEMA, user_expr=str(BENCH_USER_ID))),
+            {"start": 0, "stop": BENCH_USER_ROWS},
+        )
+
+
+async def grow_predictions(engine, current: int, target: int, chunk: int = 1_000_000) -> int:
+    """Add rows for the other users until the table holds `target` rows"""
+    user_expr = f"2 + (g % {BENCH_OTHER_USERS})"
+    while current < target:
+        stop = min(current + chunk, target)
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(_PREDICTION_ROWS.format(schema=BENCH_SCHEMA, user_expr=user_expr)),
+                {"start": current, "stop": stop},
+            )
+        current = stop
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f"VACUUM ANALYZE {BENCH_SCHEMA}.predictions"))
+    return current
+
+
+async def time_async(fn: Callable[[], Awaitable], repeat: int = 50, warmup: int = 5) -> Dict[str, float]:
+    """Run `fn` repeatedly and return latency percentiles in milliseconds"""
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p95": samples[int(len(samples) * 0.95) - 1],
+        "max": samples[-1],
+    }
+
+
+async def _compile_in_bench_schema(session: AsyncSession, query) -> str:
+    """
+    Render `query` with its parameters inlined, for EXPLAIN.
+
+    schema_translate_map only applies to compiled ORM/Core statements, not
+    to text(), so the rendered SQL names unqualified tables. Point the
+    session's search_path at the bench schema for the rest of its
+    transaction so they resolve to the seeded bench tables.
+    """
+    await session.execute(text(f"SET LOCAL search_path TO {BENCH_SCHEMA}"))
+    return str(query.compile(
+        dialect=session.get_bind().dialect,
+        compile_kwargs={"literal_binds": True},
+    ))
+
+
+async def explain(session: AsyncSession, query) -> str:
+    """EXPLAIN ANALYZE a SQLAlchemy query (against the bench schema) and return the plan text"""
+    compiled = await _compile_in_bench_schema(session, query)
+    result = await session.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {compiled}"))
+    return "\n".join(row[0] for row in result)
+
+
+async def plan_nodes(session: AsyncSession, query) -> List[Tuple[str, str]]:
+    """Return (node type, index name) for every scan node in the query plan (against the bench schema)"""
+    compiled = await _compile_in_bench_schema(session, query)
+    result = await session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    nodes = []
+    stack = [plan[0]["Plan"]]
+    while stack:
+        node = stack.pop()
+        if "Scan" in node["Node Type"]:
+            nodes.append((node["Node Type"], node.get("Index Name", "")))
+        stack.extend(node.get("Plans", []))
+    return nodes
+
+
+def print_row(*columns, widths=(12, 28, 10, 10, 10)):
+    print("".join(str(column).ljust(width) for column, width in zip(columns, widths)))
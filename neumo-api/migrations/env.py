@@ -18,6 +18,14 @@ sys.path.insert(0, str(project_root))
 from app.core.database import Base
 from app.models.user import User
 from app.models.prediction import Prediction
+from app.models.prediction_stats import PredictionDailyStats
+from app.models.prediction_analytics import PredictionHourlyAggregate
+from app.models.history import PredictionEvent
+from app.models.refresh_token import RefreshToken
+from app.models.revoked_access_token import RevokedAccessToken
+from app.models.prediction_tombstone import PredictionTombstone
+from app.models.prediction_job import PredictionJob
+from app.models.idempotency_key import IdempotencyKey
 
 # This is what Alembic needs
 target_metadata = Base.metadata
@@ -0,0 +1,35 @@
+"""prediction history keyset index
+
+Revision ID: 04818e052578
+Revises: 5c00eace385f
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '04818e052578'
+down_revision: Union[str, None] = '5c00eace385f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # (user_id, created_at DESC, id DESC) serves both the history ordering and
+    # the keyset predicate; its user_id prefix makes the single column index redundant.
+    op.create_index(
+        'ix_predictions_user_id_created_at_id',
+        'predictions',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False
+    )
+    op.drop_index('ix_predictions_user_id', table_name='predictions')
+
+
+def downgrade() -> None:
+    op.create_index('ix_predictions_user_id', 'predictions', ['user_id'], unique=False)
+    op.drop_index('ix_predictions_user_id_created_at_id', table_name='predictions')
@@ -0,0 +1,35 @@
+"""revoked access tokens
+
+Revision ID: 0b7e3c9a5f14
+Revises: d4b82f6a1e07
+Create Date: 2026-10-20 09:12:44.306217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7e3c9a5f14'
+down_revision: Union[str, None] = 'd4b82f6a1e07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('revoked_access_tokens',
+    sa.Column('token_hash', sa.String(length=64), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('token_hash')
+    )
+    op.create_index('ix_revoked_access_tokens_created_at', 'revoked_access_tokens', ['created_at'], unique=False)
+    op.create_index('ix_revoked_access_tokens_expires_at', 'revoked_access_tokens', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_revoked_access_tokens_expires_at', table_name='revoked_access_tokens')
+    op.drop_index('ix_revoked_access_tokens_created_at', table_name='revoked_access_tokens')
+    op.drop_table('revoked_access_tokens')
@@ -0,0 +1,33 @@
+"""prediction updated_at index
+
+Revision ID: 3d9f6a2c81b7
+Revises: e4a19c7b52d0
+Create Date: 2026-10-19 18:02:41.553907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d9f6a2c81b7'
+down_revision: Union[str, None] = 'e4a19c7b52d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # answers max(updated_at)/count(*) per user (list ETags) with an
+    # index-only scan.
+    op.create_index(
+        'ix_predictions_user_id_updated_at',
+        'predictions',
+        ['user_id', 'updated_at'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_predictions_user_id_updated_at', table_name='predictions')
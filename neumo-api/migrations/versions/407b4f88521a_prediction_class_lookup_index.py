@@ -0,0 +1,31 @@
+"""prediction class lookup index
+
+Revision ID: 407b4f88521a
+Revises: 04818e052578
+Create Date: 2026-10-19 10:03:27.904512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '407b4f88521a'
+down_revision: Union[str, None] = '04818e052578'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_predictions_user_id_class_created_at_id',
+        'predictions',
+        ['user_id', 'prediction_class', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_predictions_user_id_class_created_at_id', table_name='predictions')
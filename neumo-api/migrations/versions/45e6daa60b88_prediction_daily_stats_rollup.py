@@ -0,0 +1,117 @@
+"""prediction daily stats rollup
+
+Revision ID: 45e6daa60b88
+Revises: 972c457599a3
+Create Date: 2026-10-19 12:41:08.552931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '45e6daa60b88'
+down_revision: Union[str, None] = '972c457599a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Adds one prediction's contribution (sign -1 to remove it) to its rollup row.
+ADD_FUNCTION = """
+CREATE OR REPLACE FUNCTION prediction_daily_stats_add(p predictions, sign integer) RETURNS void AS $$
+    INSERT INTO prediction_daily_stats AS s (
+        user_id, day, prediction_class, prediction_count, confidence_sum,
+        flagged_count, reviewed_count, failed_count
+    ) VALUES (
+        p.user_id,
+        (coalesce(p.created_at, now()) AT TIME ZONE 'UTC')::date,
+        p.prediction_class,
+        sign,
+        sign * p.confidence_score,
+        sign * coalesce(p.is_flagged, false)::int,
+        sign * coalesce(p.reviewed_by_doctor, false)::int,
+        sign * coalesce(p.status = 'failed', false)::int
+    )
+    ON CONFLICT (user_id, day, prediction_class) DO UPDATE SET
+        prediction_count = s.prediction_count + EXCLUDED.prediction_count,
+        confidence_sum = s.confidence_sum + EXCLUDED.confidence_sum,
+        flagged_count = s.flagged_count + EXCLUDED.flagged_count,
+        reviewed_count = s.reviewed_count + EXCLUDED.reviewed_count,
+        failed_count = s.failed_count + EXCLUDED.failed_count;
+$$ LANGUAGE sql;
+"""
+
+# Inserts, deletes and updates (including class or day changes) reduce to
+# removing the old row's contribution and adding the new one. Updates that
+# touch none of the counted columns (doctor notes, ...) are skipped.
+APPLY_FUNCTION = """
+CREATE OR REPLACE FUNCTION prediction_daily_stats_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND
+       (OLD.user_id, OLD.created_at, OLD.prediction_class, OLD.confidence_score,
+        OLD.is_flagged, OLD.reviewed_by_doctor, OLD.status)
+       IS NOT DISTINCT FROM
+       (NEW.user_id, NEW.created_at, NEW.prediction_class, NEW.confidence_score,
+        NEW.is_flagged, NEW.reviewed_by_doctor, NEW.status) THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM prediction_daily_stats_add(OLD, -1);
+    END IF;
+    IF TG_OP IN ('UPDATE', 'INSERT') THEN
+        PERFORM prediction_daily_stats_add(NEW, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+BACKFILL = """
+INSERT INTO prediction_daily_stats (
+    user_id, day, prediction_class, prediction_count, confidence_sum,
+    flagged_count, reviewed_count, failed_count
+)
+SELECT
+    user_id,
+    (created_at AT TIME ZONE 'UTC')::date,
+    prediction_class,
+    count(*),
+    coalesce(sum(confidence_score), 0),
+    count(*) FILTER (WHERE is_flagged),
+    count(*) FILTER (WHERE reviewed_by_doctor),
+    count(*) FILTER (WHERE status = 'failed')
+FROM predictions
+GROUP BY 1, 2, 3
+"""
+
+
+def upgrade() -> None:
+    op.create_table('prediction_daily_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('prediction_class', sa.String(), nullable=False),
+    sa.Column('prediction_count', sa.Integer(), nullable=False),
+    sa.Column('confidence_sum', sa.Float(), nullable=False),
+    sa.Column('flagged_count', sa.Integer(), nullable=False),
+    sa.Column('reviewed_count', sa.Integer(), nullable=False),
+    sa.Column('failed_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'day', 'prediction_class')
+    )
+    op.execute(ADD_FUNCTION)
+    op.execute(APPLY_FUNCTION)
+    op.execute("""
+        CREATE TRIGGER predictions_daily_stats
+        AFTER INSERT OR UPDATE OR DELETE ON predictions
+        FOR EACH ROW EXECUTE FUNCTION prediction_daily_stats_apply()
+    """)
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS predictions_daily_stats ON predictions")
+    op.execute("DROP FUNCTION IF EXISTS prediction_daily_stats_apply()")
+    op.execute("DROP FUNCTION IF EXISTS prediction_daily_stats_add(predictions, integer)")
+    op.drop_table('prediction_daily_stats')
@@ -0,0 +1,45 @@
+"""prediction hourly aggregates
+
+Revision ID: 5c32580abdef
+Revises: 45e6daa60b88
+Create Date: 2026-10-19 14:05:19.027713
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c32580abdef'
+down_revision: Union[str, None] = '45e6daa60b88'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('predictions', sa.Column('model_version', sa.String(), nullable=True))
+    # the scheduled refresh only reads the last few hours across all users
+    op.create_index(op.f('ix_predictions_created_at'), 'predictions', ['created_at'], unique=False)
+    
+    op.create_table('prediction_hourly_aggregates',
+    sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('model_version', sa.String(), nullable=False),
+    sa.Column('prediction_class', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('prediction_count', sa.Integer(), nullable=False),
+    sa.Column('confidence_sum', sa.Float(), nullable=False),
+    sa.Column('latency_count', sa.Integer(), nullable=False),
+    sa.Column('latency_sum_ms', sa.Float(), nullable=False),
+    sa.Column('latency_histogram', postgresql.ARRAY(sa.Integer()), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('bucket_start', 'model_version', 'prediction_class', 'status')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('prediction_hourly_aggregates')
+    op.drop_index(op.f('ix_predictions_created_at'), table_name='predictions')
+    op.drop_column('predictions', 'model_version')
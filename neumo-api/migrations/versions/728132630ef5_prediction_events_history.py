@@ -0,0 +1,66 @@
+"""prediction events history
+
+Revision ID: 728132630ef5
+Revises: 5c32580abdef
+Create Date: 2026-10-19 15:32:44.610395
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '728132630ef5'
+down_revision: Union[str, None] = '5c32580abdef'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    op.create_table('prediction_events',
+    sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('prediction_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('event_type', sa.String(), nullable=False),
+    sa.Column('details', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)'
+    )
+    op.create_index(
+        'ix_prediction_events_user_id_created_at_id',
+        'prediction_events',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False
+    )
+    op.create_index(
+        'ix_prediction_events_prediction_id_created_at',
+        'prediction_events',
+        ['prediction_id', sa.text('created_at DESC')],
+        unique=False
+    )
+    
+    # this month and the next three; the app keeps creating them ahead of time.
+    # The default partition only catches rows if that maintenance falls behind.
+    first = date.today().replace(day=1)
+    for offset in range(4):
+        start, end = _add_months(first, offset), _add_months(first, offset + 1)
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS prediction_events_y{start.year}m{start.month:02d} "
+            f"PARTITION OF prediction_events FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+    op.execute("CREATE TABLE IF NOT EXISTS prediction_events_default PARTITION OF prediction_events DEFAULT")
+
+
+def downgrade() -> None:
+    # dropping the partitioned table drops every partition with it
+    op.drop_table('prediction_events')
@@ -0,0 +1,59 @@
+"""prediction tombstones
+
+Revision ID: 8c1e4b7d2f60
+Revises: 3d9f6a2c81b7
+Create Date: 2026-10-19 18:40:17.902615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1e4b7d2f60'
+down_revision: Union[str, None] = '3d9f6a2c81b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# every delete path (API, cascades, manual cleanup) leaves a tombstone.
+RECORD_FUNCTION = """
+CREATE OR REPLACE FUNCTION prediction_tombstone_record() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO prediction_tombstones (prediction_id, user_id, deleted_at)
+    VALUES (OLD.id, OLD.user_id, now())
+    ON CONFLICT (prediction_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    op.create_table('prediction_tombstones',
+    sa.Column('prediction_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('prediction_id')
+    )
+    op.create_index(
+        'ix_prediction_tombstones_user_id_deleted_at',
+        'prediction_tombstones',
+        ['user_id', 'deleted_at', 'prediction_id'],
+        unique=False
+    )
+    op.execute(RECORD_FUNCTION)
+    op.execute("""
+        CREATE TRIGGER predictions_tombstone
+        AFTER DELETE ON predictions
+        FOR EACH ROW EXECUTE FUNCTION prediction_tombstone_record()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS predictions_tombstone ON predictions")
+    op.execute("DROP FUNCTION IF EXISTS prediction_tombstone_record()")
+    op.drop_index('ix_prediction_tombstones_user_id_deleted_at', table_name='prediction_tombstones')
+    op.drop_table('prediction_tombstones')
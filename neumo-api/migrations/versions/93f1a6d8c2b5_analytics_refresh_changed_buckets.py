@@ -0,0 +1,60 @@
+"""analytics refresh changed buckets
+
+Revision ID: 93f1a6d8c2b5
+Revises: 0b7e3c9a5f14
+Create Date: 2026-10-20 10:27:36.840159
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '93f1a6d8c2b5'
+down_revision: Union[str, None] = '0b7e3c9a5f14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# also keeps the deleted prediction's created_at, so the analytics refresh
+# knows which hour bucket lost a row.
+RECORD_FUNCTION = """
+CREATE OR REPLACE FUNCTION prediction_tombstone_record() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO prediction_tombstones (prediction_id, user_id, deleted_at, prediction_created_at)
+    VALUES (OLD.id, OLD.user_id, now(), OLD.created_at)
+    ON CONFLICT (prediction_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+PREVIOUS_RECORD_FUNCTION = """
+CREATE OR REPLACE FUNCTION prediction_tombstone_record() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO prediction_tombstones (prediction_id, user_id, deleted_at)
+    VALUES (OLD.id, OLD.user_id, now())
+    ON CONFLICT (prediction_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    op.create_index('ix_predictions_updated_at', 'predictions', ['updated_at'], unique=False)
+    op.add_column('prediction_tombstones', sa.Column('prediction_created_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_prediction_tombstones_deleted_at', 'prediction_tombstones', ['deleted_at'], unique=False)
+    op.execute(RECORD_FUNCTION)
+    # the aggregates only ever covered the hours refreshed since deployment;
+    # with no watermark left, the next scheduled refresh aggregates all history
+    op.execute("DELETE FROM prediction_hourly_aggregates")
+
+
+def downgrade() -> None:
+    op.execute(PREVIOUS_RECORD_FUNCTION)
+    op.drop_index('ix_prediction_tombstones_deleted_at', table_name='prediction_tombstones')
+    op.drop_column('prediction_tombstones', 'prediction_created_at')
+    op.drop_index('ix_predictions_updated_at', table_name='predictions')
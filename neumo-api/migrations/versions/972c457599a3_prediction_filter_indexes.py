@@ -0,0 +1,55 @@
+"""prediction filter indexes
+
+Revision ID: 972c457599a3
+Revises: 407b4f88521a
+Create Date: 2026-10-19 11:26:53.170448
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '972c457599a3'
+down_revision: Union[str, None] = '407b4f88521a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # flagged and reviewed rows are a small slice of each history, partial
+    # indexes keep them cheap to maintain. Queries must compare with literal
+    # true for the planner to match the predicate.
+    op.create_index(
+        'ix_predictions_user_id_flagged_created_at',
+        'predictions',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+        postgresql_where=sa.text('is_flagged = true')
+    )
+    op.create_index(
+        'ix_predictions_user_id_reviewed_created_at',
+        'predictions',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+        postgresql_where=sa.text('reviewed_by_doctor = true')
+    )
+    # range filters: confidence band, age range, gender (+ age range)
+    op.create_index('ix_predictions_user_id_confidence', 'predictions', ['user_id', 'confidence_score'], unique=False)
+    op.create_index('ix_predictions_user_id_age', 'predictions', ['user_id', 'patient_age'], unique=False)
+    op.create_index(
+        'ix_predictions_user_id_gender_age',
+        'predictions',
+        ['user_id', 'patient_gender', 'patient_age'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_predictions_user_id_gender_age', table_name='predictions')
+    op.drop_index('ix_predictions_user_id_age', table_name='predictions')
+    op.drop_index('ix_predictions_user_id_confidence', table_name='predictions')
+    op.drop_index('ix_predictions_user_id_reviewed_created_at', table_name='predictions')
+    op.drop_index('ix_predictions_user_id_flagged_created_at', table_name='predictions')
@@ -0,0 +1,40 @@
+"""prediction jobs
+
+Revision ID: a5c93e1f7b28
+Revises: f27b0d9c4e13
+Create Date: 2026-10-19 20:03:41.118274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5c93e1f7b28'
+down_revision: Union[str, None] = 'f27b0d9c4e13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('prediction_jobs',
+    sa.Column('prediction_id', sa.Integer(), nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('available_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['prediction_id'], ['predictions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('prediction_id')
+    )
+    op.create_index(
+        'ix_prediction_jobs_available_at',
+        'prediction_jobs',
+        ['available_at', 'prediction_id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_prediction_jobs_available_at', table_name='prediction_jobs')
+    op.drop_table('prediction_jobs')
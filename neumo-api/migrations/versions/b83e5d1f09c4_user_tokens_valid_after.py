@@ -0,0 +1,26 @@
+"""user tokens valid after
+
+Revision ID: b83e5d1f09c4
+Revises: 728132630ef5
+Create Date: 2026-10-19 16:48:12.307214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b83e5d1f09c4'
+down_revision: Union[str, None] = '728132630ef5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('tokens_valid_after', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'tokens_valid_after')
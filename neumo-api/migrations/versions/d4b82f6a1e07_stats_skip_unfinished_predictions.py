@@ -0,0 +1,110 @@
+"""stats skip unfinished predictions
+
+Revision ID: d4b82f6a1e07
+Revises: 6e0b4d2a9c35
+Create Date: 2026-10-19 21:34:52.118406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4b82f6a1e07'
+down_revision: Union[str, None] = '6e0b4d2a9c35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Queued and processing predictions hold a "PENDING" class and a 0.0
+# placeholder confidence; they are counted once the worker stores the result
+# (the status update then adds them like an insert would).
+ADD_FUNCTION = """
+CREATE OR REPLACE FUNCTION prediction_daily_stats_add(p predictions, sign integer) RETURNS void AS $$
+    INSERT INTO prediction_daily_stats AS s (
+        user_id, day, prediction_class, prediction_count, confidence_sum,
+        flagged_count, reviewed_count, failed_count
+    )
+    SELECT
+        p.user_id,
+        (coalesce(p.created_at, now()) AT TIME ZONE 'UTC')::date,
+        p.prediction_class,
+        sign,
+        sign * p.confidence_score,
+        sign * coalesce(p.is_flagged, false)::int,
+        sign * coalesce(p.reviewed_by_doctor, false)::int,
+        sign * coalesce(p.status = 'failed', false)::int
+    WHERE coalesce(p.status, '') NOT IN ('queued', 'processing')
+    ON CONFLICT (user_id, day, prediction_class) DO UPDATE SET
+        prediction_count = s.prediction_count + EXCLUDED.prediction_count,
+        confidence_sum = s.confidence_sum + EXCLUDED.confidence_sum,
+        flagged_count = s.flagged_count + EXCLUDED.flagged_count,
+        reviewed_count = s.reviewed_count + EXCLUDED.reviewed_count,
+        failed_count = s.failed_count + EXCLUDED.failed_count;
+$$ LANGUAGE sql;
+"""
+
+PREVIOUS_ADD_FUNCTION = """
+CREATE OR REPLACE FUNCTION prediction_daily_stats_add(p predictions, sign integer) RETURNS void AS $$
+    INSERT INTO prediction_daily_stats AS s (
+        user_id, day, prediction_class, prediction_count, confidence_sum,
+        flagged_count, reviewed_count, failed_count
+    ) VALUES (
+        p.user_id,
+        (coalesce(p.created_at, now()) AT TIME ZONE 'UTC')::date,
+        p.prediction_class,
+        sign,
+        sign * p.confidence_score,
+        sign * coalesce(p.is_flagged, false)::int,
+        sign * coalesce(p.reviewed_by_doctor, false)::int,
+        sign * coalesce(p.status = 'failed', false)::int
+    )
+    ON CONFLICT (user_id, day, prediction_class) DO UPDATE SET
+        prediction_count = s.prediction_count + EXCLUDED.prediction_count,
+        confidence_sum = s.confidence_sum + EXCLUDED.confidence_sum,
+        flagged_count = s.flagged_count + EXCLUDED.flagged_count,
+        reviewed_count = s.reviewed_count + EXCLUDED.reviewed_count,
+        failed_count = s.failed_count + EXCLUDED.failed_count;
+$$ LANGUAGE sql;
+"""
+
+BACKFILL = """
+INSERT INTO prediction_daily_stats (
+    user_id, day, prediction_class, prediction_count, confidence_sum,
+    flagged_count, reviewed_count, failed_count
+)
+SELECT
+    user_id,
+    (created_at AT TIME ZONE 'UTC')::date,
+    prediction_class,
+    count(*),
+    coalesce(sum(confidence_score), 0),
+    count(*) FILTER (WHERE is_flagged),
+    count(*) FILTER (WHERE reviewed_by_doctor),
+    count(*) FILTER (WHERE status = 'failed')
+FROM predictions
+{where}
+GROUP BY 1, 2, 3
+"""
+
+
+def rebuild(where: str) -> None:
+    # no write may land between the delete and the re-aggregation
+    op.execute("LOCK TABLE predictions IN SHARE MODE")
+    op.execute("DELETE FROM prediction_daily_stats")
+    op.execute(BACKFILL.format(where=where))
+
+
+def upgrade() -> None:
+    op.execute(ADD_FUNCTION)
+    rebuild("WHERE coalesce(status, '') NOT IN ('queued', 'processing')")
+    # hourly aggregates are grouped by status, so their unfinished rows can
+    # simply go; those predictions are counted once a refresh sees them done
+    op.execute("DELETE FROM prediction_hourly_aggregates WHERE status IN ('queued', 'processing')")
+
+
+def downgrade() -> None:
+    op.execute(PREVIOUS_ADD_FUNCTION)
+    rebuild("")
@@ -0,0 +1,52 @@
+"""prediction change notify
+
+Revision ID: f27b0d9c4e13
+Revises: 8c1e4b7d2f60
+Create Date: 2026-10-19 19:12:55.306148
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f27b0d9c4e13'
+down_revision: Union[str, None] = '8c1e4b7d2f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Wakes every API worker's event streams for the affected user. NOTIFY is
+# delivered on commit and identical payloads within one transaction are
+# folded into one, so a bulk update sends one message per user. The payload
+# only says who changed; streams read the change feed for what.
+NOTIFY_FUNCTION = """
+CREATE OR REPLACE FUNCTION prediction_change_notify() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify(
+        'prediction_changes',
+        json_build_object('user_id', coalesce(NEW.user_id, OLD.user_id))::text
+    );
+    IF TG_OP = 'UPDATE' AND OLD.user_id IS DISTINCT FROM NEW.user_id THEN
+        PERFORM pg_notify('prediction_changes', json_build_object('user_id', OLD.user_id)::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    op.execute(NOTIFY_FUNCTION)
+    op.execute("""
+        CREATE TRIGGER predictions_change_notify
+        AFTER INSERT OR UPDATE OR DELETE ON predictions
+        FOR EACH ROW EXECUTE FUNCTION prediction_change_notify()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS predictions_change_notify ON predictions")
+    op.execute("DROP FUNCTION IF EXISTS prediction_change_notify()")
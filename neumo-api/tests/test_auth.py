@@ -0,0 +1,89 @@
+# authentication tests.
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+from jose import jwt
+
+from app.core import security
+from app.core.security import (
+    TokenDenylist, create_access_token, deny_token, forget_token, is_token_denied, verify_token
+)
+from app.utils.exceptions import OverloadedError
+
+
+def test_verified_token_is_decoded_once():
+    token = create_access_token(data={"sub": "7"})
+
+    with patch.object(security.jwt, "decode", wraps=jwt.decode) as decode:
+        first = verify_token(token, "access")
+        second = verify_token(token, "access")
+
+    assert first["sub"] == second["sub"] == "7"
+    assert decode.call_count == 1
+
+
+def test_cached_token_still_checks_type_and_can_be_forgotten():
+    token = create_access_token(data={"sub": "7"})
+    assert verify_token(token, "access") is not None
+    assert verify_token(token, "refresh") is None
+
+    forget_token(token)
+    with patch.object(security.jwt, "decode", wraps=jwt.decode) as decode:
+        verify_token(token, "access")
+    assert decode.call_count == 1
+
+
+def test_denied_token_stays_denied_until_its_exp():
+    token = create_access_token(data={"sub": "7"})
+    payload = verify_token(token, "access")
+    assert not is_token_denied(token)
+
+    deny_token(token, float(payload["exp"]))
+    assert is_token_denied(token)
+    # the verified-token cache no longer holds it either
+    with patch.object(security.jwt, "decode", wraps=jwt.decode) as decode:
+        verify_token(token, "access")
+    assert decode.call_count == 1
+
+
+def test_token_denylist_drops_entries_past_their_exp():
+    denylist = TokenDenylist()
+    with patch("app.core.security.time.time", return_value=1000.0):
+        denylist.add("live", 1060.0)
+        denylist.add("already-expired", 999.0)
+        assert "live" in denylist and len(denylist) == 1
+
+    with patch("app.core.security.time.time", return_value=1061.0):
+        assert "live" not in denylist
+        denylist.add("other", 2000.0)
+    assert len(denylist) == 1
+
+
+def test_login_throttle_rejects_after_limit_per_source():
+    throttle = security.LoginThrottle(attempts=2, window=60)
+    throttle.check("10.0.0.1")
+    throttle.check("10.0.0.1")
+    throttle.check("10.0.0.2")
+
+    with pytest.raises(OverloadedError) as exc_info:
+        throttle.check("10.0.0.1")
+    assert 1 <= exc_info.value.retry_after <= 60
+
+
+def test_password_hasher_sheds_when_saturated():
+    hasher = security.PasswordHasher(workers=1, max_pending=0, retry_after=2)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(hasher._run("hash", release.wait))
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(OverloadedError):
+                await hasher.hash("secret")
+        finally:
+            release.set()
+            await running
+
+    asyncio.run(scenario())
@@ -0,0 +1,117 @@
+# in-process cache tests.
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+from app.core.config import settings
+from app.utils.aws_utils import s3_manager
+from app.utils.cache import TTLCache
+from app.utils.etag import prediction_etag, presign_window_length
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_cache_entries_expire():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, default_ttl=30)
+
+    with patch("app.utils.cache.time.time", clock):
+        cache.set("default", 1)
+        cache.set("short", 2, ttl=5)
+        cache.set("absolute", 3, expires_at=clock.now + 60)
+
+        clock.now += 10
+        assert cache.get("short") is None
+        assert cache.get("default") == 1
+
+        clock.now += 25
+        assert cache.get("default", "gone") == "gone"
+        assert cache.get("absolute") == 3
+
+    # expired entries are dropped when read
+    assert len(cache) == 1
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, default_ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_ttl_cache_counts_hits_and_misses():
+    cache = TTLCache(maxsize=10, default_ttl=60)
+    assert cache.hit_ratio == 0.0
+
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("a")
+    cache.get("a")
+    cache.get("missing")
+
+    assert (cache.hits, cache.misses) == (3, 1)
+    assert cache.hit_ratio == 0.75
+
+
+def test_ttl_cache_requires_a_ttl():
+    with pytest.raises(ValueError):
+        TTLCache(maxsize=0)
+    with pytest.raises(ValueError):
+        TTLCache(maxsize=1).set("a", 1)
+
+
+def s3_url(name: str) -> str:
+    return f"https://{s3_manager.bucket_name}.s3.amazonaws.com/predictions/7/{name}.jpg"
+
+
+def test_presigned_urls_outlive_the_etag_they_are_served_under():
+    s3_manager._presign_cache.clear()
+    margin = settings.PRESIGN_CACHE_SAFETY_MARGIN_SECONDS
+    window_length = presign_window_length()
+    # late in a window, as a URL cached near its end would be
+    clock = FakeClock(now=1000 * window_length - 10)
+    etag_updated_at = datetime(2026, 10, 19, tzinfo=timezone.utc)
+
+    with patch("app.utils.cache.time.time", clock), \
+            patch.object(s3_manager, "_generate_presigned_url_sync", side_effect=lambda key, exp: f"signed:{key}:{clock.now + exp}") as sign:
+        first = s3_manager.get_s3_presigned_urls([s3_url("a")])[s3_url("a")]
+        first_etag = prediction_etag(1, etag_updated_at)
+        # valid until margin seconds after the window (and so the ETag) ends
+        assert sign.call_args.args[1] == 10 + margin
+        assert first.endswith(f":{1000 * window_length + margin}")
+
+        clock.now += 9
+        assert s3_manager.get_s3_presigned_urls([s3_url("a")])[s3_url("a")] == first
+        assert prediction_etag(1, etag_updated_at) == first_etag
+
+        # across the boundary: new ETag and a URL signed for the new window
+        clock.now += 1
+        second = s3_manager.get_s3_presigned_urls([s3_url("a")])[s3_url("a")]
+        assert prediction_etag(1, etag_updated_at) != first_etag
+        assert second != first
+        assert sign.call_count == 2
+        assert sign.call_args.args[1] == window_length + margin == settings.PRESIGNED_URL_EXPIRATION_SECONDS
+
+
+def test_short_lived_presigned_urls_are_not_cached():
+    s3_manager._presign_cache.clear()
+    expiration = settings.PRESIGN_CACHE_SAFETY_MARGIN_SECONDS
+
+    with patch.object(s3_manager, "_generate_presigned_url_sync", return_value="signed") as sign:
+        s3_manager.get_s3_presigned_urls([s3_url("a")], expiration=expiration)
+        s3_manager.get_s3_presigned_urls([s3_url("a")], expiration=expiration)
+
+    assert sign.call_count == 2
+    assert len(s3_manager._presign_cache) == 0